@@ -1,13 +1,27 @@
 """AI concierge endpoints."""
 from __future__ import annotations
 
-from fastapi import APIRouter, Query
+from typing import Iterator, List
 
-from app.models.base import ConciergeAnswer
-from app.services.concierge import answer_query
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.config import get_settings
+from app.models.base import AnswerCacheStats, ConciergeAnswer, ConciergeBatchRequest
+from app.api.utilities_stream import sse_event
+from app.services.concierge import (
+    DEFAULT_LIMIT,
+    DEFAULT_MODE,
+    SearchMode,
+    answer_cache,
+    answer_query,
+    stream_answer,
+)
+from app.services.concierge_pool import answer_batch
 
 
 router = APIRouter(prefix="/concierge", tags=["concierge"])
+settings = get_settings()
 
 
 @router.get("/ask", response_model=ConciergeAnswer)
@@ -21,6 +35,47 @@ def ask_concierge(
         deprecated_aliases=["language"],
         description="ISO 639-1 language code for the concierge response.",
     ),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=20, description="Maximum number of ranked records in the answer."),
+    mode: SearchMode = Query(DEFAULT_MODE, description="Rank by keywords, by local embedding similarity, or by both."),
 ) -> ConciergeAnswer:
     """Return a concierge answer for the provided query."""
-    return answer_query(query=query, language=language)
+    return answer_query(query=query, language=language, limit=limit, mode=mode)
+
+
+@router.get("/ask.sse")
+def ask_concierge_stream(
+    query: str,
+    language: str = Query(
+        "en",
+        min_length=2,
+        max_length=8,
+        alias="lang",
+        description="ISO 639-1 language code for the concierge response.",
+    ),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=20, description="Maximum number of ranked records in the answer."),
+    mode: SearchMode = Query(DEFAULT_MODE, description="Rank by keywords, by local embedding similarity, or by both."),
+) -> StreamingResponse:
+    """Stream each answer section as a Server-Sent Event, then the full answer with sources and confidence."""
+
+    def events() -> Iterator[bytes]:
+        for event in stream_answer(query=query, language=language, limit=limit, mode=mode):
+            yield sse_event(event)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.post("/ask/batch", response_model=List[ConciergeAnswer])
+async def ask_concierge_batch(payload: ConciergeBatchRequest) -> List[ConciergeAnswer]:
+    """Answer a list of questions, in order; large batches are spread over worker processes."""
+    if len(payload.items) > settings.concierge_batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.concierge_batch_max_items} questions can be answered per request",
+        )
+    return await answer_batch([(item.query, item.lang, item.limit, item.mode) for item in payload.items])
+
+
+@router.get("/cache", response_model=AnswerCacheStats)
+def concierge_cache_stats() -> AnswerCacheStats:
+    """Report size and hit/miss counters of this worker's concierge answer cache."""
+    return AnswerCacheStats(**answer_cache.stats())
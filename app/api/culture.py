@@ -1,32 +1,134 @@
 """Arts and culture endpoints."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterable, List, Optional, Union
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 
+from app.api.dependencies import geo_filter
+from app.core.caching import CacheContext, conditional_get
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor, resume_after
 from app.models.base import Event, Venue
-from app.services.data_loader import load_dataset
+from app.services.data_loader import get_snapshot, load_records
+from app.services.event_index import EventIndex
+from app.services.exports import ICS_MEDIA_TYPE, NDJSON_MEDIA_TYPE, ics_calendar, ndjson_lines
+from app.services.geo import GeoFilter, select_records
 
 
 router = APIRouter(prefix="/culture", tags=["culture"])
 
+EVENT_PAGE_SIZE = 50
+
 
 @router.get("/venues", response_model=List[Venue])
-def list_cultural_venues(city: Optional[str] = Query(None)) -> List[Venue]:
+def list_cultural_venues(
+    city: Optional[str] = Query(None),
+    geo: Optional[GeoFilter] = Depends(geo_filter),
+    cache: CacheContext = Depends(conditional_get("culture_venues", max_age=3600)),
+) -> Union[Response, List[Venue]]:
     """Return arts and culture venues."""
-    return [Venue(**item) for item in load_dataset("culture_venues", city=city)]
-
-
-@router.get("/events", response_model=List[Event])
-def list_events(city: Optional[str] = Query(None)) -> List[Event]:
-    """Return upcoming cultural events."""
-    events = []
-    for item in load_dataset("events", city=city):
-        start = item.get("start_time")
-        end = item.get("end_time")
-        start_dt = datetime.fromisoformat(start) if isinstance(start, str) else start
-        end_dt = datetime.fromisoformat(end) if isinstance(end, str) else end
-        events.append(Event(**{**item, "start_time": start_dt, "end_time": end_dt}))
+    if geo is not None:
+        # Viewports are too varied to be worth keeping in the byte cache.
+        return list(select_records(get_snapshot("culture_venues", city=city), geo))
+    return cache.render(lambda: load_records("culture_venues", city=city))
+
+
+@router.get(
+    "/events",
+    response_model=List[Event],
+    dependencies=[Depends(conditional_get("events", max_age=900))],
+)
+def list_events(
+    response: Response,
+    city: Optional[str] = Query(None),
+    from_: Optional[Union[datetime, date]] = Query(
+        None, alias="from", description="Only events still running at this time (a date means its midnight)"
+    ),
+    to: Optional[Union[datetime, date]] = Query(
+        None, description="Only events starting before this time (a date means its midnight)"
+    ),
+    category: Optional[str] = Query(None, description="Exact category (case-insensitive)"),
+    page_size: Optional[int] = Query(None, ge=1, le=500, description=f"Defaults to {EVENT_PAGE_SIZE}"),
+    cursor: Optional[str] = Query(None, description="Resume after the event named by X-Next-Cursor"),
+) -> List[Event]:
+    """Return cultural events in start-time order.
+
+    ``from``/``to`` select the events overlapping that window (local city time
+    unless the values carry an offset; a plain date is that day's midnight),
+    so a multi-day festival shows up in every weekend it spans. Results come in
+    pages of ``page_size`` (default :data:`EVENT_PAGE_SIZE`); further pages are
+    fetched by passing the ``X-Next-Cursor`` header back as ``cursor``. A
+    request without any filter, ``page_size`` or ``cursor`` still returns the
+    whole calendar, as this route did before it was paginated.
+    """
+    snapshot = get_snapshot("events", city=city)
+    index = EventIndex.for_snapshot(snapshot)
+    timeline = index.timeline(category)
+    if timeline is None:
+        return []
+    if page_size is None:
+        unfiltered = from_ is None and to is None and category is None and not cursor
+        page_size = len(timeline) if unfiltered else EVENT_PAGE_SIZE
+
+    start = 0
+    if cursor:
+        key = decode_cursor(cursor)
+        position = timeline.positions.get(key[0]) if len(key) == 1 and isinstance(key[0], str) else None
+        if position is None:
+            raise InvalidCursorError(cursor)
+        start = position + 1
+
+    window_start = index.seconds(from_) if from_ is not None else None
+    window_end = index.seconds(to) if to is not None else None
+    # Fetch one extra match to learn whether another page follows.
+    matched = list(islice(timeline.overlapping(window_start, window_end, start), page_size + 1))
+    events = [snapshot.records[timeline.rows[position]] for position in matched[:page_size]]
+    if len(matched) > page_size:
+        response.headers["X-Next-Cursor"] = encode_cursor(events[-1].id)
     return events
+
+
+@router.get("/events/export.ndjson", response_class=StreamingResponse)
+def export_events(
+    city: Optional[str] = Query(None),
+    category: Optional[str] = Query(None, description="Exact category (case-insensitive)"),
+    after: Optional[str] = Query(None, description="Resume after the event with this id (the last line received)"),
+    cache: CacheContext = Depends(conditional_get("events", max_age=900)),
+) -> StreamingResponse:
+    """Stream every event, in start-time order, as newline-delimited JSON."""
+    snapshot = get_snapshot("events", city=city)
+    timeline = EventIndex.for_snapshot(snapshot).timeline(category)
+    rows: Iterable[int] = ()
+    if timeline is not None:
+        start = resume_after(timeline.positions, after)
+        rows = (timeline.rows[position] for position in range(start, len(timeline)))
+    return StreamingResponse(ndjson_lines(snapshot, rows), media_type=NDJSON_MEDIA_TYPE, headers=cache.headers)
+
+
+@router.get("/events.ics", response_class=StreamingResponse)
+def events_calendar(
+    city: Optional[str] = Query(None),
+    from_: Optional[Union[datetime, date]] = Query(
+        None, alias="from", description="Only events still running at this time (a date means its midnight)"
+    ),
+    to: Optional[Union[datetime, date]] = Query(
+        None, description="Only events starting before this time (a date means its midnight)"
+    ),
+    category: Optional[str] = Query(None, description="Exact category (case-insensitive)"),
+    cache: CacheContext = Depends(conditional_get("events", max_age=900)),
+) -> StreamingResponse:
+    """Stream events as an iCalendar feed that calendar apps can subscribe to."""
+    snapshot = get_snapshot("events", city=city)
+    index = EventIndex.for_snapshot(snapshot)
+    timeline = index.timeline(category)
+    events: Iterable[Event] = ()
+    if timeline is not None:
+        window_start = index.seconds(from_) if from_ is not None else None
+        window_end = index.seconds(to) if to is not None else None
+        positions = timeline.overlapping(window_start, window_end)
+        events = (snapshot.records[timeline.rows[position]] for position in positions)
+    feed = ics_calendar(events, index.zone, snapshot.modified_at)
+    return StreamingResponse(feed, media_type=ICS_MEDIA_TYPE, headers=cache.headers)
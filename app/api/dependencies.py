@@ -0,0 +1,27 @@
+"""Query-parameter dependencies shared by several routers."""
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import Query
+
+from app.services.geo import BBox, GeoFilter
+
+
+def geo_filter(
+    bbox: Optional[str] = Query(None, description="Viewport as west,south,east,north in degrees."),
+    near: Optional[str] = Query(None, description="Sort by distance from lat,lng."),
+    radius: Optional[float] = Query(None, gt=0, le=50_000, description="Limit 'near' results to this many metres."),
+) -> Optional[GeoFilter]:
+    """Parse the spatial query parameters accepted by map-backed list endpoints."""
+
+    return GeoFilter.parse(bbox, near, radius)
+
+
+def viewport(
+    bbox: Optional[str] = Query(None, description="Viewport as west,south,east,north in degrees."),
+) -> Optional[BBox]:
+    """Parse an optional ``bbox`` viewport for cluster endpoints."""
+
+    geo = GeoFilter.parse(bbox=bbox)
+    return geo.bbox if geo is not None else None
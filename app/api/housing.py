@@ -1,49 +1,146 @@
 """Housing and rental endpoints."""
 from __future__ import annotations
 
-from typing import List, Optional
+from itertools import islice
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 
-from app.models.base import MapMarker, RentalListing
-from app.services.data_loader import load_dataset
+from app.api.dependencies import geo_filter, viewport
+from app.core.caching import CacheContext, conditional_get
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor, resume_after
+from app.models.base import MapCluster, MapMarker, RentalListing
+from app.services import bitmap
+from app.services.clustering import ClusterIndex, to_map_clusters
+from app.services.data_loader import get_snapshot, load_records
+from app.services.exports import NDJSON_MEDIA_TYPE, ndjson_lines
+from app.services.geo import BBox, GeoFilter, GeoIndex
+from app.services.rental_index import RentalIndex
 
 
 router = APIRouter(prefix="/housing", tags=["housing"])
 
 
-@router.get("", response_model=List[MapMarker])
-def housing_map_markers() -> List[MapMarker]:
+def _marker_name(listing: RentalListing) -> str:
+    return f"{listing.bedrooms}BR · {listing.neighborhood}"
+
+
+@router.get(
+    "",
+    response_model=List[MapMarker],
+    dependencies=[Depends(conditional_get("rentals", max_age=300))],
+)
+def housing_map_markers(city: Optional[str] = Query(None)) -> List[MapMarker]:
     """Return simplified housing markers for the map view."""
     return [
-        MapMarker(id=1, name="2BR · Kalsa", lat=38.1169, lng=13.3735),
-        MapMarker(id=2, name="Loft · Centro", lat=38.12, lng=13.357),
+        MapMarker(id=row + 1, name=_marker_name(listing), lat=listing.coordinates.lat, lng=listing.coordinates.lng)
+        for row, listing in enumerate(load_records("rentals", city=city))
     ]
 
 
-@router.get("/rentals", response_model=List[RentalListing])
+@router.get(
+    "/clusters",
+    response_model=List[MapCluster],
+    dependencies=[Depends(conditional_get("rentals", max_age=300))],
+)
+def housing_clusters(
+    zoom: int = Query(..., ge=0, le=22),
+    city: Optional[str] = Query(None),
+    bbox: Optional[BBox] = Depends(viewport),
+) -> List[MapCluster]:
+    """Return rental markers clustered for the given map zoom level and viewport."""
+    snapshot = get_snapshot("rentals", city=city)
+    hits = ClusterIndex.for_snapshot(snapshot).query(zoom, bbox)
+    return to_map_clusters(hits, snapshot.records, _marker_name)
+
+
+@router.get(
+    "/rentals",
+    response_model=List[RentalListing],
+    dependencies=[Depends(conditional_get("rentals", max_age=300))],
+)
 def list_rentals(
+    response: Response,
     furnished: Optional[bool] = Query(None),
     kid_friendly: Optional[bool] = Query(None),
     pet_friendly: Optional[bool] = Query(None),
+    neighborhood: Optional[str] = Query(None, description="Exact neighborhood name (case-insensitive)"),
     q: Optional[str] = Query(None, description="Free-text search in title/neighborhood"),
     city: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Resume after the listing named by X-Next-Cursor"),
+    include_total: bool = Query(False, description="Report the number of matches in X-Total-Count"),
+    geo: Optional[GeoFilter] = Depends(geo_filter),
 ) -> List[RentalListing]:
-    """Return rental listings filtered by attributes."""
-    rentals = [RentalListing(**item) for item in load_dataset("rentals", city=city)]
-    results = []
-    for listing in rentals:
-        if furnished is not None and listing.furnished != furnished:
-            continue
-        if kid_friendly is not None and listing.kid_friendly != kid_friendly:
-            continue
-        if pet_friendly is not None and listing.pet_friendly != pet_friendly:
-            continue
-        if q and (q.lower() not in listing.title.lower() and q.lower() not in listing.neighborhood.lower()):
-            continue
-        results.append(listing)
-    start = (page - 1) * page_size
-    end = start + page_size
-    return results[start:end]
+    """Return rental listings filtered by attributes and location.
+
+    Pages can be walked with ``page`` or, cheaper for deep pages, by passing the
+    ``X-Next-Cursor`` header of the previous response back as ``cursor``. With
+    ``near`` the listings come nearest first.
+    """
+    snapshot = get_snapshot("rentals", city=city)
+    index = RentalIndex.for_snapshot(snapshot)
+    rows = index.all
+    for name, wanted in (("furnished", furnished), ("kid_friendly", kid_friendly), ("pet_friendly", pet_friendly)):
+        if wanted is not None:
+            rows &= index.flag(name, wanted)
+    if neighborhood:
+        rows &= index.neighborhood(neighborhood.strip())
+    needle = q.lower() if q else None
+    if needle:
+        rows &= index.text_candidates(needle)
+    geo_index = GeoIndex.for_snapshot(snapshot) if geo is not None else None
+    nearest_first = geo is not None and geo.near is not None
+    if geo_index is not None and not nearest_first:
+        rows &= bitmap.from_positions(geo_index.search(geo), index.size)
+
+    start, skip = 0, (page - 1) * page_size
+    after: Optional[Tuple[float, int]] = None
+    if cursor:
+        key = decode_cursor(cursor)
+        position = index.positions.get(key[0]) if key and isinstance(key[0], str) else None
+        if nearest_first:
+            # Distance-ordered pages resume after the (distance, row) of the previous page's last listing.
+            if position is None or len(key) != 2 or not isinstance(key[1], (int, float)):
+                raise InvalidCursorError(cursor)
+            after = (float(key[1]), position)
+        else:
+            if position is None or len(key) != 1:
+                raise InvalidCursorError(cursor)
+            start = position + 1
+        skip = 0
+
+    # Fetch one extra match to learn whether another page follows.
+    if geo_index is not None and nearest_first:
+        pairs = index.scan_ordered(rows, needle, geo_index.nearest(geo, after))
+        matched_pairs = list(islice(pairs, skip, skip + page_size + 1))
+        matched = [row for _, row in matched_pairs]
+    else:
+        matched = list(islice(index.scan(rows, needle, start), skip, skip + page_size + 1))
+    page_rows = matched[:page_size]
+    listings = [snapshot.records[row] for row in page_rows]
+    if len(matched) > page_size:
+        last = listings[-1].id
+        next_key = (last, matched_pairs[page_size - 1][0]) if nearest_first else (last,)
+        response.headers["X-Next-Cursor"] = encode_cursor(*next_key)
+    if include_total:
+        if geo_index is not None and nearest_first:
+            rows &= bitmap.from_positions(geo_index.search(geo), index.size)
+        total = bitmap.count(rows) if needle is None else sum(1 for _ in index.scan(rows, needle))
+        response.headers["X-Total-Count"] = str(total)
+    return listings
+
+
+@router.get("/rentals/export.ndjson", response_class=StreamingResponse)
+def export_rentals(
+    city: Optional[str] = Query(None),
+    after: Optional[str] = Query(None, description="Resume after the listing with this id (the last line received)"),
+    cache: CacheContext = Depends(conditional_get("rentals", max_age=300)),
+) -> StreamingResponse:
+    """Stream every rental listing, in catalogue order, as newline-delimited JSON."""
+    snapshot = get_snapshot("rentals", city=city)
+    start = resume_after(RentalIndex.for_snapshot(snapshot).positions, after)
+    rows = range(start, len(snapshot.records))
+    return StreamingResponse(ndjson_lines(snapshot, rows), media_type=NDJSON_MEDIA_TYPE, headers=cache.headers)
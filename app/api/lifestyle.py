@@ -1,38 +1,36 @@
 """Food, cafés, and nightlife endpoints."""
 from __future__ import annotations
 
-from typing import Iterable, List, Optional, Sequence
+from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 
+from app.api.dependencies import geo_filter
+from app.core.caching import conditional_get
 from app.models.base import Venue
-from app.services.data_loader import load_dataset
+from app.services import bitmap
+from app.services.data_loader import get_snapshot
+from app.services.geo import GeoFilter, GeoIndex
+from app.services.venue_index import VenueTagIndex
 
 
 router = APIRouter(prefix="/lifestyle", tags=["lifestyle"])
 
 
-_TAG_LOOKUP: dict[str, Sequence[str]] = {
-    "has_wifi": ("wifi", "wi-fi"),
-    "remote_work_friendly": ("remote work friendly", "remote-work-friendly", "remote-friendly"),
-    "vegetarian_friendly": ("vegetarian friendly", "vegetarian-friendly", "vegetarian options"),
-    "family_friendly": ("family friendly", "family-friendly"),
+# Boolean query parameters and the canonical tag each one tests.
+_FLAG_TAGS = {
+    "has_wifi": "wifi",
+    "remote_work_friendly": "remote work friendly",
+    "vegetarian_friendly": "vegetarian friendly",
+    "family_friendly": "family friendly",
 }
 
 
-def _normalise_tags(tags: Iterable[str]) -> set[str]:
-    return {tag.lower().replace("-", " ") for tag in tags}
-
-
-def _matches_flag(tags: set[str], flag: Optional[bool], lookup_key: str) -> bool:
-    if flag is None:
-        return True
-    candidates = {item.replace("-", " ") for item in _TAG_LOOKUP[lookup_key]}
-    has_tag = any(candidate in tags for candidate in candidates)
-    return has_tag if flag else not has_tag
-
-
-@router.get("/venues", response_model=List[Venue])
+@router.get(
+    "/venues",
+    response_model=List[Venue],
+    dependencies=[Depends(conditional_get("venues", max_age=3600, city_scoped=False))],
+)
 def list_lifestyle_venues(
     venue_type: Optional[str] = Query(None, description="Filter by venue type such as cafe or bar."),
     has_wifi: Optional[bool] = Query(
@@ -47,21 +45,32 @@ def list_lifestyle_venues(
     family_friendly: Optional[bool] = Query(
         None, description="Filter venues that welcome families with kids."
     ),
+    tags: Optional[str] = Query(
+        None,
+        description="Tag expression: commas AND clauses, '|' ORs tags within a clause, '!' negates a tag "
+        "(e.g. 'wifi|remote-work-friendly,!late-night').",
+    ),
+    geo: Optional[GeoFilter] = Depends(geo_filter),
 ) -> List[Venue]:
     """Return curated food, café, and nightlife venues with optional filters."""
-    venues = [Venue(**item) for item in load_dataset("venues")]
-    results: List[Venue] = []
-    for venue in venues:
-        if venue_type and venue.type.lower() != venue_type.lower():
-            continue
-        normalised_tags = _normalise_tags(venue.tags)
-        if not _matches_flag(normalised_tags, has_wifi, "has_wifi"):
-            continue
-        if not _matches_flag(normalised_tags, remote_work_friendly, "remote_work_friendly"):
-            continue
-        if not _matches_flag(normalised_tags, vegetarian_friendly, "vegetarian_friendly"):
-            continue
-        if not _matches_flag(normalised_tags, family_friendly, "family_friendly"):
-            continue
-        results.append(venue)
-    return results
+    snapshot = get_snapshot("venues")
+    index = VenueTagIndex.for_snapshot(snapshot)
+    rows = index.all
+    if venue_type:
+        rows &= index.venue_type(venue_type)
+    flags = {
+        "has_wifi": has_wifi,
+        "remote_work_friendly": remote_work_friendly,
+        "vegetarian_friendly": vegetarian_friendly,
+        "family_friendly": family_friendly,
+    }
+    for name, wanted in flags.items():
+        if wanted is not None:
+            rows &= index.tag(_FLAG_TAGS[name], wanted)
+    if tags:
+        rows &= index.evaluate(tags)
+
+    records = snapshot.records
+    if geo is None:
+        return [records[row] for row in bitmap.iter_bits(rows)]
+    return [records[row] for row in bitmap.select(rows, GeoIndex.for_snapshot(snapshot).search(geo))]
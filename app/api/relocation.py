@@ -3,16 +3,20 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
 
+from app.core.caching import CacheContext, conditional_get
 from app.models.base import RelocationPack
-from app.services.data_loader import load_dataset
+from app.services.data_loader import load_records
 
 
 router = APIRouter(prefix="/relocation", tags=["relocation"])
 
 
 @router.get("/packs", response_model=List[RelocationPack])
-def list_relocation_packs(city: Optional[str] = Query(None)) -> List[RelocationPack]:
+def list_relocation_packs(
+    city: Optional[str] = Query(None),
+    cache: CacheContext = Depends(conditional_get("relocation", max_age=3600)),
+) -> Response:
     """Return relocation starter packs for supported cities."""
-    return [RelocationPack(**item) for item in load_dataset("relocation", city=city)]
+    return cache.render(lambda: load_records("relocation", city=city))
@@ -1,62 +1,200 @@
 """Safety related endpoints."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
 
-from app.models.base import SafetyMarker, SafetyZone
-from app.services.data_loader import load_dataset
+from app.api.dependencies import viewport
+from app.core.caching import CacheContext, conditional_get
+from app.core.config import get_settings
+from app.models.base import (
+    MapCluster,
+    RouteRisk,
+    RouteRiskRequest,
+    SafetyMarker,
+    SafetyZone,
+    ZoneExposure,
+    ZoneLookupRequest,
+    ZoneMatch,
+)
+from app.services.clustering import ClusterIndex, to_map_clusters
+from app.services.data_loader import DatasetSnapshot, get_snapshot, load_records
+from app.services.geo import BBox, decode_polyline, polygon_centroid
+from app.services.tiles import MAX_ZOOM as TILE_MAX_ZOOM, zone_tile
+from app.services.zones import RISK_LEVELS, ZoneIndex
 
 
+settings = get_settings()
 router = APIRouter(prefix="/safety", tags=["safety"])
 
 
-@router.get("", response_model=List[SafetyMarker])
-def safety_map_markers() -> List[SafetyMarker]:
-    """Return simplified safety markers for the map view."""
-    return [
-        SafetyMarker(id=1, lat=38.118, lng=13.37, risk="high"),
-        SafetyMarker(id=2, lat=38.125, lng=13.34, risk="medium"),
-        SafetyMarker(id=3, lat=38.105, lng=13.37, risk="low"),
-    ]
+def _zone_centroid(zone: SafetyZone) -> Tuple[float, float]:
+    return polygon_centroid([(point.lat, point.lng) for point in zone.polygon])
+
+
+def _build_zone_clusters(snapshot: DatasetSnapshot) -> ClusterIndex:
+    centroids = [_zone_centroid(zone) for zone in snapshot.records]
+    return ClusterIndex(
+        [lat for lat, _ in centroids],
+        [lng for _, lng in centroids],
+        ranks=[RISK_LEVELS.index(zone.risk_level) for zone in snapshot.records],
+    )
+
+
+@router.get(
+    "",
+    response_model=List[SafetyMarker],
+    dependencies=[Depends(conditional_get("safety", max_age=600))],
+)
+def safety_map_markers(city: Optional[str] = Query(None)) -> List[SafetyMarker]:
+    """Return simplified safety markers (zone centroids) for the map view."""
+    markers: List[SafetyMarker] = []
+    for row, zone in enumerate(load_records("safety", city=city)):
+        lat, lng = _zone_centroid(zone)
+        markers.append(SafetyMarker(id=row + 1, lat=lat, lng=lng, risk=zone.risk_level))
+    return markers
+
 
+@router.get(
+    "/clusters",
+    response_model=List[MapCluster],
+    dependencies=[Depends(conditional_get("safety", max_age=600))],
+)
+def safety_clusters(
+    zoom: int = Query(..., ge=0, le=22),
+    city: Optional[str] = Query(None),
+    bbox: Optional[BBox] = Depends(viewport),
+) -> List[MapCluster]:
+    """Return safety zone markers clustered by zoom level; clusters carry their highest risk."""
+    snapshot = get_snapshot("safety", city=city)
+    hits = snapshot.derive("zone_clusters", _build_zone_clusters).query(zoom, bbox)
+    return to_map_clusters(hits, snapshot.records, lambda zone: zone.neighborhood, RISK_LEVELS)
 
-@router.get("/zones", response_model=List[SafetyZone])
+
+@router.get(
+    "/zones",
+    response_model=List[SafetyZone],
+    dependencies=[Depends(conditional_get("safety", max_age=600))],
+)
 def list_safety_zones(city: Optional[str] = Query(None)) -> List[SafetyZone]:
     """Return safety zones for the active city."""
-    converted = []
-    for zone in load_dataset("safety", city=city):
-        updated = zone.get("updated_at")
-        if isinstance(updated, str):
-            updated_dt = datetime.fromisoformat(updated)
-        else:
-            updated_dt = updated
-        converted.append(SafetyZone(**{**zone, "updated_at": updated_dt}))
-    return converted
+    return list(load_records("safety", city=city))
+
+
+def _zone_match(zones: Sequence[SafetyZone], lat: float, lng: float, position: Optional[int]) -> ZoneMatch:
+    if position is None:
+        return ZoneMatch(lat=lat, lng=lng)
+    zone = zones[position]
+    return ZoneMatch(lat=lat, lng=lng, zone_id=zone.id, neighborhood=zone.neighborhood, risk_level=zone.risk_level)
+
+
+@router.get(
+    "/lookup",
+    response_model=ZoneMatch,
+    dependencies=[Depends(conditional_get("safety", max_age=600))],
+)
+def lookup_zone(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    city: Optional[str] = Query(None),
+) -> ZoneMatch:
+    """Return the safety zone containing a point, if any."""
+    snapshot = get_snapshot("safety", city=city)
+    return _zone_match(snapshot.records, lat, lng, ZoneIndex.for_snapshot(snapshot).locate(lat, lng))
+
+
+@router.post("/lookup", response_model=List[ZoneMatch])
+def lookup_zones(payload: ZoneLookupRequest, city: Optional[str] = Query(None)) -> List[ZoneMatch]:
+    """Resolve a batch of points (such as a GPS trace) to their containing safety zones."""
+    if len(payload.points) > settings.safety_lookup_max_points:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.safety_lookup_max_points} points can be looked up per request",
+        )
+    snapshot = get_snapshot("safety", city=city)
+    positions = ZoneIndex.for_snapshot(snapshot).locate_many((point.lat, point.lng) for point in payload.points)
+    return [
+        _zone_match(snapshot.records, point.lat, point.lng, position)
+        for point, position in zip(payload.points, positions)
+    ]
 
 
 @router.get("/zones.geojson")
-def list_safety_zones_geojson(city: Optional[str] = Query(None)) -> Dict[str, Any]:
+def list_safety_zones_geojson(
+    city: Optional[str] = Query(None),
+    cache: CacheContext = Depends(conditional_get("safety", max_age=600)),
+) -> Response:
     """Return safety zones as a GeoJSON FeatureCollection for map rendering."""
-    zones = load_dataset("safety", city=city)
+    return cache.render(lambda: _zones_feature_collection(load_records("safety", city=city)))
+
+
+@router.post("/route-risk", response_model=List[RouteRisk])
+def score_routes(payload: RouteRiskRequest, city: Optional[str] = Query(None)) -> List[RouteRisk]:
+    """Score candidate routes by the distance they spend in each safety zone."""
+    if len(payload.routes) > settings.route_risk_max_routes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.route_risk_max_routes} routes can be scored per request",
+        )
+    snapshot = get_snapshot("safety", city=city)
+    index = ZoneIndex.for_snapshot(snapshot)
+    results: List[RouteRisk] = []
+    for route in payload.routes:
+        if route.polyline is not None:
+            points = decode_polyline(route.polyline)
+        else:
+            points = [(point.lat, point.lng) for point in route.points or ()]
+        total, exposure = index.route_exposure(points)
+        crossed = sorted(exposure, key=lambda position: (-index.ranks[position], position))
+        zones = [
+            ZoneExposure(
+                zone_id=snapshot.records[position].id,
+                neighborhood=snapshot.records[position].neighborhood,
+                risk_level=snapshot.records[position].risk_level,
+                distance_m=round(exposure[position], 1),
+            )
+            for position in crossed
+        ]
+        results.append(
+            RouteRisk(
+                id=route.id,
+                distance_m=round(total, 1),
+                score=round(index.route_score(total, exposure), 4),
+                max_risk=zones[0].risk_level if zones else None,
+                zones=zones,
+            )
+        )
+    return results
+
+
+@router.get("/tiles/{z}/{x}/{y}")
+def safety_zone_tile(
+    z: int = Path(..., ge=0, le=TILE_MAX_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    city: Optional[str] = Query(None),
+    cache: CacheContext = Depends(conditional_get("safety", max_age=600)),
+) -> Response:
+    """Return one map tile of safety zones as GeoJSON, simplified and clipped for its zoom level."""
+    if x >= 2**z or y >= 2**z:
+        raise HTTPException(status_code=404, detail="Tile is outside the zoom level's grid")
+    return cache.render(lambda: zone_tile(get_snapshot("safety", city=city), z, x, y))
+
+
+def _zones_feature_collection(zones: Sequence[SafetyZone]) -> Dict[str, Any]:
     features: List[Dict[str, Any]] = []
     for zone in zones:
-        updated = zone.get("updated_at")
-        updated_value = (
-            updated.isoformat() if isinstance(updated, datetime) else str(updated)
-        )
         properties = {
-            "id": zone["id"],
-            "neighborhood": zone["neighborhood"],
-            "risk_level": zone["risk_level"],
-            "trend": zone["trend"],
-            "updated_at": updated_value,
-            "description": zone["description"],
+            "id": zone.id,
+            "neighborhood": zone.neighborhood,
+            "risk_level": zone.risk_level,
+            "trend": zone.trend,
+            "updated_at": zone.updated_at.isoformat(),
+            "description": zone.description,
         }
         # Polygon is stored as list of objects {lat, lng} -> convert to [lng, lat]
-        ring = [[pt["lng"], pt["lat"]] for pt in zone["polygon"]]
+        ring = [[pt.lng, pt.lat] for pt in zone.polygon]
         if ring and ring[0] != ring[-1]:
             ring.append(ring[0])
         geometry = {"type": "Polygon", "coordinates": [ring]}
@@ -3,34 +3,66 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 
-from app.models.base import MapMarker, School
-from app.services.data_loader import load_dataset
+from app.api.dependencies import geo_filter, viewport
+from app.core.caching import conditional_get
+from app.models.base import MapCluster, MapMarker, School
+from app.services.clustering import ClusterIndex, to_map_clusters
+from app.services.data_loader import get_snapshot, load_records
+from app.services.geo import BBox, GeoFilter, select_records
 
 
 router = APIRouter(prefix="/schools", tags=["schools"])
 
 
-@router.get("", response_model=List[MapMarker])
-def school_map_markers() -> List[MapMarker]:
+@router.get(
+    "",
+    response_model=List[MapMarker],
+    dependencies=[Depends(conditional_get("schools", max_age=3600))],
+)
+def school_map_markers(city: Optional[str] = Query(None)) -> List[MapMarker]:
     """Return simplified school markers for the map view."""
     return [
-        MapMarker(id=1, name="Bilingual Montessori", lat=38.131, lng=13.36),
-        MapMarker(id=2, name="International School", lat=38.104, lng=13.354),
+        MapMarker(id=row + 1, name=school.name, lat=school.coordinates.lat, lng=school.coordinates.lng)
+        for row, school in enumerate(load_records("schools", city=city))
+        if school.coordinates is not None
     ]
 
 
-@router.get("/directory", response_model=List[School])
+@router.get(
+    "/clusters",
+    response_model=List[MapCluster],
+    dependencies=[Depends(conditional_get("schools", max_age=3600))],
+)
+def school_clusters(
+    zoom: int = Query(..., ge=0, le=22),
+    city: Optional[str] = Query(None),
+    bbox: Optional[BBox] = Depends(viewport),
+) -> List[MapCluster]:
+    """Return school markers clustered for the given map zoom level and viewport."""
+    snapshot = get_snapshot("schools", city=city)
+    hits = ClusterIndex.for_snapshot(snapshot).query(zoom, bbox)
+    return to_map_clusters(hits, snapshot.records, lambda school: school.name)
+
+
+@router.get(
+    "/directory",
+    response_model=List[School],
+    dependencies=[Depends(conditional_get("schools", max_age=3600))],
+)
 def list_schools(
     curriculum: Optional[str] = Query(None),
     level: Optional[str] = Query(None),
     city: Optional[str] = Query(None),
+    geo: Optional[GeoFilter] = Depends(geo_filter),
 ) -> List[School]:
-    """Return the school directory filtered by curriculum and level."""
-    schools = [School(**item) for item in load_dataset("schools", city=city)]
+    """Return the school directory filtered by curriculum, level and location.
+
+    Schools without coordinates are left out of ``bbox``/``near`` queries.
+    """
     results: List[School] = []
-    for school in schools:
+    for school in select_records(get_snapshot("schools", city=city), geo):
         if curriculum and school.curriculum.lower() != curriculum.lower():
             continue
         if level and school.level.lower() != level.lower():
@@ -1,27 +1,75 @@
 """Shopping and essentials endpoints."""
 from __future__ import annotations
 
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
+from app.api.dependencies import geo_filter
+from app.core.caching import CacheContext, conditional_get
 from app.models.base import Market, Venue
-from app.services.data_loader import load_dataset
+from app.services import bitmap
+from app.services.data_loader import get_snapshot, load_records
+from app.services.geo import GeoFilter, GeoIndex, select_records
+from app.services.schedules import ScheduleIndex, city_timezone, minute_of_week, now_utc
 
 
 router = APIRouter(prefix="/shopping", tags=["shopping"])
 
 
-@router.get("/markets", response_model=List[Market])
-def list_markets(category: Optional[str] = Query(None), city: Optional[str] = Query(None)) -> List[Market]:
+def _open_now_slot(request: Request) -> Optional[str]:
+    """Key ``open_now`` responses by the current schedule slice, so their ETag changes when openings do."""
+    if not request.query_params.get("open_now"):
+        return None
+    city = request.query_params.get("city") or None
+    schedules = ScheduleIndex.for_snapshot(get_snapshot("markets", city=city))
+    return f"slot-{schedules.slot(minute_of_week(now_utc(), city_timezone(city)))}"
+
+
+@router.get(
+    "/markets",
+    response_model=List[Market],
+    dependencies=[Depends(conditional_get("markets", max_age=3600, vary=_open_now_slot))],
+)
+def list_markets(
+    category: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    open_at: Optional[datetime] = Query(
+        None, description="Only markets open at this time; without an offset it is read as the city's local time."
+    ),
+    open_now: Optional[bool] = Query(None, description="Only markets open (true) or closed (false) right now."),
+    geo: Optional[GeoFilter] = Depends(geo_filter),
+) -> List[Market]:
     """List markets, grocery stores and delivery options."""
-    markets = [Market(**item) for item in load_dataset("markets", city=city)]
+    snapshot = get_snapshot("markets", city=city)
+    if open_at is None and open_now is None:
+        markets = select_records(snapshot, geo)
+    else:
+        if open_at is not None and open_now is not None:
+            raise HTTPException(status_code=400, detail="Use either open_at or open_now, not both")
+        schedules = ScheduleIndex.for_snapshot(snapshot)
+        minute = minute_of_week(open_at or now_utc(), city_timezone(city))
+        rows = schedules.open_at(minute) if open_now is not False else schedules.closed_at(minute)
+        records = snapshot.records
+        if geo is None:
+            markets = [records[row] for row in bitmap.iter_bits(rows)]
+        else:
+            markets = [records[row] for row in bitmap.select(rows, GeoIndex.for_snapshot(snapshot).search(geo))]
     if category:
-        return [market for market in markets if market.category.lower() == category.lower()]
-    return markets
+        wanted = category.lower()
+        return [market for market in markets if market.category.lower() == wanted]
+    return list(markets)
 
 
 @router.get("/essentials", response_model=List[Venue])
-def list_essentials(city: Optional[str] = Query(None)) -> List[Venue]:
+def list_essentials(
+    city: Optional[str] = Query(None),
+    geo: Optional[GeoFilter] = Depends(geo_filter),
+    cache: CacheContext = Depends(conditional_get("essentials", max_age=3600)),
+) -> Union[Response, List[Venue]]:
     """Return curated essential venues such as pharmacies and electronics."""
-    return [Venue(**item) for item in load_dataset("essentials", city=city)]
+    if geo is not None:
+        # Viewports are too varied to be worth keeping in the byte cache.
+        return list(select_records(get_snapshot("essentials", city=city), geo))
+    return cache.render(lambda: load_records("essentials", city=city))
@@ -3,16 +3,20 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
 
+from app.core.caching import CacheContext, conditional_get
 from app.models.base import TransportOption
-from app.services.data_loader import load_dataset
+from app.services.data_loader import load_records
 
 
 router = APIRouter(prefix="/transport", tags=["transport"])
 
 
 @router.get("/options", response_model=List[TransportOption])
-def list_transport_options(city: Optional[str] = Query(None)) -> List[TransportOption]:
+def list_transport_options(
+    city: Optional[str] = Query(None),
+    cache: CacheContext = Depends(conditional_get("transport", max_age=3600)),
+) -> Response:
     """Return transport providers and availability information."""
-    return [TransportOption(**item) for item in load_dataset("transport", city=city)]
+    return cache.render(lambda: load_records("transport", city=city))
@@ -5,38 +5,82 @@ from typing import List, Optional, Dict, Any
 
 from fastapi import APIRouter, Query, HTTPException, Depends, Header
 
-from app.models.base import Group, UserProfile
-from app.services.data_loader import load_dataset
+from app.core.caching import conditional_get
+from app.models.base import Group, ProfileMatch, UserProfile
+from app.services import bitmap
+from app.services.data_loader import get_snapshot, load_records
+from app.services.profile_index import ProfileIndex
 from app.services.auth import create_user, authenticate_user, create_access_token, decode_token, get_user
 
 
 router = APIRouter(prefix="/community", tags=["community"])
 
 
-@router.get("/profiles", response_model=List[UserProfile])
+@router.get(
+    "/profiles",
+    response_model=List[UserProfile],
+    dependencies=[Depends(conditional_get("profiles", max_age=300, city_scoped=False))],
+)
 def list_profiles(
     interest: Optional[str] = Query(None),
     has_kids: Optional[bool] = Query(None),
 ) -> List[UserProfile]:
     """Return community profiles with optional filters."""
-    profiles = [UserProfile(**item) for item in load_dataset("profiles")]
-    results: List[UserProfile] = []
-    for profile in profiles:
-        if interest and interest.lower() not in [i.lower() for i in profile.interests]:
-            continue
-        if has_kids is not None and profile.has_kids != has_kids:
-            continue
-        results.append(profile)
-    return results
-
-
-@router.get("/groups", response_model=List[Group])
+    snapshot = get_snapshot("profiles")
+    index = ProfileIndex.for_snapshot(snapshot)
+    rows = index.all
+    if interest:
+        rows &= index.rows("interest", interest)
+    if has_kids is not None:
+        rows &= index.rows("has_kids", "yes" if has_kids else "no")
+    return [snapshot.records[row] for row in bitmap.iter_bits(rows)]
+
+
+@router.get(
+    "/profiles/matches",
+    response_model=List[ProfileMatch],
+    dependencies=[Depends(conditional_get("profiles", max_age=300, city_scoped=False))],
+)
+def match_profiles(
+    user_id: str = Query(..., description="Profile to find matches for"),
+    limit: int = Query(10, ge=1, le=50),
+) -> List[ProfileMatch]:
+    """Return the members sharing the most with ``user_id``, best match first.
+
+    Shared interests weigh most, then languages and having (or not having)
+    kids, then nationality.
+    """
+    snapshot = get_snapshot("profiles")
+    index = ProfileIndex.for_snapshot(snapshot)
+    row = index.positions.get(user_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{user_id}' not found")
+    matches: List[ProfileMatch] = []
+    for score, other in index.matches(row, limit):
+        shared = index.shared(row, other)
+        matches.append(
+            ProfileMatch(
+                profile=snapshot.records[other],
+                score=score,
+                shared_interests=[value for kind, value in shared if kind == "interest"],
+                shared_languages=[value for kind, value in shared if kind == "language"],
+            )
+        )
+    return matches
+
+
+@router.get(
+    "/groups",
+    response_model=List[Group],
+    dependencies=[Depends(conditional_get("groups", max_age=300, city_scoped=False))],
+)
 def list_groups(interest: Optional[str] = Query(None)) -> List[Group]:
     """Return community groups that can be joined."""
-    groups = [Group(**item) for item in load_dataset("groups")]
+    groups = load_records("groups")
     if interest:
-        return [group for group in groups if interest.lower() in [i.lower() for i in group.interests]]
-    return groups
+        wanted = interest.lower()
+        return [group for group in groups if wanted in [i.lower() for i in group.interests]]
+    return list(groups)
 
 
 # --- Auth sub-routes ---
@@ -1,36 +1,34 @@
 """Utility endpoints such as city selection and alerts."""
 from __future__ import annotations
 
-from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Response
 
-from app.models.base import Alert
-from app.services.data_loader import load_dataset
+from app.core.caching import CacheContext, conditional_get, response_cache
+from app.models.base import Alert, CacheStats, DatasetVersion
+from app.services.data_loader import load_records, loaded_snapshots
 
 
 router = APIRouter(prefix="/utilities", tags=["utilities"])
 
 
 @router.get("/cities", response_model=List[str])
-def list_cities() -> List[str]:
+def list_cities(
+    cache: CacheContext = Depends(conditional_get("cities", max_age=3600, city_scoped=False)),
+) -> Response:
     """Return the list of supported cities."""
-    return load_dataset("cities")
+    return cache.render(lambda: list(load_records("cities")))
 
 
-@router.get("/alerts", response_model=List[Alert])
+@router.get(
+    "/alerts",
+    response_model=List[Alert],
+    dependencies=[Depends(conditional_get("alerts", max_age=60))],
+)
 def list_alerts(city: Optional[str] = Query(None)) -> List[Alert]:
     """Return current safety/transport alerts."""
-    alerts = []
-    for item in load_dataset("alerts", city=city):
-        published = item.get("published_at")
-        if isinstance(published, str):
-            published_dt = datetime.fromisoformat(published)
-        else:
-            published_dt = published
-        alerts.append(Alert(**{**item, "published_at": published_dt}))
-    return alerts
+    return list(load_records("alerts", city=city))
 
 
 @router.get("/select-city", response_model=dict)
@@ -38,7 +36,28 @@ def select_city(city: str = Query(...)) -> dict:
     """Acknowledge city switch on the client (stateless server for MVP)."""
     # For MVP the server is stateless; clients pass ?city=... to endpoints.
     # This endpoint exists so the frontend can treat selection as a flow.
-    cities = set(load_dataset("cities"))
+    cities = set(load_records("cities"))
     if city not in cities:
         return {"ok": False, "message": "Unsupported city"}
     return {"ok": True, "city": city}
+
+
+@router.get("/datasets", response_model=List[DatasetVersion])
+def list_dataset_versions() -> List[DatasetVersion]:
+    """Report the dataset versions currently loaded by this worker."""
+    return [
+        DatasetVersion(
+            dataset=snapshot.name,
+            city=snapshot.city,
+            version=snapshot.version,
+            records=len(snapshot),
+            loaded_at=snapshot.loaded_at,
+        )
+        for snapshot in loaded_snapshots()
+    ]
+
+
+@router.get("/cache", response_model=CacheStats)
+def response_cache_stats() -> CacheStats:
+    """Report size and hit/miss counters of this worker's response cache."""
+    return CacheStats(**response_cache.stats())
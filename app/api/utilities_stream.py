@@ -4,7 +4,7 @@ from __future__ import annotations
 import asyncio
 import json
 from datetime import datetime, timezone
-from typing import AsyncIterator
+from typing import Any, AsyncIterator, Mapping
 
 from fastapi import APIRouter, WebSocket
 from fastapi.responses import StreamingResponse
@@ -12,13 +12,18 @@ from fastapi.responses import StreamingResponse
 router = APIRouter(prefix="/stream", tags=["stream"])
 
 
+def sse_event(payload: Mapping[str, Any]) -> bytes:
+    """Encode ``payload`` as a single Server-Sent Events ``data`` frame."""
+
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
 async def _sse_event_stream() -> AsyncIterator[bytes]:
     # Demo heartbeat/alert stream. Replace with real pub/sub in prod.
     i = 0
     while True:
         payload = {"type": "heartbeat", "index": i, "ts": _utc_timestamp()}
-        data = f"data: {json.dumps(payload)}\n\n".encode("utf-8")
-        yield data
+        yield sse_event(payload)
         await asyncio.sleep(3)
         i += 1
 
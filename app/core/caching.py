@@ -0,0 +1,383 @@
+"""HTTP caching helpers: dataset-versioned ETags, conditional GETs, encoded response bytes and computed values."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Generic, Hashable, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import Request, Response
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+
+from app.core.config import get_settings
+from app.services.data_loader import get_snapshot
+
+
+QueryParams = Tuple[Tuple[str, str], ...]
+T = TypeVar("T")
+
+
+class ResponseCache:
+    """Size-bounded LRU of encoded response bodies with hit/miss counters."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, count_miss: bool = True) -> Optional[bytes]:
+        """Return the body stored under ``key``; ``count_miss=False`` probes without recording a miss."""
+
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class TTLCache(Generic[T]):
+    """Entry-bounded LRU of computed values that expire ``ttl`` seconds after being stored.
+
+    :meth:`get_or_compute` is single-flight: while one caller computes a
+    missing key, concurrent callers asking for the same key wait for that
+    result instead of computing it again (counted as ``coalesced``). A failed
+    computation is not cached; one of the waiters retries it.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, T]]" = OrderedDict()
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, key: Hashable) -> Optional[Tuple[float, T]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        waited = False
+        while True:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    if waited:
+                        self.coalesced += 1
+                    else:
+                        self.hits += 1
+                    return entry[1]
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            pending.wait()
+            waited = True
+
+        try:
+            value = compute()
+            with self._lock:
+                if self.max_entries and self.ttl > 0:
+                    self._entries[key] = (self._clock() + self.ttl, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            pending.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.coalesced = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+settings = get_settings()
+response_cache = ResponseCache(settings.response_cache_max_bytes)
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode ``content`` exactly as :class:`fastapi.responses.JSONResponse` would."""
+
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class NotModified(Exception):
+    """Raised by :func:`conditional_get` when the client's cached copy is current."""
+
+    def __init__(self, headers: Dict[str, str]) -> None:
+        self.headers = headers
+        super().__init__("Not Modified")
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Return whether an ``Accept-Encoding`` header allows a gzip response."""
+
+    if not accept_encoding:
+        return False
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            return True
+    return False
+
+
+def gzip_etag(etag: str) -> str:
+    """Return the strong ETag of the gzip representation of ``etag``."""
+
+    return f'{etag[:-1]}-gzip"'
+
+
+class CacheContext:
+    """Cache identity of one request to a dataset-backed route."""
+
+    __slots__ = ("path", "params", "versions", "etag", "headers", "gzip")
+
+    def __init__(
+        self,
+        path: str,
+        params: QueryParams,
+        versions: Tuple[str, ...],
+        etag: str,
+        headers: Dict[str, str],
+        gzip: bool = False,
+    ) -> None:
+        self.path = path
+        self.params = params
+        self.versions = versions
+        self.etag = etag
+        self.headers = headers
+        self.gzip = gzip
+
+    @property
+    def key(self) -> Tuple[str, QueryParams, Tuple[str, ...]]:
+        return self.path, self.params, self.versions
+
+    def render(self, build: Callable[[], Any]) -> Response:
+        """Serve the encoded body for this request, building and caching it on a miss.
+
+        Meant for parameterless or low-cardinality routes: the payload is encoded
+        once per (route, parameters, dataset versions) and later requests skip
+        model serialisation and response validation entirely. Clients accepting
+        gzip get a compressed variant that is stored next to the plain body, so
+        each version is compressed once; bodies under ``gzip_min_size`` are sent
+        as is.
+        """
+
+        if self.gzip:
+            # Bodies under gzip_min_size never get a variant; only the plain lookup below counts as the miss.
+            compressed = response_cache.get(self.key + ("gzip",), count_miss=False)
+            if compressed is not None:
+                return self._response(compressed, compressed=True)
+        body = response_cache.get(self.key)
+        if body is None:
+            body = encode_json(build())
+            response_cache.put(self.key, body)
+        if not self.gzip or len(body) < settings.gzip_min_size:
+            return self._response(body, compressed=False)
+        compressed = gzip.compress(body, compresslevel=settings.gzip_level, mtime=0)
+        response_cache.put(self.key + ("gzip",), compressed)
+        return self._response(compressed, compressed=True)
+
+    def _response(self, body: bytes, compressed: bool) -> Response:
+        headers = dict(self.headers)
+        if compressed:
+            headers["ETag"] = gzip_etag(self.etag)
+            headers["Content-Encoding"] = "gzip"
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+_declared_params: Dict[Callable[..., Any], FrozenSet[str]] = {}
+
+
+def declared_params(request: Request) -> Optional[FrozenSet[str]]:
+    """Return the query parameter names the matched route (and its dependencies) declares.
+
+    ``None`` when the route cannot be resolved, e.g. outside the application's router.
+    """
+
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return None
+    names = _declared_params.get(endpoint)
+    if names is None:
+        for route in request.app.routes:
+            if isinstance(route, APIRoute) and route.endpoint is endpoint:
+                names = frozenset(field.alias for field in get_flat_dependant(route.dependant).query_params)
+                _declared_params[endpoint] = names
+                break
+    return names
+
+
+def normalise_params(request: Request) -> QueryParams:
+    """Return the route's declared query parameters sorted by name with blank values dropped.
+
+    Parameters the route ignores do not change its response, so they are left
+    out of ETags and cache keys; otherwise ``?x=1``, ``?x=2``, ... would each
+    store another copy of the same body.
+    """
+
+    declared = declared_params(request)
+    items = ((key, value.strip()) for key, value in request.query_params.multi_items())
+    return tuple(sorted((key, value) for key, value in items if value and (declared is None or key in declared)))
+
+
+def compute_etag(path: str, params: QueryParams, versions: Sequence[str]) -> str:
+    """Return a strong ETag for a route, its normalised parameters and dataset versions."""
+
+    digest = hashlib.sha256()
+    digest.update(path.encode("utf-8"))
+    for key, value in params:
+        digest.update(b"\0" + key.encode("utf-8") + b"=" + value.encode("utf-8"))
+    for version in versions:
+        digest.update(b"\1" + version.encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an ``If-None-Match`` header against ``etag`` (weak comparison, RFC 9110)."""
+
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_get(
+    *datasets: str,
+    max_age: int,
+    city_scoped: bool = True,
+    vary: Optional[Callable[[Request], Optional[str]]] = None,
+) -> Callable[[Request, Response], CacheContext]:
+    """Build a dependency that tags responses with an ETag derived from dataset versions.
+
+    When the request's ``If-None-Match`` already names the current tag (of either
+    the plain or the gzip representation) the dependency raises
+    :class:`NotModified`, so the endpoint never runs. ``city_scoped`` routes
+    resolve the datasets for the ``city`` query parameter. ``vary`` covers
+    requests whose response also depends on something else, such as the
+    current time: a non-``None`` value is folded into the ETag and the
+    response is marked ``no-cache`` so clients revalidate it on every use.
+    """
+
+    cache_control = f"public, max-age={max_age}"
+
+    def dependency(request: Request, response: Response) -> CacheContext:
+        city = (request.query_params.get("city") or None) if city_scoped else None
+        versions = tuple(get_snapshot(name, city).version for name in datasets)
+        extra = vary(request) if vary is not None else None
+        if extra is not None:
+            versions += (extra,)
+        params = normalise_params(request)
+        etag = compute_etag(request.url.path, params, versions)
+        policy = cache_control if extra is None else "no-cache"
+        headers = {"ETag": etag, "Cache-Control": policy, "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        for candidate in (etag, gzip_etag(etag)):
+            if etag_matches(if_none_match, candidate):
+                raise NotModified({**headers, "ETag": candidate})
+        response.headers.update(headers)
+        use_gzip = accepts_gzip(request.headers.get("accept-encoding"))
+        return CacheContext(request.url.path, params, versions, etag, headers, use_gzip)
+
+    return dependency
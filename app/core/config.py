@@ -20,6 +20,18 @@ class Settings(BaseSettings):
     log_level: str = Field("INFO", env="LACOSA_LOG_LEVEL")
     secret_key: str = Field("dev-secret-change-me", env="LACOSA_SECRET_KEY")
     access_token_expire_minutes: int = Field(60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    dataset_reload_enabled: bool = Field(True, env="LACOSA_DATASET_RELOAD")
+    dataset_reload_interval: float = Field(5.0, gt=0, env="LACOSA_DATASET_RELOAD_INTERVAL")
+    preload_datasets: bool = Field(False, env="LACOSA_PRELOAD_DATASETS")
+    response_cache_max_bytes: int = Field(16 * 1024 * 1024, ge=0, env="LACOSA_RESPONSE_CACHE_MAX_BYTES")
+    gzip_min_size: int = Field(1024, ge=0, env="LACOSA_GZIP_MIN_SIZE")
+    gzip_level: int = Field(6, ge=1, le=9, env="LACOSA_GZIP_LEVEL")
+    safety_lookup_max_points: int = Field(10_000, ge=1, env="LACOSA_SAFETY_LOOKUP_MAX_POINTS")
+    route_risk_max_routes: int = Field(500, ge=1, env="LACOSA_ROUTE_RISK_MAX_ROUTES")
+    concierge_cache_max_entries: int = Field(2048, ge=0, env="LACOSA_CONCIERGE_CACHE_MAX_ENTRIES")
+    concierge_cache_ttl: float = Field(300.0, ge=0, env="LACOSA_CONCIERGE_CACHE_TTL")
+    concierge_batch_max_items: int = Field(5000, ge=1, env="LACOSA_CONCIERGE_BATCH_MAX_ITEMS")
+    concierge_pool_workers: int = Field(0, ge=0, env="LACOSA_CONCIERGE_POOL_WORKERS")
 
     class Config:
         env_file = ".env"
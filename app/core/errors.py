@@ -4,10 +4,14 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
 
-from app.services.data_loader import DatasetNotFoundError, UnsupportedCityError
+from app.core.caching import NotModified
+from app.core.pagination import InvalidCursorError
+from app.services.data_loader import DatasetNotFoundError, DatasetValidationError, UnsupportedCityError
+from app.services.geo import InvalidGeoQueryError
+from app.services.venue_index import InvalidTagQueryError
 
 
 logger = logging.getLogger(__name__)
@@ -23,11 +27,38 @@ def _error_payload(code: str, message: str, details: Dict[str, Any] | None = Non
 def register_exception_handlers(app: FastAPI) -> None:
     """Register shared exception handlers on the FastAPI application."""
 
+    @app.exception_handler(NotModified)
+    async def not_modified_handler(request: Request, exc: NotModified) -> Response:  # type: ignore[override]
+        return Response(status_code=304, headers=exc.headers)
+
+    @app.exception_handler(InvalidCursorError)
+    async def invalid_cursor_handler(request: Request, exc: InvalidCursorError) -> JSONResponse:  # type: ignore[override]
+        return JSONResponse(status_code=400, content=_error_payload("invalid_cursor", str(exc)))
+
+    @app.exception_handler(InvalidGeoQueryError)
+    async def invalid_geo_query_handler(request: Request, exc: InvalidGeoQueryError) -> JSONResponse:  # type: ignore[override]
+        return JSONResponse(status_code=400, content=_error_payload("invalid_geo_query", str(exc)))
+
+    @app.exception_handler(InvalidTagQueryError)
+    async def invalid_tag_query_handler(request: Request, exc: InvalidTagQueryError) -> JSONResponse:  # type: ignore[override]
+        return JSONResponse(status_code=400, content=_error_payload("invalid_tag_query", str(exc)))
+
     @app.exception_handler(DatasetNotFoundError)
     async def dataset_not_found_handler(request: Request, exc: DatasetNotFoundError) -> JSONResponse:  # type: ignore[override]
         logger.warning("Dataset not found", extra={"path": request.url.path, "dataset": exc.dataset, "city": exc.city})
         return JSONResponse(status_code=404, content=_error_payload("dataset_not_found", str(exc)))
 
+    @app.exception_handler(DatasetValidationError)
+    async def dataset_invalid_handler(request: Request, exc: DatasetValidationError) -> JSONResponse:  # type: ignore[override]
+        logger.error(
+            "Dataset failed validation",
+            extra={"path": request.url.path, "dataset": exc.dataset, "city": exc.city, "reason": exc.reason},
+        )
+        return JSONResponse(
+            status_code=500,
+            content=_error_payload("dataset_invalid", f"Dataset '{exc.dataset}' is temporarily unavailable."),
+        )
+
     @app.exception_handler(UnsupportedCityError)
     async def unsupported_city_handler(request: Request, exc: UnsupportedCityError) -> JSONResponse:  # type: ignore[override]
         logger.info("Unsupported city requested", extra={"path": request.url.path, "city": exc.city})
@@ -0,0 +1,49 @@
+"""Opaque keyset cursors shared by paginated endpoints."""
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, List, Mapping, Optional
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or no longer applies."""
+
+    def __init__(self, cursor: str) -> None:
+        self.cursor = cursor
+        super().__init__("Pagination cursor is invalid or has expired")
+
+
+def encode_cursor(*key: Any) -> str:
+    """Encode the sort key of the last returned item as a URL-safe token."""
+
+    payload = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a token produced by :func:`encode_cursor`."""
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except ValueError as exc:
+        raise InvalidCursorError(cursor) from exc
+    if not isinstance(key, list):
+        raise InvalidCursorError(cursor)
+    return key
+
+
+def resume_after(positions: Mapping[str, int], after: Optional[str]) -> int:
+    """Return the position following the record with id ``after``, or ``0`` to start from the beginning.
+
+    Streaming exports use record ids as their resume key, so a client whose
+    download was interrupted passes the id on the last line it received.
+    """
+
+    if after is None:
+        return 0
+    position = positions.get(after)
+    if position is None:
+        raise InvalidCursorError(after)
+    return position + 1
@@ -1,6 +1,7 @@
 """Entry point for the LACOSA backend service."""
 from __future__ import annotations
 
+import gc
 import logging
 from contextlib import asynccontextmanager
 
@@ -11,21 +12,37 @@ from app.api import router as api_router
 from app.core.config import get_settings
 from app.core.errors import register_exception_handlers
 from app.core.logging import configure_logging
+from app.services.concierge_pool import shutdown_pool
+from app.services.data_loader import preload_snapshots
+from app.services.dataset_watcher import start_dataset_watcher, stop_dataset_watcher
 
 
 settings = get_settings()
 configure_logging(settings.log_level)
 logger = logging.getLogger(__name__)
 
+if settings.preload_datasets:
+    # With ``gunicorn --preload`` this runs once in the master; workers then share
+    # the snapshots copy-on-write. Freezing moves them out of the collector's reach
+    # so garbage collection in the workers does not dirty (and copy) those pages.
+    preload_snapshots()
+    gc.freeze()
+
 
 @asynccontextmanager
-def lifespan(app: FastAPI):
-    """Log startup and shutdown events."""
+async def lifespan(app: FastAPI):
+    """Log startup and shutdown events, run the dataset hot-reload watcher and stop the concierge pool."""
 
     logger.info("Starting LACOSA service", extra={"environment": settings.environment})
+    watcher = None
+    if settings.dataset_reload_enabled:
+        watcher = start_dataset_watcher(settings.dataset_reload_interval)
     try:
         yield
     finally:
+        if watcher is not None:
+            await stop_dataset_watcher(watcher)
+        shutdown_pool()
         logger.info("Stopping LACOSA service")
 
 
@@ -44,6 +61,7 @@ app.add_middleware(
     allow_credentials=settings.cors_allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
 )
 
 register_exception_handlers(app)
@@ -4,10 +4,17 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator
 
 
-class GeoPoint(BaseModel):
+class DatasetRecord(BaseModel):
+    """Base for records loaded from the datasets; snapshots share them across requests, so they are read-only."""
+
+    class Config:
+        allow_mutation = False
+
+
+class GeoPoint(DatasetRecord):
     lat: float = Field(..., description="Latitude coordinate")
     lng: float = Field(..., description="Longitude coordinate")
 
@@ -26,7 +33,17 @@ class SafetyMarker(BaseModel):
     risk: Literal["low", "medium", "high"]
 
 
-class SafetyZone(BaseModel):
+class MapCluster(BaseModel):
+    id: str = Field(..., description="Record id for single markers, cluster-<n> for clusters")
+    lat: float
+    lng: float
+    count: int = Field(..., ge=1, description="Number of records represented by the marker")
+    expansion_zoom: Optional[int] = Field(None, description="Zoom level at which a cluster splits apart")
+    name: Optional[str] = None
+    risk: Optional[Literal["low", "medium", "high"]] = None
+
+
+class SafetyZone(DatasetRecord):
     id: str
     neighborhood: str
     risk_level: Literal["low", "medium", "high"]
@@ -36,7 +53,50 @@ class SafetyZone(BaseModel):
     polygon: List[GeoPoint]
 
 
-class RentalListing(BaseModel):
+class ZoneLookupRequest(BaseModel):
+    points: List[GeoPoint] = Field(..., min_items=1, description="Points to resolve, e.g. a GPS trace")
+
+
+class ZoneMatch(BaseModel):
+    lat: float
+    lng: float
+    zone_id: Optional[str] = Field(None, description="Containing zone; the riskiest one where zones overlap")
+    neighborhood: Optional[str] = None
+    risk_level: Optional[Literal["low", "medium", "high"]] = None
+
+
+class RouteInput(BaseModel):
+    id: Optional[str] = Field(None, description="Client identifier echoed back in the result")
+    points: Optional[List[GeoPoint]] = Field(None, min_items=2)
+    polyline: Optional[str] = Field(None, description="Google encoded polyline (precision 5)")
+
+    @root_validator(skip_on_failure=True)
+    def _one_geometry(cls, values: dict) -> dict:  # noqa: N805 - pydantic validator signature
+        if (values.get("points") is None) == (values.get("polyline") is None):
+            raise ValueError("Provide exactly one of 'points' or 'polyline'")
+        return values
+
+
+class RouteRiskRequest(BaseModel):
+    routes: List[RouteInput] = Field(..., min_items=1)
+
+
+class ZoneExposure(BaseModel):
+    zone_id: str
+    neighborhood: str
+    risk_level: Literal["low", "medium", "high"]
+    distance_m: float
+
+
+class RouteRisk(BaseModel):
+    id: Optional[str] = None
+    distance_m: float
+    score: float = Field(..., ge=0.0, le=1.0, description="Distance-weighted risk, 0 = no zones, 1 = all high risk")
+    max_risk: Optional[Literal["low", "medium", "high"]] = None
+    zones: List[ZoneExposure]
+
+
+class RentalListing(DatasetRecord):
     id: str
     title: str
     price_eur: int
@@ -51,7 +111,7 @@ class RentalListing(BaseModel):
     url: Optional[str] = None
 
 
-class School(BaseModel):
+class School(DatasetRecord):
     id: str
     name: str
     curriculum: str
@@ -61,9 +121,10 @@ class School(BaseModel):
     tuition_eur: Optional[int] = None
     address: str
     application_tips: str
+    coordinates: Optional[GeoPoint] = None
 
 
-class Venue(BaseModel):
+class Venue(DatasetRecord):
     id: str
     name: str
     type: str
@@ -74,7 +135,7 @@ class Venue(BaseModel):
     url: Optional[str] = None
 
 
-class Market(BaseModel):
+class Market(DatasetRecord):
     id: str
     name: str
     category: str
@@ -83,7 +144,7 @@ class Market(BaseModel):
     coordinates: GeoPoint
 
 
-class Event(BaseModel):
+class Event(DatasetRecord):
     id: str
     name: str
     category: str
@@ -94,7 +155,7 @@ class Event(BaseModel):
     ticket_url: Optional[str] = None
 
 
-class TransportOption(BaseModel):
+class TransportOption(DatasetRecord):
     id: str
     mode: str
     provider: str
@@ -104,7 +165,7 @@ class TransportOption(BaseModel):
     safety_notes: str
 
 
-class Alert(BaseModel):
+class Alert(DatasetRecord):
     id: str
     category: str
     message: str
@@ -112,7 +173,7 @@ class Alert(BaseModel):
     published_at: datetime
 
 
-class UserProfile(BaseModel):
+class UserProfile(DatasetRecord):
     id: str
     name: str
     nationality: str
@@ -123,7 +184,14 @@ class UserProfile(BaseModel):
     bio: Optional[str] = None
 
 
-class Group(BaseModel):
+class ProfileMatch(BaseModel):
+    profile: UserProfile
+    score: int = Field(..., ge=0, description="Weighted overlap of interests, languages, nationality and kids.")
+    shared_interests: List[str]
+    shared_languages: List[str]
+
+
+class Group(DatasetRecord):
     id: str
     name: str
     description: str
@@ -144,7 +212,50 @@ class ConciergeAnswer(BaseModel):
     )
 
 
-class RelocationPack(BaseModel):
+class DatasetVersion(BaseModel):
+    dataset: str
+    city: Optional[str] = None
+    version: str = Field(..., description="Content hash of the dataset file currently served.")
+    records: int
+    loaded_at: datetime
+
+
+class CacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float = Field(..., ge=0.0, le=1.0)
+
+
+class ConciergeQuestion(BaseModel):
+    query: str = Field(..., min_length=1)
+    lang: str = Field("en", min_length=2, max_length=8, description="ISO 639-1 language code for the response.")
+    limit: int = Field(5, ge=1, le=20, description="Maximum number of ranked records in the answer.")
+    mode: Literal["keyword", "semantic", "hybrid"] = Field(
+        "keyword", description="Rank by keywords, by local embedding similarity, or by both."
+    )
+
+
+class ConciergeBatchRequest(BaseModel):
+    items: List[ConciergeQuestion] = Field(..., min_items=1)
+
+
+class AnswerCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    coalesced: int
+    misses: int
+    evictions: int
+    expirations: int
+    hit_rate: float = Field(..., ge=0.0, le=1.0)
+
+
+class RelocationPack(DatasetRecord):
     city: str
     visa_tips: str
     connectivity: str
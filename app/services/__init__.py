@@ -1,5 +1,3 @@
 """Service layer package."""
 
-from .data_loader import load_dataset  # re-export convenience
-
-
+from .data_loader import get_snapshot, load_dataset, load_records  # re-export convenience
@@ -0,0 +1,79 @@
+"""Row bitmaps stored as Python integers (bit ``i`` set means row ``i`` matches).
+
+Python's arbitrary-precision integers give word-at-a-time ``&``, ``|`` and
+``~`` in C, which makes them a compact, dependency-free bitmap for filtering
+whole datasets at once.
+"""
+from __future__ import annotations
+
+from typing import Callable, Iterable, Iterator
+
+
+def full(size: int) -> int:
+    """Return a bitmap with the first ``size`` bits set."""
+
+    return (1 << size) - 1
+
+
+def from_positions(positions: Iterable[int], size: int) -> int:
+    """Return a bitmap with the given row positions set."""
+
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def from_flags(flags: Iterable[object]) -> int:
+    """Return a bitmap of the rows whose flag is truthy."""
+
+    flags = list(flags)
+    return from_positions((index for index, flag in enumerate(flags) if flag), len(flags))
+
+
+def iter_bits(bitmap: int, start: int = 0) -> Iterator[int]:
+    """Yield the set positions of ``bitmap`` in ascending order, beginning at ``start``."""
+
+    if start:
+        bitmap = (bitmap >> start) << start
+    if not bitmap:
+        return
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    first = start >> 3
+    for offset in range(first, len(data)):
+        byte = data[offset]
+        base = offset << 3
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+
+def count(bitmap: int) -> int:
+    """Return the number of set bits."""
+
+    return bitmap.bit_count()
+
+
+def membership(bitmap: int) -> Callable[[int], bool]:
+    """Return a test for whether a position is set in ``bitmap``.
+
+    The bitmap is converted to bytes once, so each test is a byte lookup rather
+    than a shift of the whole integer (which would make a scan quadratic).
+    """
+
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    size = len(data)
+
+    def contains(position: int) -> bool:
+        offset = position >> 3
+        return offset < size and bool(data[offset] >> (position & 7) & 1)
+
+    return contains
+
+
+def select(bitmap: int, positions: Iterable[int]) -> Iterator[int]:
+    """Yield the ``positions`` whose bit is set in ``bitmap``, keeping their order."""
+
+    contains = membership(bitmap)
+    return (position for position in positions if contains(position))
@@ -0,0 +1,235 @@
+"""Hierarchical point clustering for map views, in the style of Mapbox's supercluster.
+
+Points are projected to Web Mercator ([0, 1] square) and greedily merged zoom
+level by zoom level, from ``MAX_ZOOM`` down to 0: at each level every point or
+cluster absorbs its unprocessed neighbours within ``RADIUS_PX`` screen pixels.
+Each level keeps its own grid, so a viewport query only touches the cells it
+overlaps and costs O(visible clusters) rather than O(points).
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.models.base import MapCluster
+from app.services.data_loader import DatasetSnapshot
+from app.services.geo import BBox, GeoIndex, mercator_lat, mercator_lng, mercator_x, mercator_y
+
+
+RADIUS_PX = 40
+EXTENT_PX = 512
+MIN_ZOOM = 0
+MAX_ZOOM = 16
+
+
+class ClusterHit(NamedTuple):
+    """One visible marker: a single point (``row`` set) or a cluster (``cluster_id`` set)."""
+
+    lat: float
+    lng: float
+    count: int
+    row: Optional[int]
+    cluster_id: Optional[int]
+    expansion_zoom: Optional[int]
+    rank: int
+
+
+def _radius(zoom: int) -> float:
+    return RADIUS_PX / (EXTENT_PX * 2**zoom)
+
+
+class _Level:
+    """Points and clusters visible at one zoom level, bucketed in a grid of ``cell`` units."""
+
+    def __init__(self, cell: float) -> None:
+        self.cell = cell
+        self.xs = array("d")
+        self.ys = array("d")
+        self.counts = array("I")
+        self.ranks = array("b")
+        # ``>= 0``: row of a single point; ``< 0``: negated cluster id.
+        self.origins = array("q")
+        # Zoom at which a cluster splits into its children (-1 for single points).
+        self.expansions = array("b")
+        self.grid: Dict[Tuple[int, int], array] = {}
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def add(self, x: float, y: float, count: int, rank: int, origin: int, expansion: int) -> None:
+        slot = len(self.xs)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.counts.append(count)
+        self.ranks.append(rank)
+        self.origins.append(origin)
+        self.expansions.append(expansion)
+        key = (math.floor(x / self.cell), math.floor(y / self.cell))
+        self.grid.setdefault(key, array("I")).append(slot)
+
+    def copy_from(self, other: "_Level", slot: int) -> None:
+        self.add(
+            other.xs[slot],
+            other.ys[slot],
+            other.counts[slot],
+            other.ranks[slot],
+            other.origins[slot],
+            other.expansions[slot],
+        )
+
+    def slots_in(self, x0: float, y0: float, x1: float, y1: float) -> Iterable[int]:
+        cell = self.cell
+        cx0, cx1 = math.floor(x0 / cell), math.floor(x1 / cell)
+        cy0, cy1 = math.floor(y0 / cell), math.floor(y1 / cell)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.grid):
+            buckets: Iterable[array] = (
+                slots for (cx, cy), slots in self.grid.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1
+            )
+        else:
+            buckets = (
+                self.grid.get((cx, cy), ()) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)
+            )
+        xs, ys = self.xs, self.ys
+        for slots in buckets:
+            for slot in slots:
+                if x0 <= xs[slot] <= x1 and y0 <= ys[slot] <= y1:
+                    yield slot
+
+
+class ClusterIndex:
+    """Precomputed clusters for every zoom level of one dataset version.
+
+    ``ranks`` (for example a risk level) are optional per-point integers; a
+    cluster reports the highest rank among its members.
+    """
+
+    def __init__(
+        self,
+        lats: Sequence[float],
+        lngs: Sequence[float],
+        rows: Optional[Sequence[int]] = None,
+        ranks: Optional[Sequence[int]] = None,
+    ) -> None:
+        self.size = len(lats)
+        points = _Level(_radius(MAX_ZOOM + 1))
+        for index in range(self.size):
+            row = rows[index] if rows is not None else index
+            rank = ranks[index] if ranks is not None else 0
+            points.add(mercator_x(lngs[index]), mercator_y(lats[index]), 1, rank, row, -1)
+        self._next_id = 1
+        self.levels: Dict[int, _Level] = {MAX_ZOOM + 1: points}
+        for zoom in range(MAX_ZOOM, MIN_ZOOM - 1, -1):
+            self.levels[zoom] = self._cluster(self.levels[zoom + 1], zoom)
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "ClusterIndex":
+        """Cluster the coordinates of a dataset whose records carry a ``GeoPoint``."""
+
+        return snapshot.derive("cluster_index", _build_from_geo)
+
+    def _cluster(self, previous: _Level, zoom: int) -> _Level:
+        radius = _radius(zoom)
+        # Re-bucket the previous level at this level's radius so neighbours are within one cell.
+        neighbours: Dict[Tuple[int, int], List[int]] = {}
+        for slot in range(len(previous)):
+            key = (math.floor(previous.xs[slot] / radius), math.floor(previous.ys[slot] / radius))
+            neighbours.setdefault(key, []).append(slot)
+
+        level = _Level(radius)
+        processed = bytearray(len(previous))
+        xs, ys, counts, ranks = previous.xs, previous.ys, previous.counts, previous.ranks
+        limit = radius * radius
+        for slot in range(len(previous)):
+            if processed[slot]:
+                continue
+            processed[slot] = 1
+            x, y = xs[slot], ys[slot]
+            cx, cy = math.floor(x / radius), math.floor(y / radius)
+            members = [slot]
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    for other in neighbours.get((gx, gy), ()):
+                        if not processed[other] and (xs[other] - x) ** 2 + (ys[other] - y) ** 2 <= limit:
+                            processed[other] = 1
+                            members.append(other)
+            if len(members) == 1:
+                level.copy_from(previous, slot)
+                continue
+            total = sum(counts[member] for member in members)
+            level.add(
+                sum(xs[member] * counts[member] for member in members) / total,
+                sum(ys[member] * counts[member] for member in members) / total,
+                total,
+                max(ranks[member] for member in members),
+                -self._next_id,
+                zoom + 1,
+            )
+            self._next_id += 1
+        return level
+
+    def query(self, zoom: int, bbox: Optional[BBox] = None) -> List[ClusterHit]:
+        """Return the clusters and single points visible at ``zoom`` within ``bbox``."""
+
+        level = self.levels[max(MIN_ZOOM, min(zoom, MAX_ZOOM + 1))]
+        if bbox is None:
+            slots: Iterable[int] = range(len(level))
+        else:
+            west, south, east, north = bbox
+            x0, x1 = mercator_x(west), mercator_x(east)
+            y0, y1 = mercator_y(north), mercator_y(south)
+            if west <= east:
+                slots = level.slots_in(x0, y0, x1, y1)
+            else:
+                slots = (*level.slots_in(x0, y0, 1.0, y1), *level.slots_in(0.0, y0, x1, y1))
+        hits = []
+        for slot in slots:
+            origin = level.origins[slot]
+            single = origin >= 0
+            hits.append(
+                ClusterHit(
+                    lat=mercator_lat(level.ys[slot]),
+                    lng=mercator_lng(level.xs[slot]),
+                    count=level.counts[slot],
+                    row=origin if single else None,
+                    cluster_id=None if single else -origin,
+                    expansion_zoom=None if single else level.expansions[slot],
+                    rank=level.ranks[slot],
+                )
+            )
+        return hits
+
+
+def to_map_clusters(
+    hits: Iterable[ClusterHit],
+    records: Sequence[Any],
+    label: Callable[[Any], str],
+    rank_names: Optional[Sequence[str]] = None,
+) -> List[MapCluster]:
+    """Convert query hits into API models, naming single markers after their record."""
+
+    markers = []
+    for hit in hits:
+        risk = rank_names[hit.rank] if rank_names is not None else None
+        if hit.row is not None:
+            record = records[hit.row]
+            markers.append(
+                MapCluster(id=record.id, lat=hit.lat, lng=hit.lng, count=1, name=label(record), risk=risk)
+            )
+        else:
+            markers.append(
+                MapCluster(
+                    id=f"cluster-{hit.cluster_id}",
+                    lat=hit.lat,
+                    lng=hit.lng,
+                    count=hit.count,
+                    expansion_zoom=hit.expansion_zoom,
+                    risk=risk,
+                )
+            )
+    return markers
+
+
+def _build_from_geo(snapshot: DatasetSnapshot) -> ClusterIndex:
+    geo = GeoIndex.for_snapshot(snapshot)
+    return ClusterIndex(geo.lats, geo.lngs, geo.rows)
@@ -0,0 +1,326 @@
+"""Compiled, memory-mapped columnar storage for large datasets.
+
+A ``.lcol`` file holds one dataset as fixed-width numeric columns plus
+offset-indexed UTF-8 string heaps, so a worker can ``mmap`` it and scan
+individual columns without ever building per-row dictionaries. Pages are
+backed by the file, which lets every worker on a host share them through the
+OS page cache.
+
+Layout (all integers in native byte order, recorded in the header)::
+
+    prefix  : magic "LCOL", format version (u16), flags (u16), rows (u64), header length (u32)
+    header  : UTF-8 JSON describing the columns and the JSON source it was compiled from
+    blocks  : column data, each block aligned to 8 bytes
+
+Column kinds:
+
+* ``int`` / ``float`` / ``bool`` — ``int64`` / ``float64`` / ``uint8`` arrays.
+* ``str`` — ``uint64`` offsets (rows + 1) into a UTF-8 heap.
+* ``strlist`` — ``uint64`` item offsets (rows + 1) into a ``str``-style item column.
+* ``present`` — ``uint8`` flags marking whether an optional nested object is set.
+
+Nullable columns carry an extra ``uint8`` validity array. Nested models (such as
+``GeoPoint``) are flattened into dotted column names like ``coordinates.lat``.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+import typing
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+
+FORMAT_VERSION = 1
+SUFFIX = ".lcol"
+_MAGIC = b"LCOL"
+_PREFIX = struct.Struct("=4sHHQI")
+_ALIGNMENT = 8
+
+
+class ColumnarFormatError(ValueError):
+    """Raised when a columnar file is malformed or was written for another platform."""
+
+
+class ColumnSpec(typing.NamedTuple):
+    name: str
+    kind: str
+    path: Tuple[str, ...]
+    nullable: bool
+
+
+def schema_for(model: Type[BaseModel]) -> List[ColumnSpec]:
+    """Derive the column layout for a Pydantic model."""
+
+    return _schema_for(model, (), False)
+
+
+def _schema_for(model: Type[BaseModel], prefix: Tuple[str, ...], nullable: bool) -> List[ColumnSpec]:
+    specs: List[ColumnSpec] = []
+    for field in model.__fields__.values():
+        path = prefix + (field.name,)
+        name = ".".join(path)
+        optional = nullable or field.allow_none
+        type_ = field.type_
+        if field.shape == SHAPE_LIST and type_ is str:
+            specs.append(ColumnSpec(name, "strlist", path, optional))
+        elif field.shape != SHAPE_SINGLETON:
+            raise TypeError(f"Unsupported field shape for columnar storage: {name}")
+        elif isinstance(type_, type) and issubclass(type_, BaseModel):
+            if field.allow_none:
+                specs.append(ColumnSpec(name, "present", path, False))
+            specs.extend(_schema_for(type_, path, optional))
+        elif type_ is bool:
+            specs.append(ColumnSpec(name, "bool", path, optional))
+        elif type_ is int:
+            specs.append(ColumnSpec(name, "int", path, optional))
+        elif type_ is float:
+            specs.append(ColumnSpec(name, "float", path, optional))
+        elif type_ in (str, datetime) or typing.get_origin(type_) is typing.Literal:
+            specs.append(ColumnSpec(name, "str", path, optional))
+        else:
+            raise TypeError(f"Unsupported field type for columnar storage: {name} ({type_!r})")
+    return specs
+
+
+def _lookup(record: BaseModel, path: Tuple[str, ...]) -> Any:
+    value: Any = record
+    for part in path:
+        if value is None:
+            return None
+        value = getattr(value, part)
+    return value
+
+
+def _text(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class _BlockWriter:
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def add(self, payload: Union[bytes, bytearray, array]) -> Dict[str, int]:
+        padding = -len(self.data) % _ALIGNMENT
+        self.data.extend(b"\0" * padding)
+        raw = payload.tobytes() if isinstance(payload, array) else payload
+        offset = len(self.data)
+        self.data.extend(raw)
+        return {"offset": offset, "nbytes": len(raw)}
+
+    def add_strings(self, values: Sequence[str]) -> Dict[str, Dict[str, int]]:
+        offsets = array("Q", [0])
+        heap = bytearray()
+        for value in values:
+            heap.extend(value.encode("utf-8"))
+            offsets.append(len(heap))
+        return {"offsets": self.add(offsets), "heap": self.add(heap)}
+
+
+def compile_records(
+    records: Sequence[BaseModel],
+    model: Type[BaseModel],
+    meta: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """Encode validated model instances into the columnar format."""
+
+    writer = _BlockWriter()
+    columns: List[Dict[str, Any]] = []
+    for spec in schema_for(model):
+        values = [_lookup(record, spec.path) for record in records]
+        descriptor: Dict[str, Any] = {"name": spec.name, "kind": spec.kind, "path": list(spec.path)}
+        if spec.nullable:
+            descriptor["validity"] = writer.add(array("B", [value is not None for value in values]))
+        if spec.kind == "int":
+            descriptor["data"] = writer.add(array("q", [0 if value is None else value for value in values]))
+        elif spec.kind == "float":
+            descriptor["data"] = writer.add(array("d", [0.0 if value is None else value for value in values]))
+        elif spec.kind in ("bool", "present"):
+            descriptor["data"] = writer.add(array("B", [bool(value) for value in values]))
+        elif spec.kind == "str":
+            descriptor.update(writer.add_strings(["" if value is None else _text(value) for value in values]))
+        else:
+            items: List[str] = []
+            bounds = array("Q", [0])
+            for value in values:
+                items.extend(_text(item) for item in value or ())
+                bounds.append(len(items))
+            descriptor["bounds"] = writer.add(bounds)
+            descriptor.update(writer.add_strings(items))
+        columns.append(descriptor)
+
+    header = json.dumps(
+        {"byteorder": sys.byteorder, "columns": columns, "meta": meta or {}},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    prefix = _PREFIX.pack(_MAGIC, FORMAT_VERSION, 0, len(records), len(header))
+    start = len(prefix) + len(header)
+    padding = -start % _ALIGNMENT
+    return b"".join([prefix, header, b"\0" * padding, bytes(writer.data)])
+
+
+class StringColumn:
+    """Lazily decoded view over an offset-indexed UTF-8 heap."""
+
+    __slots__ = ("_offsets", "_heap", "_validity")
+
+    def __init__(self, offsets: memoryview, heap: memoryview, validity: Optional[memoryview]) -> None:
+        self._offsets = offsets
+        self._heap = heap
+        self._validity = validity
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, index: int) -> memoryview:
+        """Return the encoded bytes of one value without copying."""
+
+        return self._heap[self._offsets[index] : self._offsets[index + 1]]
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if self._validity is not None and not self._validity[index]:
+            return None
+        return str(self.raw(index), "utf-8")
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class StringListColumn:
+    """View over per-row lists of strings stored in a shared item column."""
+
+    __slots__ = ("_bounds", "_items", "_validity")
+
+    def __init__(self, bounds: memoryview, items: StringColumn, validity: Optional[memoryview]) -> None:
+        self._bounds = bounds
+        self._items = items
+        self._validity = validity
+
+    def __len__(self) -> int:
+        return len(self._bounds) - 1
+
+    def __getitem__(self, index: int) -> Optional[List[str]]:
+        if self._validity is not None and not self._validity[index]:
+            return None
+        items = self._items
+        return [items[position] for position in range(self._bounds[index], self._bounds[index + 1])]
+
+
+Column = Union[memoryview, StringColumn, StringListColumn]
+
+
+class ColumnarTable:
+    """Read-only access to a compiled dataset held in memory or memory-mapped."""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]) -> None:
+        view = memoryview(buffer)
+        if len(view) < _PREFIX.size:
+            raise ColumnarFormatError("File is too small to be a columnar dataset")
+        magic, version, _flags, rows, header_length = _PREFIX.unpack_from(view, 0)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ColumnarFormatError(f"Unsupported columnar file (magic={magic!r}, version={version})")
+        header_end = _PREFIX.size + header_length
+        header = json.loads(bytes(view[_PREFIX.size : header_end]))
+        if header["byteorder"] != sys.byteorder:
+            raise ColumnarFormatError(f"Columnar file was written on a {header['byteorder']}-endian host")
+        self._buffer = buffer
+        self._data = view[header_end + (-header_end % _ALIGNMENT) :]
+        self._rows = rows
+        self._descriptors = {column["name"]: column for column in header["columns"]}
+        self._columns: Dict[str, Column] = {}
+        self.meta: Dict[str, Any] = header["meta"]
+
+    @classmethod
+    def open(cls, path: Path) -> "ColumnarTable":
+        """Memory-map a ``.lcol`` file read-only."""
+
+        with path.open("rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapping)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._descriptors)
+
+    def _block(self, block: Dict[str, int], fmt: str) -> memoryview:
+        return self._data[block["offset"] : block["offset"] + block["nbytes"]].cast(fmt)
+
+    def validity(self, name: str) -> Optional[memoryview]:
+        """Return the ``uint8`` validity array of a nullable column, if any."""
+
+        block = self._descriptors[name].get("validity")
+        return self._block(block, "B") if block else None
+
+    def column(self, name: str) -> Column:
+        """Return a zero-copy view over one column."""
+
+        try:
+            return self._columns[name]
+        except KeyError:
+            pass
+        descriptor = self._descriptors[name]
+        kind = descriptor["kind"]
+        validity = self.validity(name)
+        column: Column
+        if kind == "int":
+            column = self._block(descriptor["data"], "q")
+        elif kind == "float":
+            column = self._block(descriptor["data"], "d")
+        elif kind in ("bool", "present"):
+            column = self._block(descriptor["data"], "B")
+        else:
+            strings = StringColumn(
+                self._block(descriptor["offsets"], "Q"),
+                self._block(descriptor["heap"], "B"),
+                validity if kind == "str" else None,
+            )
+            column = strings if kind == "str" else StringListColumn(
+                self._block(descriptor["bounds"], "Q"), strings, validity
+            )
+        self._columns[name] = column
+        return column
+
+    def value(self, name: str, index: int) -> Any:
+        """Return one cell as a Python value (``None`` for nulls)."""
+
+        column = self.column(name)
+        kind = self._descriptors[name]["kind"]
+        if isinstance(column, memoryview):
+            validity = self.validity(name)
+            if validity is not None and not validity[index]:
+                return None
+            value = column[index]
+            return bool(value) if kind in ("bool", "present") else value
+        return column[index]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Materialise one row as a nested dictionary suitable for ``parse_obj``."""
+
+        result: Dict[str, Any] = {}
+        absent: set[Tuple[str, ...]] = set()
+        for name, descriptor in self._descriptors.items():
+            path = tuple(descriptor["path"])
+            if any(path[: depth] in absent for depth in range(1, len(path))):
+                continue
+            value = self.value(name, index)
+            target = result
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            if descriptor["kind"] == "present":
+                if not value:
+                    absent.add(path)
+                    target[path[-1]] = None
+                continue
+            target[path[-1]] = value
+        return result
@@ -0,0 +1,23 @@
+"""Compile large datasets to columnar tables (``python -m app.services.compile_datasets``)."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Optional, Sequence
+
+from app.services.data_loader import DATA_DIR, compile_columnar_datasets
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Write ``.lcol`` files next to the columnar JSON datasets under a data directory."""
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("data_dir", nargs="?", type=Path, default=DATA_DIR)
+    args = parser.parse_args(argv)
+    for path in compile_columnar_datasets(args.data_dir):
+        print(f"compiled {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,112 +1,318 @@
-"""Simple rule-based concierge to simulate AI responses."""
+"""Concierge answers ranked by BM25 over the curated datasets."""
 from __future__ import annotations
 
 import textwrap
-from typing import Iterable, List, Tuple
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Literal, NamedTuple, Optional, Set, Tuple
 
-from app.models.base import ConciergeAnswer
-from app.services.data_loader import load_dataset
-from app.services.localization import annotate_translation, localize_fallback, normalize_language
+from app.core.caching import TTLCache
+from app.core.config import get_settings
+from app.models.base import ConciergeAnswer, RelocationPack
+from app.services.data_loader import get_snapshot, load_records
+from app.services.embeddings import VectorIndex, embed
+from app.services.fuzzy import TrigramIndex
+from app.services.localization import (
+    TRANSLATION_PREFIXES,
+    UNSUPPORTED_LANGUAGE_TEMPLATE,
+    annotate_translation,
+    localize_fallback,
+    normalize_language,
+)
+from app.services.search import STOPWORDS, BM25Index, normalize_query, tokenize, top_k
+from app.services.text_match import AhoCorasick
 
 
 def _flatten_sources(keys: Iterable[str]) -> List[str]:
     return sorted(set(keys))
 
 
-def _search_sections(query: str, language: str) -> Tuple[List[str], List[str], int]:
-    query_lower = query.lower()
-    responses: List[str] = []
-    sources: List[str] = []
-    matches = 0
+RELOCATION_KEYWORDS = ("visa", "health", "emergency", "sim", "internet")
+_INDEXED_DATASETS = ("safety", "schools", "venues", "transport", "relocation")
+DEFAULT_LIMIT = 5
+SearchMode = Literal["keyword", "semantic", "hybrid"]
+DEFAULT_MODE: SearchMode = "keyword"
+# A curated phrase (name, tag, neighborhood, ...) found verbatim in the query weighs like a rare term hit.
+PHRASE_WEIGHT = 3.0
+# Cosine similarity is scaled by this to sit on the BM25 scale; weaker neighbours are not answers.
+SEMANTIC_WEIGHT = 6.0
+MIN_SIMILARITY = 0.12
+# Top score at which confidence sits halfway between its floor and ceiling.
+CONFIDENCE_MIDPOINT = 3.0
 
-    # Safety data
-    safety_data = load_dataset("safety")
-    for zone in safety_data:
-        if zone["neighborhood"].lower() in query_lower or zone["risk_level"] in query_lower:
-            responses.append(
-                f"{zone['neighborhood']}: Risk {zone['risk_level']} — {zone['description']} (Trend: {zone['trend']})."
+
+class _Document(NamedTuple):
+    source: str
+    response: str
+
+
+def _relocation_summary(pack: RelocationPack) -> str:
+    return textwrap.shorten(
+        " ".join(
+            [
+                f"Visa tip: {pack.visa_tips}",
+                f"Connectivity: {pack.connectivity}",
+                f"Healthcare: {pack.healthcare}",
+                f"Emergency contacts: {', '.join(pack.emergency_contacts)}",
+            ]
+        ),
+        width=280,
+        placeholder="…",
+    )
+
+
+class _ConciergeIndex:
+    """Everything a query needs, built once per combination of dataset versions.
+
+    Records become BM25 documents over their descriptive text (safety
+    descriptions, school tips, venue descriptions, transport notes, relocation
+    packs). The lower-cased names, tags, languages, modes, providers,
+    neighborhoods and risk levels that always selected a record are compiled
+    into an Aho–Corasick automaton; a verbatim hit adds :data:`PHRASE_WEIGHT`
+    to that record's score. Phrases and queries are compared in their
+    :func:`normalize_query` form, so the ranking depends only on the
+    normalised query text. Query words missing from the corpus vocabulary are
+    first corrected to their closest indexed term through a trigram index
+    (so "kalza" still finds Kalsa). The same texts are also embedded into a
+    :class:`VectorIndex` for the ``semantic`` and ``hybrid`` modes.
+    """
+
+    def __init__(self, versions: Tuple[str, ...]) -> None:
+        self.versions = versions
+        self.documents: List[_Document] = []
+        texts: List[List[str]] = []
+        phrases: Dict[str, List[int]] = {}
+
+        def add(document: _Document, text: Iterable[str], patterns: Iterable[str]) -> None:
+            doc_id = len(self.documents)
+            self.documents.append(document)
+            texts.append(tokenize(" ".join(text)))
+            for pattern in patterns:
+                pattern = normalize_query(pattern)
+                if pattern:
+                    phrases.setdefault(pattern, []).append(doc_id)
+
+        for zone in load_records("safety"):
+            add(
+                _Document(
+                    f"safety:{zone.id}",
+                    f"{zone.neighborhood}: Risk {zone.risk_level} — {zone.description} (Trend: {zone.trend}).",
+                ),
+                (zone.neighborhood, zone.risk_level, "risk safety", zone.description, zone.trend),
+                (zone.neighborhood.lower(), zone.risk_level),
             )
-            sources.append(f"safety:{zone['id']}")
-            matches += 1
-
-    # Schools
-    for school in load_dataset("schools"):
-        if school["name"].lower() in query_lower or any(lang.lower() in query_lower for lang in school["language"]):
-            responses.append(
-                f"{school['name']} ({school['curriculum']}, rating {school['rating']}/5). {school['application_tips']}"
+        for school in load_records("schools"):
+            add(
+                _Document(
+                    f"schools:{school.id}",
+                    f"{school.name} ({school.curriculum}, rating {school.rating}/5). {school.application_tips}",
+                ),
+                (school.name, school.curriculum, school.level, "school", *school.language, school.application_tips),
+                (school.name.lower(), *(lang.lower() for lang in school.language)),
             )
-            sources.append(f"schools:{school['id']}")
-            matches += 1
-
-    # Food venues
-    for venue in load_dataset("venues"):
-        tags = [tag.lower() for tag in venue["tags"]]
-        normalised_tags = {tag.replace("-", " ") for tag in tags}
-        if (
-            venue["name"].lower() in query_lower
-            or any(tag in query_lower for tag in normalised_tags)
-        ):
-            responses.append(
-                f"{venue['name']} — {venue['description']} (Tags: {', '.join(venue['tags'])})."
+        for venue in load_records("venues"):
+            tags = [tag.lower().replace("-", " ") for tag in venue.tags]
+            add(
+                _Document(
+                    f"venues:{venue.id}",
+                    f"{venue.name} — {venue.description} (Tags: {', '.join(venue.tags)}).",
+                ),
+                (venue.name, venue.type, *tags, venue.description, venue.neighborhood),
+                (venue.name.lower(), *tags),
             )
-            sources.append(f"venues:{venue['id']}")
-            matches += 1
-
-    # Transport options
-    for transport in load_dataset("transport"):
-        if transport["mode"].lower() in query_lower or transport["provider"].lower() in query_lower:
-            responses.append(
-                f"{transport['provider']} {transport['mode']} — {transport['description']} (Safety: {transport['safety_notes']})."
+        for transport in load_records("transport"):
+            add(
+                _Document(
+                    f"transport:{transport.id}",
+                    f"{transport.provider} {transport.mode} — {transport.description} "
+                    f"(Safety: {transport.safety_notes}).",
+                ),
+                (transport.provider, transport.mode, transport.description, transport.safety_notes),
+                (transport.mode.lower(), transport.provider.lower()),
             )
-            sources.append(f"transport:{transport['id']}")
-            matches += 1
-
-    # Relocation pack general summary
-    packs = load_dataset("relocation")
-    city = packs[0]
-    if any(keyword in query_lower for keyword in ["visa", "health", "emergency", "sim", "internet"]):
-        responses.append(
-            textwrap.shorten(
-                " ".join(
-                    [
-                        f"Visa tip: {city['visa_tips']}",
-                        f"Connectivity: {city['connectivity']}",
-                        f"Healthcare: {city['healthcare']}",
-                        f"Emergency contacts: {', '.join(city['emergency_contacts'])}",
-                    ]
+        for position, pack in enumerate(load_records("relocation")):
+            add(
+                _Document(f"relocation:{pack.city}", _relocation_summary(pack)),
+                (
+                    pack.city,
+                    pack.visa_tips,
+                    pack.connectivity,
+                    pack.healthcare,
+                    pack.cultural_notes,
+                    *pack.emergency_contacts,
                 ),
-                width=280,
-                placeholder="…",
+                # The general keywords point at the first (default city) pack.
+                RELOCATION_KEYWORDS if position == 0 else (),
             )
-        )
-        sources.append(f"relocation:{city['city']}")
-        matches += 1
 
-    if not responses:
-        responses.append(localize_fallback(language))
-        sources.append("guide:general")
+        self.bm25 = BM25Index(texts)
+        self.vectors = VectorIndex(embed(tokens) for tokens in texts)
+        vocabulary = sorted(self.bm25.postings)
+        self.fuzzy = TrigramIndex(vocabulary, [len(self.bm25.postings[term][0]) for term in vocabulary])
+        self.automaton = AhoCorasick(phrases)
+        self.phrases = [phrases[pattern] for pattern in self.automaton.patterns]
+
+    def phrase_matches(self, normalized: str) -> Set[int]:
+        """Return the documents selected by a curated phrase occurring in the normalised query."""
+
+        return {doc_id for pattern in self.automaton.search(normalized) for doc_id in self.phrases[pattern]}
+
+    def correct(self, normalized: str) -> str:
+        """Replace words of a normalised query that no document contains by their closest indexed term."""
+
+        words = normalized.split()
+        for position, word in enumerate(words):
+            if word not in STOPWORDS and word not in self.bm25.postings:
+                words[position] = self.fuzzy.correct(word) or word
+        return " ".join(words)
+
+    def rank(self, normalized: str, limit: int, mode: SearchMode = DEFAULT_MODE) -> List[Tuple[float, int]]:
+        """Return up to ``limit`` ``(score, doc_id)`` pairs for a normalised query, best first.
+
+        ``keyword`` ranks by BM25 plus phrase hits, ``semantic`` by scaled
+        embedding similarity, and ``hybrid`` by the sum of both.
+        """
+
+        corrected = self.correct(normalized)
+        terms = tokenize(corrected)
+        scores: Dict[int, float] = {}
+        if mode != "semantic":
+            scores = self.bm25.scores(terms)
+            matched = self.phrase_matches(normalized)
+            if corrected != normalized:
+                matched |= self.phrase_matches(corrected)
+            for doc_id in matched:
+                scores[doc_id] = scores.get(doc_id, 0.0) + PHRASE_WEIGHT
+        if mode != "keyword":
+            for doc_id, similarity in self.vectors.similarities(embed(terms), MIN_SIMILARITY).items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + SEMANTIC_WEIGHT * similarity
+        return top_k(scores, limit)
+
+
+_concierge_index: Optional[_ConciergeIndex] = None
+_concierge_index_lock = threading.Lock()
+
+
+
+class _RankedAnswer(NamedTuple):
+    """A built answer together with the ``(text, source)`` sections it was assembled from."""
 
-    return responses, _flatten_sources(sources), matches
+    answer: ConciergeAnswer
+    sections: Tuple[Tuple[str, str], ...]
+    matched: bool
 
 
-def _calculate_confidence(matches: int) -> float:
-    if matches <= 0:
+settings = get_settings()
+answer_cache: TTLCache[_RankedAnswer] = TTLCache(settings.concierge_cache_max_entries, settings.concierge_cache_ttl)
+
+
+def index_versions() -> Tuple[str, ...]:
+    """Return the versions of the datasets the concierge indexes, without building the index."""
+
+    return tuple(get_snapshot(name).version for name in _INDEXED_DATASETS)
+
+
+def _get_index() -> _ConciergeIndex:
+    global _concierge_index
+    versions = index_versions()
+    index = _concierge_index
+    if index is not None and index.versions == versions:
+        return index
+    with _concierge_index_lock:
+        if _concierge_index is None or _concierge_index.versions != versions:
+            _concierge_index = _ConciergeIndex(versions)
+        return _concierge_index
+
+
+def _iter_sections(
+    query: str, limit: int = DEFAULT_LIMIT, mode: SearchMode = DEFAULT_MODE
+) -> Iterator[Tuple[float, _Document]]:
+    """Yield ``(score, document)`` for the best-ranked records, best first."""
+
+    index = _get_index()
+    for score, doc_id in index.rank(normalize_query(query), limit, mode):
+        yield score, index.documents[doc_id]
+
+
+def _rank_sections(
+    query: str, language: str, limit: int = DEFAULT_LIMIT, mode: SearchMode = DEFAULT_MODE
+) -> Tuple[List[Tuple[str, str]], List[float]]:
+    """Return the ``(text, source)`` of each ranked record, or the localized fallback, and their scores."""
+
+    sections: List[Tuple[str, str]] = []
+    scores: List[float] = []
+    for score, document in _iter_sections(query, limit, mode):
+        sections.append((document.response, document.source))
+        scores.append(score)
+
+    if not sections:
+        sections.append((localize_fallback(language), "guide:general"))
+
+    return sections, scores
+
+
+def _calculate_confidence(scores: List[float]) -> float:
+    if not scores:
         return 0.2
-    return min(0.95, 0.35 + 0.15 * matches)
+    top = scores[0]
+    return min(0.95, 0.35 + 0.6 * top / (top + CONFIDENCE_MIDPOINT))
 
 
-def answer_query(query: str, language: str | None = None) -> ConciergeAnswer:
-    """Generate a simple answer from curated datasets."""
-    active_language, requested_language = normalize_language(language)
-    responses, sources, matches = _search_sections(query, active_language)
-    answer = "\n".join(responses)
-    answer = annotate_translation(answer, active_language, requested_language, matches > 0)
-    confidence = _calculate_confidence(matches)
-    return ConciergeAnswer(
+def _build_answer(
+    query: str, active_language: str, requested_language: str, limit: int, mode: SearchMode
+) -> _RankedAnswer:
+    sections, scores = _rank_sections(query, active_language, limit, mode)
+    answer = "\n".join(text for text, _ in sections)
+    answer = annotate_translation(answer, active_language, requested_language, bool(scores))
+    confidence = _calculate_confidence(scores)
+    built = ConciergeAnswer(
         query=query,
         answer=answer,
-        sources=sources,
+        sources=_flatten_sources(source for _, source in sections),
         confidence=confidence,
         language=active_language,
         requested_language=requested_language,
     )
+    return _RankedAnswer(built, tuple(sections), bool(scores))
+
+
+def _cached_answer(query: str, language: str | None, limit: int, mode: SearchMode) -> _RankedAnswer:
+    active_language, requested_language = normalize_language(language)
+    normalized = normalize_query(query)
+    key = (normalized, active_language, requested_language, limit, mode, index_versions())
+    return answer_cache.get_or_compute(
+        key, lambda: _build_answer(normalized, active_language, requested_language, limit, mode)
+    )
+
+
+def answer_query(
+    query: str, language: str | None = None, limit: int = DEFAULT_LIMIT, mode: SearchMode = DEFAULT_MODE
+) -> ConciergeAnswer:
+    """Generate an answer from the best-ranked curated records.
+
+    Answers are cached per normalised query, language, limit, mode and dataset
+    versions; a cached answer is returned with the caller's own query text.
+    """
+    return _cached_answer(query, language, limit, mode).answer.copy(update={"query": query})
+
+
+def stream_answer(
+    query: str, language: str | None = None, limit: int = DEFAULT_LIMIT, mode: SearchMode = DEFAULT_MODE
+) -> Iterator[Dict[str, Any]]:
+    """Yield the events of a sectioned answer.
+
+    Language notes come first, then one ``section`` event per ranked record
+    (or the localized fallback), and finally an ``answer`` event carrying the
+    complete :class:`ConciergeAnswer`, identical to what :func:`answer_query`
+    returns. Ranking is not incremental: the first event is produced only once
+    the whole ranking has finished, or straight away when the answer is already
+    in :data:`answer_cache`, which streams share with :func:`answer_query`.
+    """
+    ranked = _cached_answer(query, language, limit, mode)
+    answer = ranked.answer
+    if answer.requested_language != answer.language:
+        yield {"type": "note", "text": UNSUPPORTED_LANGUAGE_TEMPLATE.format(language=answer.requested_language)}
+    elif ranked.matched and TRANSLATION_PREFIXES.get(answer.language):
+        yield {"type": "note", "text": TRANSLATION_PREFIXES[answer.language]}
+    for index, (text, source) in enumerate(ranked.sections):
+        yield {"type": "section", "index": index, "text": text, "source": source}
+    yield {"type": "answer", **answer.copy(update={"query": query}).dict()}
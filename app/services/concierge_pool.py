@@ -0,0 +1,97 @@
+"""Answer large concierge batches on a process pool so matching uses every core."""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.models.base import ConciergeAnswer
+from app.services import concierge
+from app.services.data_loader import refresh_snapshots
+
+
+# (query, language, limit, mode) as sent to the workers.
+Question = Tuple[str, Optional[str], int, concierge.SearchMode]
+# Batches up to this size are answered in-process; larger ones are split into shards at least this big.
+MIN_SHARD_SIZE = 32
+
+settings = get_settings()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def pool_workers() -> int:
+    """Number of worker processes; ``0`` (the default) answers every batch in-process.
+
+    Every server worker owns its own pool, and each pool process loads the
+    datasets and builds the concierge index, so the pool is opt-in rather than
+    sized to the CPU count.
+    """
+
+    return settings.concierge_pool_workers
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = pool_workers()
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the server process runs threads (dataset
+            # watcher, request threadpool) whose locks a fork could copy mid-use.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes, if any were started."""
+
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _answer_shard(versions: Tuple[str, ...], questions: Sequence[Question]) -> List[ConciergeAnswer]:
+    # Workers do not run the dataset watcher; catch up when the server has moved on.
+    if concierge.index_versions() != versions:
+        refresh_snapshots()
+    return [concierge.answer_query(*question) for question in questions]
+
+
+async def answer_batch(questions: Sequence[Question]) -> List[ConciergeAnswer]:
+    """Answer ``questions`` in order.
+
+    Small batches run on the server's threadpool. Larger ones are split into
+    one shard per worker (at least :data:`MIN_SHARD_SIZE` questions each) and
+    awaited on the process pool, so neither the event loop nor the threadpool
+    is held while they are matched.
+    """
+
+    # Rebuilding the index after a reload is slow; neither that nor a dataset load may run on the loop.
+    versions = await run_in_threadpool(concierge.index_versions)
+    pool = _get_pool()
+    if pool is None or len(questions) <= MIN_SHARD_SIZE:
+        return await run_in_threadpool(_answer_shard, versions, questions)
+
+    size = max(MIN_SHARD_SIZE, -(-len(questions) // pool_workers()))
+    loop = asyncio.get_running_loop()
+    shards = [
+        loop.run_in_executor(pool, _answer_shard, versions, questions[start : start + size])
+        for start in range(0, len(questions), size)
+    ]
+    try:
+        results = await asyncio.gather(*shards)
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next batch.
+        shutdown_pool()
+        raise
+    return [answer for shard in results for answer in shard]
@@ -1,16 +1,62 @@
 """Utility helpers for loading static JSON datasets."""
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import os
+import threading
+from datetime import datetime, timezone
 from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, overload
+
+from pydantic import BaseModel, ValidationError
+
+from app.models.base import (
+    Alert,
+    Event,
+    Group,
+    Market,
+    RelocationPack,
+    RentalListing,
+    SafetyZone,
+    School,
+    TransportOption,
+    UserProfile,
+    Venue,
+)
+from app.services.columnar import SUFFIX as COLUMNAR_SUFFIX
+from app.services.columnar import ColumnarFormatError, ColumnarTable, compile_records, schema_for
 
 
 logger = logging.getLogger(__name__)
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 
+T = TypeVar("T")
+
+# Datasets listed here are validated into their Pydantic model once per version.
+# Anything else (e.g. ``cities``) is exposed as the raw JSON items.
+DATASET_MODELS: Dict[str, Type[BaseModel]] = {
+    "alerts": Alert,
+    "culture_venues": Venue,
+    "essentials": Venue,
+    "events": Event,
+    "groups": Group,
+    "markets": Market,
+    "profiles": UserProfile,
+    "relocation": RelocationPack,
+    "rentals": RentalListing,
+    "safety": SafetyZone,
+    "schools": School,
+    "transport": TransportOption,
+    "venues": Venue,
+}
+
+# Catalogues expected to grow large. They are held as a columnar table (memory-mapped
+# when a compiled ``.lcol`` file is present) and materialise records on demand.
+COLUMNAR_DATASETS = frozenset({"rentals", "venues"})
+
 
 class DatasetNotFoundError(FileNotFoundError):
     """Raised when a dataset cannot be located on disk."""
@@ -26,6 +72,21 @@ class DatasetNotFoundError(FileNotFoundError):
         super().__init__(message)
 
 
+class DatasetValidationError(ValueError):
+    """Raised when a dataset on disk does not match its schema."""
+
+    def __init__(self, dataset: str, city: str | None, path: Path, reason: str) -> None:
+        self.dataset = dataset
+        self.city = city
+        self.path = path
+        self.reason = reason
+        message = f"Dataset '{dataset}'"
+        if city:
+            message += f" for city '{city}'"
+        message += f" at {path} is invalid: {reason}"
+        super().__init__(message)
+
+
 class UnsupportedCityError(ValueError):
     """Raised when a requested city is not supported by the catalogue."""
 
@@ -34,14 +95,144 @@ class UnsupportedCityError(ValueError):
         super().__init__(f"City '{city}' is not supported")
 
 
-@lru_cache()
-def _supported_cities() -> set[str]:
-    path = DATA_DIR / "cities.json"
-    if not path.exists():
-        return set()
-    with path.open("r", encoding="utf-8") as file:
-        data = json.load(file)
-    return {str(item) for item in data}
+class LazyRecords(Sequence[Any]):
+    """Tuple-like sequence that materialises model instances from a columnar table.
+
+    Rows are validated into their model the first time they are accessed and then
+    reused, so filters that only read columns never pay for unmatched rows.
+    """
+
+    __slots__ = ("_table", "_model", "_cache")
+
+    def __init__(
+        self,
+        table: ColumnarTable,
+        model: Type[BaseModel],
+        materialised: Optional[Sequence[BaseModel]] = None,
+    ) -> None:
+        self._table = table
+        self._model = model
+        self._cache: List[Optional[BaseModel]] = (
+            list(materialised) if materialised is not None else [None] * len(table)
+        )
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Tuple[Any, ...]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return tuple(self[position] for position in range(*index.indices(len(self))))
+        record = self._cache[index]
+        if record is None:
+            if index < 0:
+                index += len(self._cache)
+            record = self._model.parse_obj(self._table.row(index))
+            self._cache[index] = record
+        return record
+
+
+class DatasetSnapshot:
+    """Validated, immutable view of one dataset at a specific content version.
+
+    ``records`` is a read-only sequence of model instances shared by every request.
+    For :data:`COLUMNAR_DATASETS` it is a :class:`LazyRecords` view and ``table``
+    exposes the underlying columns for scans that should not materialise rows. Structures computed from the records (indexes,
+    lookup tables) are cached on the snapshot through :meth:`derive` and therefore
+    live exactly as long as the version they were built from. Reloads never change
+    a snapshot's records; they swap a new snapshot into the registry, so a request
+    holding an older one keeps a consistent view until it finishes.
+    """
+
+    __slots__ = (
+        "name",
+        "city",
+        "path",
+        "version",
+        "records",
+        "signature",
+        "table",
+        "loaded_at",
+        "_derived",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        city: str | None,
+        path: Path,
+        version: str,
+        records: Sequence[Any],
+        signature: Tuple[int, int] = (0, 0),
+        table: Optional[ColumnarTable] = None,
+    ) -> None:
+        self.name = name
+        self.city = city
+        self.path = path
+        self.version = version
+        self.records = records
+        self.signature = signature
+        self.table = table
+        self.loaded_at = datetime.now(timezone.utc)
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def modified_at(self) -> datetime:
+        """When the source file was last modified; unlike ``loaded_at`` it is the same in every worker."""
+
+        return datetime.fromtimestamp(self.signature[0] / 1e9, timezone.utc)
+
+    def derive(self, key: str, builder: Callable[["DatasetSnapshot"], T]) -> T:
+        """Return ``builder(self)``, computing it at most once per snapshot.
+
+        Builders may themselves call :meth:`derive` to reuse other structures.
+        """
+
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = builder(self)
+            return self._derived[key]
+
+    def for_city(self, city: str | None) -> "DatasetSnapshot":
+        """Return a snapshot labelled for ``city`` sharing this one's data and derived caches.
+
+        Cities without their own data directory fall back to the shared files, so
+        they reuse one set of records instead of parsing the same file again.
+        """
+
+        twin = DatasetSnapshot(self.name, city, self.path, self.version, self.records, self.signature, self.table)
+        twin.loaded_at = self.loaded_at
+        twin._derived = self._derived
+        twin._lock = self._lock
+        return twin
+
+
+_SNAPSHOTS: Dict[Tuple[str, Optional[str]], DatasetSnapshot] = {}
+# Re-entrant: resolving a city directory may itself load the ``cities`` snapshot.
+_SNAPSHOTS_LOCK = threading.RLock()
+
+
+def _supported_cities() -> frozenset[str]:
+    if not (DATA_DIR / "cities.json").exists():
+        return frozenset()
+    snapshot = get_snapshot("cities")
+    return snapshot.derive("supported_cities", lambda snap: frozenset(str(item) for item in snap.records))
 
 
 def _city_dir(city: str | None) -> Path:
@@ -57,13 +248,249 @@ def _city_dir(city: str | None) -> Path:
     return DATA_DIR
 
 
-@lru_cache()
-def load_dataset(name: str, city: str | None = None) -> Any:
-    """Load a dataset by name from the data directory (optional city prefix)."""
-
+def _dataset_path(name: str, city: str | None) -> Path:
     path = _city_dir(city) / f"{name}.json"
     if not path.exists():
         logger.error("Dataset missing", extra={"dataset": name, "city": city, "path": str(path)})
         raise DatasetNotFoundError(name, city, path)
+    return path
+
+
+def _content_version(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+@lru_cache(maxsize=256)
+def _compiled_matches_source(
+    name: str,
+    compiled: Path,
+    compiled_signature: Tuple[int, int],
+    source: Path,
+    source_signature: Optional[Tuple[int, int]],
+) -> bool:
+    """Return whether a compiled table is usable in place of its JSON source.
+
+    Keyed on both file signatures so the header (and, if timestamps drifted, the
+    source hash) is only checked again after one of the files changes.
+    """
+
+    try:
+        table = ColumnarTable.open(compiled)
+    except (OSError, ColumnarFormatError, ValueError) as exc:
+        logger.warning("Ignoring unreadable columnar file", extra={"path": str(compiled), "error": str(exc)})
+        return False
+    expected_columns = [spec.name for spec in schema_for(DATASET_MODELS[name])]
+    if table.column_names != expected_columns:
+        return False
+    if source_signature is None:
+        return True
+    meta = table.meta
+    if (meta.get("source_mtime_ns"), meta.get("source_size")) == source_signature:
+        return True
+    return meta.get("version") == _content_version(source.read_bytes())
+
+
+def _source_path(name: str, city: str | None) -> Path:
+    """Return the file a dataset should be served from.
+
+    A compiled ``.lcol`` table wins when it is up to date with the JSON next to it
+    (or when it ships without one); otherwise the JSON source is used.
+    """
+
+    directory = _city_dir(city)
+    if name in COLUMNAR_DATASETS:
+        compiled = directory / f"{name}{COLUMNAR_SUFFIX}"
+        if compiled.exists():
+            source = directory / f"{name}.json"
+            source_signature = _file_signature(source) if source.exists() else None
+            if _compiled_matches_source(name, compiled, _file_signature(compiled), source, source_signature):
+                return compiled
+    return _dataset_path(name, city)
+
+
+def _parse_records(name: str, city: str | None, path: Path, data: Any) -> Tuple[Any, ...]:
+    if not isinstance(data, list):
+        raise DatasetValidationError(name, city, path, "expected a JSON array")
+    model = DATASET_MODELS.get(name)
+    if model is None:
+        return tuple(data)
+    try:
+        return tuple(model.parse_obj(item) for item in data)
+    except ValidationError as exc:
+        raise DatasetValidationError(name, city, path, str(exc)) from exc
+
+
+def _file_signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_json_records(name: str, city: str | None, path: Path) -> Tuple[str, Tuple[Any, ...]]:
+    payload = path.read_bytes()
+    try:
+        data = json.loads(payload)
+    except ValueError as exc:
+        raise DatasetValidationError(name, city, path, f"malformed JSON ({exc})") from exc
+    return _content_version(payload), _parse_records(name, city, path, data)
+
+
+def _read_snapshot(name: str, city: str | None) -> DatasetSnapshot:
+    path = _source_path(name, city)
+    signature = _file_signature(path)
+    for loaded in list(_SNAPSHOTS.values()):
+        if loaded.name == name and loaded.path == path and loaded.signature == signature:
+            return loaded.for_city(city)
+    table: Optional[ColumnarTable] = None
+    records: Sequence[Any]
+    if path.suffix == COLUMNAR_SUFFIX:
+        table = ColumnarTable.open(path)
+        version = str(table.meta["version"])
+        records = LazyRecords(table, DATASET_MODELS[name])
+    else:
+        version, records = _read_json_records(name, city, path)
+        if name in COLUMNAR_DATASETS:
+            model = DATASET_MODELS[name]
+            table = ColumnarTable(compile_records(records, model, {"dataset": name, "version": version}))
+            records = LazyRecords(table, model, records)
+    logger.debug(
+        "Dataset snapshot built",
+        extra={"dataset": name, "city": city, "version": version, "records": len(records), "path": str(path)},
+    )
+    return DatasetSnapshot(name, city, path, version, records, signature, table)
+
+
+def get_snapshot(name: str, city: str | None = None) -> DatasetSnapshot:
+    """Return the validated snapshot for a dataset, parsing it on first use."""
+
+    key = (name, city)
+    snapshot = _SNAPSHOTS.get(key)
+    if snapshot is not None:
+        return snapshot
+    with _SNAPSHOTS_LOCK:
+        snapshot = _SNAPSHOTS.get(key)
+        if snapshot is None:
+            snapshot = _read_snapshot(name, city)
+            _SNAPSHOTS[key] = snapshot
+    return snapshot
+
+
+def load_records(name: str, city: str | None = None) -> Sequence[Any]:
+    """Return the validated, read-only records of a dataset."""
+
+    return get_snapshot(name, city).records
+
+
+def preload_snapshots() -> List[DatasetSnapshot]:
+    """Load every known dataset for the default catalogue and each supported city.
+
+    Run in the Gunicorn master (``--preload``) so workers inherit the parsed
+    snapshots through copy-on-write pages instead of each building their own.
+    Datasets a city does not provide are skipped.
+    """
+
+    loaded: List[DatasetSnapshot] = []
+    names = ["cities", *sorted(DATASET_MODELS)]
+    for city in [None, *sorted(_supported_cities())]:
+        directory = _city_dir(city)
+        for name in names:
+            if not (directory / f"{name}.json").exists() and not (directory / f"{name}{COLUMNAR_SUFFIX}").exists():
+                continue
+            loaded.append(get_snapshot(name, city))
+    logger.info("Datasets preloaded", extra={"snapshots": len(loaded)})
+    return loaded
+
+
+def loaded_snapshots() -> List[DatasetSnapshot]:
+    """Return the snapshots currently served, ordered by dataset and city."""
+
+    return sorted(_SNAPSHOTS.values(), key=lambda snap: (snap.name, snap.city or ""))
+
+
+def _is_stale(snapshot: DatasetSnapshot) -> bool:
+    path = _source_path(snapshot.name, snapshot.city)
+    return path != snapshot.path or _file_signature(path) != snapshot.signature
+
+
+def refresh_snapshots() -> List[DatasetSnapshot]:
+    """Re-read datasets whose files changed on disk and swap in new snapshots.
+
+    Only datasets that have already been loaded are checked. A file that fails to
+    parse or validate is logged and the previous snapshot keeps serving. Returns
+    the snapshots that were replaced by a new version.
+    """
+
+    swapped: List[DatasetSnapshot] = []
+    for key, current in list(_SNAPSHOTS.items()):
+        try:
+            if not _is_stale(current):
+                continue
+            fresh = _read_snapshot(current.name, current.city)
+        except (DatasetNotFoundError, DatasetValidationError, OSError) as exc:
+            logger.error(
+                "Dataset reload failed; keeping previous version",
+                extra={"dataset": current.name, "city": current.city, "version": current.version, "error": str(exc)},
+            )
+            continue
+        if fresh.version == current.version and fresh.path == current.path:
+            # Touched but unchanged: remember the new signature, keep derived caches.
+            current.signature = fresh.signature
+            continue
+        with _SNAPSHOTS_LOCK:
+            if _SNAPSHOTS.get(key) is current:
+                _SNAPSHOTS[key] = fresh
+        logger.info(
+            "Dataset reloaded",
+            extra={"dataset": fresh.name, "city": fresh.city, "version": fresh.version, "previous": current.version},
+        )
+        swapped.append(current)
+    return swapped
+
+
+def clear_snapshots() -> None:
+    """Drop every cached snapshot so the next access re-reads from disk."""
+
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS.clear()
+
+
+def load_dataset(name: str, city: str | None = None) -> Any:
+    """Load a dataset by name from the data directory (optional city prefix).
+
+    Returns the raw JSON payload straight from disk on every call; endpoints
+    should prefer :func:`load_records`, which validates each dataset once per
+    version and shares the result.
+    """
+
+    path = _dataset_path(name, city)
     with path.open("r", encoding="utf-8") as file:
         return json.load(file)
+
+
+def compile_columnar_datasets(data_dir: Path) -> List[Path]:
+    """Compile every :data:`COLUMNAR_DATASETS` JSON file under ``data_dir`` to ``.lcol``.
+
+    City subdirectories are included. Files are written next to their source and
+    swapped in atomically so running workers pick them up on the next reload.
+    """
+
+    written: List[Path] = []
+    directories = [data_dir] + sorted(path for path in data_dir.iterdir() if path.is_dir())
+    for directory in directories:
+        for name in sorted(COLUMNAR_DATASETS):
+            source = directory / f"{name}.json"
+            if not source.exists():
+                continue
+            source_signature = _file_signature(source)
+            version, records = _read_json_records(name, None, source)
+            meta = {
+                "dataset": name,
+                "version": version,
+                "source_mtime_ns": source_signature[0],
+                "source_size": source_signature[1],
+            }
+            target = directory / f"{name}{COLUMNAR_SUFFIX}"
+            staging = target.with_suffix(f"{COLUMNAR_SUFFIX}.tmp")
+            staging.write_bytes(compile_records(records, DATASET_MODELS[name], meta))
+            os.replace(staging, target)
+            written.append(target)
+    return written
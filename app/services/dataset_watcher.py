@@ -0,0 +1,45 @@
+"""Background polling that hot-reloads datasets when their files change."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.services.data_loader import refresh_snapshots
+
+
+logger = logging.getLogger(__name__)
+
+
+async def watch_datasets(interval: float) -> None:
+    """Poll dataset files every ``interval`` seconds until cancelled.
+
+    Parsing and validation run in a worker thread so the event loop keeps serving
+    requests while a changed dataset is rebuilt.
+    """
+
+    logger.info("Dataset watcher started", extra={"interval": interval})
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(refresh_snapshots)
+            except Exception:
+                logger.exception("Dataset refresh failed")
+    finally:
+        logger.info("Dataset watcher stopped")
+
+
+def start_dataset_watcher(interval: float) -> asyncio.Task[None]:
+    """Schedule :func:`watch_datasets` on the running event loop."""
+
+    return asyncio.get_running_loop().create_task(watch_datasets(interval), name="dataset-watcher")
+
+
+async def stop_dataset_watcher(task: asyncio.Task[None]) -> None:
+    """Cancel a watcher task and wait for it to finish."""
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
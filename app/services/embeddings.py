@@ -0,0 +1,120 @@
+"""Local hashed n-gram embeddings and a compact float32 vector index for semantic retrieval.
+
+No model, network or GPU is involved: a text is embedded by hashing its word
+tokens and their character trigrams into a fixed number of signed buckets and
+normalising the result, so paraphrases that share words or word stems
+("working", "coworking", "work") land close together.
+
+``python -m app.services.embeddings`` prints build and query latency against
+synthetic corpora of increasing size.
+"""
+from __future__ import annotations
+
+import math
+import zlib
+from array import array
+from operator import itemgetter, mul
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.services.search import top_k
+
+
+DIMENSIONS = 512
+# A character trigram counts for less than the whole word it comes from.
+TRIGRAM_WEIGHT = 0.3
+
+
+def _features(tokens: Iterable[str]) -> Iterable[Tuple[str, float]]:
+    for token in tokens:
+        yield f"w:{token}", 1.0
+        padded = f"<{token}>"
+        for index in range(len(padded) - 2):
+            yield padded[index : index + 3], TRIGRAM_WEIGHT
+
+
+def embed(tokens: Iterable[str]) -> Dict[int, float]:
+    """Return the unit-length hashed embedding of ``tokens`` as ``{dimension: value}``.
+
+    ``zlib.crc32`` rather than :func:`hash` keeps buckets stable across
+    processes, so vectors built by different workers agree.
+    """
+
+    vector: Dict[int, float] = {}
+    for feature, weight in _features(tokens):
+        digest = zlib.crc32(feature.encode("utf-8"))
+        dimension = digest % DIMENSIONS
+        vector[dimension] = vector.get(dimension, 0.0) + (weight if digest & 0x80000000 else -weight)
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {dimension: value / norm for dimension, value in vector.items() if value}
+
+
+class VectorIndex:
+    """Unit-length document embeddings stored row by row in a single ``array('f')``.
+
+    Scoring is one pass over the rows. Query embeddings are sparse (a few words),
+    so each cosine only gathers the rows' values at the query's non-zero
+    dimensions instead of multiplying all :data:`DIMENSIONS` columns.
+    """
+
+    def __init__(self, vectors: Iterable[Dict[int, float]]) -> None:
+        matrix = array("f")
+        size = 0
+        for vector in vectors:
+            row = [0.0] * DIMENSIONS
+            for dimension, value in vector.items():
+                row[dimension] = value
+            matrix.extend(row)
+            size += 1
+        self.size = size
+        self.matrix = matrix
+
+    def similarities(self, query: Dict[int, float], minimum: float = 0.0) -> Dict[int, float]:
+        """Return the cosine similarity of every row scoring above ``minimum``."""
+
+        if not query or not self.size:
+            return {}
+        dimensions = sorted(query)
+        weights = [query[dimension] for dimension in dimensions]
+        gather = itemgetter(*dimensions) if len(dimensions) > 1 else lambda row: (row[dimensions[0]],)
+        view = memoryview(self.matrix)
+        scores: Dict[int, float] = {}
+        for doc_id in range(self.size):
+            start = doc_id * DIMENSIONS
+            score = sum(map(mul, weights, gather(view[start : start + DIMENSIONS])))
+            if score > minimum:
+                scores[doc_id] = score
+        return scores
+
+    def search(self, query: Dict[int, float], limit: int) -> List[Tuple[float, int]]:
+        """Return up to ``limit`` ``(cosine, doc_id)`` pairs, most similar first."""
+
+        return top_k(self.similarities(query), limit)
+
+
+def _benchmark(sizes: Sequence[int] = (100, 1_000, 10_000, 50_000), queries: int = 50) -> None:
+    import random
+    import time
+
+    from app.services.search import tokenize
+
+    rng = random.Random(7)
+    words = ["".join(rng.choice("abcdefghilmnoprstuv") for _ in range(rng.randint(3, 9))) for _ in range(5_000)]
+    print(f"{'documents':>10} {'build ms':>10} {'query ms':>10} {'MiB':>6}")
+    for size in sizes:
+        texts = [" ".join(rng.choices(words, k=25)) for _ in range(size)]
+        started = time.perf_counter()
+        index = VectorIndex(embed(tokenize(text)) for text in texts)
+        built = time.perf_counter() - started
+        probes = [embed(tokenize(" ".join(rng.choices(words, k=4)))) for _ in range(queries)]
+        started = time.perf_counter()
+        for probe in probes:
+            index.search(probe, 5)
+        per_query = (time.perf_counter() - started) / queries
+        megabytes = index.matrix.itemsize * len(index.matrix) / 2**20
+        print(f"{size:>10} {built * 1000:>10.1f} {per_query * 1000:>10.2f} {megabytes:>6.1f}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,127 @@
+"""Start-time ordered timelines over the events calendar for window and overlap queries."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, time
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+from zoneinfo import ZoneInfo
+
+from app.models.base import Event
+from app.services.data_loader import DatasetSnapshot
+from app.services.schedules import city_timezone
+
+
+_EPOCH = datetime(1970, 1, 1)
+# Sentinel end for empty padding leaves of the max-end tree; below every real instant.
+_NO_END = -(2**62)
+
+
+def local_seconds(moment: Union[datetime, date], zone: ZoneInfo) -> int:
+    """Return ``moment`` as seconds on the local wall clock of ``zone``.
+
+    Naive datetimes are taken as local, and a plain date as local midnight.
+    """
+
+    if not isinstance(moment, datetime):
+        moment = datetime.combine(moment, time())
+    elif moment.tzinfo is not None:
+        moment = moment.astimezone(zone).replace(tzinfo=None)
+    return int((moment - _EPOCH).total_seconds())
+
+
+class Timeline:
+    """Events sorted by ``(start, id)`` with an implicit interval tree over their ends.
+
+    ``starts`` is searched with :func:`bisect.bisect_left`, so every event
+    beginning before a window's end is a prefix of the timeline. Over that
+    prefix a segment tree of maximum end times (``max_end``) prunes whole runs
+    of events that finished before the window opened, so an overlap query
+    costs ``O(log n + k)`` for ``k`` results however long the calendar grows.
+    """
+
+    def __init__(self, rows: Sequence[int], starts: Sequence[int], ends: Sequence[int], ids: Sequence[str]) -> None:
+        order = sorted(range(len(rows)), key=lambda index: (starts[index], ids[index]))
+        self.rows = array("I", (rows[index] for index in order))
+        self.starts = array("q", (starts[index] for index in order))
+        self.ends = array("q", (ends[index] for index in order))
+        self.positions: Dict[str, int] = {ids[index]: position for position, index in enumerate(order)}
+        leaves = 1
+        while leaves < len(order):
+            leaves *= 2
+        self.leaves = leaves
+        tree = array("q", [_NO_END]) * (2 * leaves)
+        tree[leaves : leaves + len(order)] = self.ends
+        for node in range(leaves - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self.max_end = tree
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def overlapping(self, start: Optional[int] = None, end: Optional[int] = None, after: int = 0) -> Iterator[int]:
+        """Yield positions from ``after`` on, in start order, of events overlapping ``[start, end)``.
+
+        Either bound may be ``None`` for an open-ended window. An event overlaps
+        when it begins before ``end`` and finishes after ``start``.
+        """
+
+        stop = len(self.rows) if end is None else bisect_left(self.starts, end)
+        if start is None:
+            yield from range(after, stop)
+            return
+        if after >= stop:
+            return
+        tree, leaves = self.max_end, self.leaves
+        # Depth-first, left to right, over the subtrees intersecting [after, stop).
+        stack = [(1, 0, leaves)]
+        while stack:
+            node, low, high = stack.pop()
+            if high <= after or low >= stop or tree[node] <= start:
+                continue
+            if node >= leaves:
+                yield low
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+
+
+class EventIndex:
+    """Per-version timelines of the whole calendar and of each category.
+
+    Start and end times are converted once per dataset version to seconds on
+    the city's wall clock, so requests only compare integers.
+    """
+
+    def __init__(self, events: Sequence[Event], zone: ZoneInfo) -> None:
+        self.zone = zone
+        starts = [local_seconds(event.start_time, zone) for event in events]
+        ends = [local_seconds(event.end_time, zone) for event in events]
+        ids = [event.id for event in events]
+        self.all = Timeline(range(len(events)), starts, ends, ids)
+        by_category: Dict[str, List[int]] = {}
+        for row, event in enumerate(events):
+            by_category.setdefault(event.category.lower(), []).append(row)
+        self.categories: Dict[str, Timeline] = {
+            category: Timeline(
+                rows, [starts[row] for row in rows], [ends[row] for row in rows], [ids[row] for row in rows]
+            )
+            for category, rows in by_category.items()
+        }
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "EventIndex":
+        # Cities falling back to one shared file share derived caches, so the zone is part of the key.
+        zone = city_timezone(snapshot.city)
+        return snapshot.derive(f"event_index:{zone.key}", lambda snap: cls(snap.records, zone))
+
+    def timeline(self, category: Optional[str] = None) -> Optional[Timeline]:
+        """Return the timeline for ``category`` (case-insensitive), or the whole calendar; ``None`` if unknown."""
+
+        if category is None:
+            return self.all
+        return self.categories.get(category.strip().lower())
+
+    def seconds(self, moment: Union[datetime, date]) -> int:
+        return local_seconds(moment, self.zone)
@@ -0,0 +1,108 @@
+"""Typo-tolerant term lookup: a character-trigram index with bounded edit distance."""
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+def max_edits(term: str) -> int:
+    """Edits tolerated for a term of this length: none up to 4 characters, one up to 8, then two."""
+
+    if len(term) <= 4:
+        return 0
+    return 1 if len(term) <= 8 else 2
+
+
+def _grams(term: str) -> List[str]:
+    # Padding gives the first and last characters grams of their own, so every
+    # character sits in up to three grams and the count bound below holds.
+    padded = f"  {term} "
+    return [padded[index : index + 3] for index in range(len(term) + 1)]
+
+
+def levenshtein_within(left: str, right: str, limit: int) -> Optional[int]:
+    """Return the edit distance of two strings, or ``None`` once it must exceed ``limit``.
+
+    Only a diagonal band of width ``2 * limit + 1`` of the dynamic programming
+    matrix is filled, and the scan stops as soon as a whole row is over the
+    limit, so rejecting a distant candidate costs O(limit * len) at most.
+    """
+
+    if abs(len(left) - len(right)) > limit:
+        return None
+    if len(left) > len(right):
+        left, right = right, left
+    over = limit + 1
+    previous = [column if column <= limit else over for column in range(len(right) + 1)]
+    for row in range(1, len(left) + 1):
+        low, high = max(1, row - limit), min(len(right), row + limit)
+        current = [over] * (len(right) + 1)
+        current[0] = row if row <= limit else over
+        char = left[row - 1]
+        best = current[0]
+        for column in range(low, high + 1):
+            cost = previous[column - 1] + (char != right[column - 1])
+            value = min(cost, previous[column] + 1, current[column - 1] + 1, over)
+            current[column] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return None
+        previous = current
+    distance = previous[len(right)]
+    return distance if distance <= limit else None
+
+
+class TrigramIndex:
+    """Character-trigram postings over a vocabulary for approximate term lookup.
+
+    An edit touches at most three trigram positions, so a term within ``k``
+    edits of a candidate shares all but ``3 * k`` of its distinct padded
+    trigrams with it. :meth:`correct` counts shared grams through the
+    postings, drops candidates below that bound or with too different a
+    length, and runs the banded Levenshtein check only on the survivors —
+    never against the whole vocabulary.
+    """
+
+    def __init__(self, terms: Iterable[str], weights: Optional[Sequence[int]] = None) -> None:
+        self.terms: List[str] = list(terms)
+        self.weights = array("I", weights if weights is not None else [0] * len(self.terms))
+        self.lookup = {term: position for position, term in enumerate(self.terms)}
+        postings: Dict[str, array] = {}
+        for position, term in enumerate(self.terms):
+            for gram in dict.fromkeys(_grams(term)):
+                postings.setdefault(gram, array("I")).append(position)
+        self.postings = postings
+
+    def correct(self, term: str) -> Optional[str]:
+        """Return the closest vocabulary term within :func:`max_edits` of ``term``.
+
+        Exact members are returned as is. Ties on distance go to the heavier
+        term (e.g. the one in more documents), then to the alphabetically first.
+        """
+
+        if term in self.lookup:
+            return term
+        limit = max_edits(term)
+        if not limit:
+            return None
+        grams = dict.fromkeys(_grams(term))
+        required = len(grams) - 3 * limit
+        shared = Counter(chain.from_iterable(self.postings.get(gram, ()) for gram in grams))
+
+        best: Optional[tuple] = None
+        for position, count in shared.items():
+            if count < required:
+                continue
+            candidate = self.terms[position]
+            if abs(len(candidate) - len(term)) > limit:
+                continue
+            distance = levenshtein_within(term, candidate, limit)
+            if distance is None:
+                continue
+            key = (distance, -self.weights[position], candidate)
+            if best is None or key < best:
+                best = key
+        return best[2] if best is not None else None
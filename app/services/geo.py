@@ -0,0 +1,334 @@
+"""Spatial lookups over datasets whose records carry a ``GeoPoint``."""
+from __future__ import annotations
+
+import heapq
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.data_loader import DatasetSnapshot
+
+
+EARTH_RADIUS_M = 6_371_008.8
+# Grid cells are ~1.1 km tall; small enough that a city viewport touches a few dozen cells.
+CELL_DEGREES = 0.01
+
+BBox = Tuple[float, float, float, float]
+
+
+class InvalidGeoQueryError(ValueError):
+    """Raised when ``bbox``, ``near`` or ``radius`` parameters cannot be interpreted."""
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Return the great-circle distance between two points in metres."""
+
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lng2 - lng1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def mercator_x(lng: float) -> float:
+    """Project a longitude onto the unit Web Mercator square (0 = west edge)."""
+
+    return lng / 360 + 0.5
+
+
+def mercator_y(lat: float) -> float:
+    """Project a latitude onto the unit Web Mercator square (0 = north edge), clamped."""
+
+    sin = math.sin(math.radians(lat))
+    if sin >= 1:
+        return 0.0
+    if sin <= -1:
+        return 1.0
+    return min(1.0, max(0.0, 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi))
+
+
+def mercator_lng(x: float) -> float:
+    return (x - 0.5) * 360
+
+
+def mercator_lat(y: float) -> float:
+    return math.degrees(2 * math.atan(math.exp(math.pi * (1 - 2 * y)))) - 90
+
+
+def _parse_floats(raw: str, count: int, name: str) -> List[float]:
+    parts = [part.strip() for part in raw.split(",")]
+    try:
+        values = [float(part) for part in parts]
+    except ValueError:
+        values = []
+    if len(values) != count or not all(math.isfinite(value) for value in values):
+        raise InvalidGeoQueryError(f"'{name}' must be {count} comma-separated numbers")
+    return values
+
+
+def _check_point(lat: float, lng: float, name: str) -> None:
+    if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        raise InvalidGeoQueryError(f"'{name}' is outside the valid latitude/longitude range")
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[Tuple[float, float]]:
+    """Decode a Google encoded polyline into ``(lat, lng)`` pairs."""
+
+    factor = 10**precision
+    points: List[Tuple[float, float]] = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                if index >= length:
+                    raise InvalidGeoQueryError("Encoded polyline is truncated")
+                byte = ord(encoded[index]) - 63
+                index += 1
+                if not 0 <= byte < 64:
+                    raise InvalidGeoQueryError("Encoded polyline contains invalid characters")
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / factor, lng / factor))
+    return points
+
+
+class GeoFilter:
+    """A parsed viewport and/or proximity query.
+
+    ``bbox`` follows the GeoJSON order ``west,south,east,north``; a box whose
+    west edge is east of its east edge crosses the antimeridian. ``near`` is
+    ``lat,lng`` and sorts results by distance, optionally limited to ``radius``
+    metres.
+    """
+
+    __slots__ = ("bbox", "near", "radius")
+
+    def __init__(
+        self,
+        bbox: Optional[BBox] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius: Optional[float] = None,
+    ) -> None:
+        self.bbox = bbox
+        self.near = near
+        self.radius = radius
+
+    @classmethod
+    def parse(
+        cls,
+        bbox: Optional[str] = None,
+        near: Optional[str] = None,
+        radius: Optional[float] = None,
+    ) -> Optional["GeoFilter"]:
+        """Build a filter from raw query parameters, or return ``None`` when none were given."""
+
+        if radius is not None and not near:
+            raise InvalidGeoQueryError("'radius' requires 'near'")
+        parsed_bbox: Optional[BBox] = None
+        if bbox:
+            west, south, east, north = _parse_floats(bbox, 4, "bbox")
+            _check_point(south, west, "bbox")
+            _check_point(north, east, "bbox")
+            if south > north:
+                raise InvalidGeoQueryError("'bbox' south edge must not exceed its north edge")
+            parsed_bbox = (west, south, east, north)
+        parsed_near: Optional[Tuple[float, float]] = None
+        if near:
+            lat, lng = _parse_floats(near, 2, "near")
+            _check_point(lat, lng, "near")
+            parsed_near = (lat, lng)
+        if parsed_bbox is None and parsed_near is None:
+            return None
+        return cls(parsed_bbox, parsed_near, radius)
+
+
+def _cell(value: float) -> int:
+    return math.floor(value / CELL_DEGREES)
+
+
+class GeoIndex:
+    """Uniform-grid index over the coordinates of one dataset version.
+
+    Row positions are bucketed by ``CELL_DEGREES`` cells, so a viewport or
+    radius query only inspects points in the cells it overlaps before applying
+    the exact bounds or haversine test.
+    """
+
+    def __init__(self, points: Iterable[Tuple[int, float, float]]) -> None:
+        self.lats = array("d")
+        self.lngs = array("d")
+        self.rows = array("I")
+        cells: Dict[Tuple[int, int], array] = {}
+        for slot, (row, lat, lng) in enumerate(points):
+            self.rows.append(row)
+            self.lats.append(lat)
+            self.lngs.append(lng)
+            cells.setdefault((_cell(lat), _cell(lng)), array("I")).append(slot)
+        self.cells = cells
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "GeoIndex":
+        return snapshot.derive("geo_index", _build_index)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _slots_in(self, south: float, west: float, north: float, east: float) -> Iterable[int]:
+        lat_lo, lat_hi = _cell(south), _cell(north)
+        lng_lo, lng_hi = _cell(west), _cell(east)
+        if (lat_hi - lat_lo + 1) * (lng_hi - lng_lo + 1) > len(self.cells):
+            buckets: Iterable[array] = (
+                slots
+                for (lat_cell, lng_cell), slots in self.cells.items()
+                if lat_lo <= lat_cell <= lat_hi and lng_lo <= lng_cell <= lng_hi
+            )
+        else:
+            buckets = (
+                self.cells.get((lat_cell, lng_cell), ())
+                for lat_cell in range(lat_lo, lat_hi + 1)
+                for lng_cell in range(lng_lo, lng_hi + 1)
+            )
+        lats, lngs = self.lats, self.lngs
+        for slots in buckets:
+            for slot in slots:
+                if south <= lats[slot] <= north and west <= lngs[slot] <= east:
+                    yield slot
+
+    def _within(self, bbox: BBox) -> Iterable[int]:
+        west, south, east, north = bbox
+        if west <= east:
+            return self._slots_in(south, west, north, east)
+        return (*self._slots_in(south, west, north, 180.0), *self._slots_in(south, -180.0, north, east))
+
+    def _around(self, lat: float, lng: float, radius: float) -> Iterable[int]:
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+        dlng = 180.0 if cos_lat < 1e-9 else math.degrees(radius / EARTH_RADIUS_M) / cos_lat
+        if dlng >= 180.0:
+            return self._slots_in(south, -180.0, north, 180.0)
+        west, east = lng - dlng, lng + dlng
+        if west < -180.0:
+            west += 360.0
+        if east > 180.0:
+            east -= 360.0
+        return self._within((west, south, east, north))
+
+    def _slots(self, geo: GeoFilter) -> List[int]:
+        if geo.near is not None and geo.radius is not None:
+            slots: Iterable[int] = self._around(geo.near[0], geo.near[1], geo.radius)
+            if geo.bbox is not None:
+                slots = set(slots).intersection(self._within(geo.bbox))
+        elif geo.bbox is not None:
+            slots = self._within(geo.bbox)
+        else:
+            slots = range(len(self.rows))
+        return list(slots)
+
+    def search(self, geo: GeoFilter) -> List[int]:
+        """Return matching row positions, nearest first when ``near`` is set, else in row order."""
+
+        slots = self._slots(geo)
+        rows = self.rows
+        if geo.near is None:
+            return sorted(rows[slot] for slot in slots)
+        distances = self.distances(geo.near, slots)
+        ranked = sorted(
+            (distance, rows[slot])
+            for slot, distance in zip(slots, distances)
+            if geo.radius is None or distance <= geo.radius
+        )
+        return [row for _, row in ranked]
+
+    def nearest(self, geo: GeoFilter, after: Optional[Tuple[float, int]] = None) -> Iterator[Tuple[float, int]]:
+        """Yield ``(distance, row)`` for a ``near`` query, nearest first, lazily.
+
+        Only pairs ordered after the keyset ``after`` are produced, so a page
+        resumes where the previous one ended. The candidates are heapified
+        rather than sorted: a page of ``k`` results costs ``O(n + k log n)``
+        and nothing is kept between requests.
+        """
+
+        if geo.near is None:
+            raise ValueError("nearest() needs a filter with a 'near' point")
+        slots = self._slots(geo)
+        rows = self.rows
+        keyed = [
+            (distance, rows[slot])
+            for slot, distance in zip(slots, self.distances(geo.near, slots))
+            if geo.radius is None or distance <= geo.radius
+        ]
+        if after is not None:
+            keyed = [pair for pair in keyed if pair > after]
+        heapq.heapify(keyed)
+        while keyed:
+            yield heapq.heappop(keyed)
+
+    def distances(self, origin: Tuple[float, float], slots: Sequence[int]) -> List[float]:
+        """Return haversine distances in metres from ``origin`` to each slot in one pass."""
+
+        phi1 = math.radians(origin[0])
+        lambda1 = math.radians(origin[1])
+        cos_phi1 = math.cos(phi1)
+        sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+        lats, lngs = self.lats, self.lngs
+        result = []
+        for slot in slots:
+            phi2 = radians(lats[slot])
+            a = sin((phi2 - phi1) / 2) ** 2 + cos_phi1 * cos(phi2) * sin((radians(lngs[slot]) - lambda1) / 2) ** 2
+            result.append(2 * EARTH_RADIUS_M * asin(min(1.0, sqrt(a))))
+        return result
+
+
+def _build_index(snapshot: DatasetSnapshot) -> GeoIndex:
+    table = snapshot.table
+    if table is not None:
+        lats = table.column("coordinates.lat")
+        lngs = table.column("coordinates.lng")
+        present = table.column("coordinates") if "coordinates" in table.column_names else None
+        return GeoIndex(
+            (row, lats[row], lngs[row]) for row in range(len(table)) if present is None or present[row]
+        )
+    return GeoIndex(
+        (row, record.coordinates.lat, record.coordinates.lng)
+        for row, record in enumerate(snapshot.records)
+        if record.coordinates is not None
+    )
+
+
+def polygon_centroid(points: Sequence[Tuple[float, float]]) -> Tuple[float, float]:
+    """Return the area centroid ``(lat, lng)`` of a ring of ``(lat, lng)`` vertices.
+
+    Degenerate rings (fewer than three vertices or zero area) fall back to the
+    vertex average.
+    """
+
+    if not points:
+        raise ValueError("Polygon has no vertices")
+    area = lat_sum = lng_sum = 0.0
+    for (lat1, lng1), (lat2, lng2) in zip(points, [*points[1:], points[0]]):
+        cross = lng1 * lat2 - lng2 * lat1
+        area += cross
+        lng_sum += (lng1 + lng2) * cross
+        lat_sum += (lat1 + lat2) * cross
+    if abs(area) < 1e-15:
+        return sum(lat for lat, _ in points) / len(points), sum(lng for _, lng in points) / len(points)
+    return lat_sum / (3 * area), lng_sum / (3 * area)
+
+
+def select_records(snapshot: DatasetSnapshot, geo: Optional[GeoFilter]) -> Sequence:
+    """Return the snapshot's records matching ``geo`` (all of them when ``geo`` is ``None``)."""
+
+    if geo is None:
+        return snapshot.records
+    records = snapshot.records
+    return [records[row] for row in GeoIndex.for_snapshot(snapshot).search(geo)]
@@ -0,0 +1,142 @@
+"""Per-version feature bitmaps over community profiles for filtering and match ranking."""
+from __future__ import annotations
+
+from itertools import islice
+from typing import Dict, List, Sequence, Tuple
+
+from app.models.base import UserProfile
+from app.services import bitmap
+from app.services.data_loader import DatasetSnapshot
+from app.services.search import top_k
+
+
+# Points a shared feature of each kind adds to a match score. Integers so scores can be bit-sliced.
+MATCH_WEIGHTS: Dict[str, int] = {"interest": 3, "language": 2, "nationality": 1, "has_kids": 2}
+
+Feature = Tuple[str, str]
+
+
+def normalise_value(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _features(profile: UserProfile) -> List[Feature]:
+    features = [("interest", normalise_value(interest)) for interest in profile.interests]
+    features.extend(("language", normalise_value(language)) for language in profile.languages)
+    features.append(("nationality", normalise_value(profile.nationality)))
+    features.append(("has_kids", "yes" if profile.has_kids else "no"))
+    return features
+
+
+def _add(slices: List[int], rows: int, bit: int) -> None:
+    """Add 1 << ``bit`` to the counters of ``rows`` in the bit-sliced accumulator ``slices``."""
+
+    carry = rows
+    while carry:
+        if bit >= len(slices):
+            slices.extend([0] * (bit + 1 - len(slices)))
+        current = slices[bit]
+        slices[bit] = current ^ carry
+        carry &= current
+        bit += 1
+
+
+class ProfileIndex:
+    """Inverted index from profile features (interests, languages, nationality, kids) to row bitmaps.
+
+    Every profile is also stored as a sparse bitset over feature ids, so the
+    features two members share are a single ``&``. Filters and match scoring
+    combine whole-catalogue bitmaps; no request lowercases or walks individual
+    profiles' lists.
+    """
+
+    def __init__(self, profiles: Sequence[UserProfile]) -> None:
+        self.size = len(profiles)
+        self.all = bitmap.full(self.size)
+        self.positions: Dict[str, int] = {}
+        self.feature_ids: Dict[Feature, int] = {}
+        self.features: List[Feature] = []
+        postings: List[List[int]] = []
+        self.vectors: List[int] = []
+        for row, profile in enumerate(profiles):
+            self.positions[profile.id] = row
+            vector = 0
+            for feature in _features(profile):
+                feature_id = self.feature_ids.get(feature)
+                if feature_id is None:
+                    feature_id = self.feature_ids[feature] = len(self.features)
+                    self.features.append(feature)
+                    postings.append([])
+                if not vector >> feature_id & 1:
+                    postings[feature_id].append(row)
+                    vector |= 1 << feature_id
+            self.vectors.append(vector)
+        self.postings: List[int] = [bitmap.from_positions(rows, self.size) for rows in postings]
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "ProfileIndex":
+        return snapshot.derive("profile_index", lambda snap: cls(snap.records))
+
+    def rows(self, kind: str, value: str) -> int:
+        feature_id = self.feature_ids.get((kind, normalise_value(value)))
+        return self.postings[feature_id] if feature_id is not None else 0
+
+    def shared(self, left: int, right: int) -> List[Feature]:
+        """Return the features profile rows ``left`` and ``right`` have in common."""
+
+        common = self.vectors[left] & self.vectors[right]
+        return [self.features[feature_id] for feature_id in bitmap.iter_bits(common)]
+
+    def score_slices(self, row: int) -> List[int]:
+        """Return every profile's weighted overlap with ``row`` as bit slices.
+
+        Slice ``i`` holds bit ``i`` of each row's score. Each of ``row``'s
+        features adds its weight to all rows in its posting bitmap at once, so
+        scoring costs a few big-integer operations per feature rather than one
+        step per member.
+        """
+
+        slices: List[int] = []
+        for feature_id in bitmap.iter_bits(self.vectors[row]):
+            rows = self.postings[feature_id]
+            weight, bit = MATCH_WEIGHTS[self.features[feature_id][0]], 0
+            while weight:
+                if weight & 1:
+                    _add(slices, rows, bit)
+                weight >>= 1
+                bit += 1
+        return slices
+
+    def matches(self, row: int, limit: int) -> List[Tuple[int, int]]:
+        """Return up to ``limit`` ``(score, row)`` pairs of the profiles most similar to ``row``, best first.
+
+        The bit slices are walked from the most significant down to find the
+        ``limit`` highest scores without decoding any row's score (O'Neil and
+        Quass' bit-sliced top-k); only those rows are then scored and ordered
+        with :func:`app.services.search.top_k`. Ties go to the lower row.
+        """
+
+        slices = self.score_slices(row)
+        remaining = 0
+        for rows in slices:
+            remaining |= rows
+        remaining &= ~(1 << row)
+        chosen = 0
+        for rows in reversed(slices):
+            above = chosen | (remaining & rows)
+            found = bitmap.count(above)
+            if found > limit:
+                remaining &= rows
+            else:
+                chosen = above
+                remaining &= ~rows
+                if found == limit:
+                    break
+        # Whatever is left is tied at the cut-off score; take the lowest rows.
+        tied = islice(bitmap.iter_bits(remaining), max(0, limit - bitmap.count(chosen)))
+        chosen |= bitmap.from_positions(tied, self.size)
+        scores = {
+            position: sum((rows >> position & 1) << bit for bit, rows in enumerate(slices))
+            for position in bitmap.iter_bits(chosen)
+        }
+        return [(int(score), position) for score, position in top_k(scores, limit)]
@@ -0,0 +1,96 @@
+"""Per-version attribute and text indexes over the rentals catalogue."""
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services import bitmap
+from app.services.columnar import ColumnarTable
+from app.services.data_loader import DatasetSnapshot
+
+
+FLAG_COLUMNS = ("furnished", "kid_friendly", "pet_friendly")
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[index : index + 3] for index in range(len(text) - 2)}
+
+
+class RentalIndex:
+    """Bitmap indexes for rental filters plus a trigram index for ``q`` search.
+
+    Boolean attributes and neighborhoods map to row bitmaps, so combining
+    filters is a handful of integer ``&`` operations regardless of catalogue
+    size. Free-text search keeps its substring semantics: the trigram postings
+    narrow the candidates and only those rows are checked against the title and
+    neighborhood columns.
+    """
+
+    def __init__(self, table: ColumnarTable) -> None:
+        self.table = table
+        self.size = len(table)
+        self.all = bitmap.full(self.size)
+        self.flags: Dict[str, int] = {name: bitmap.from_flags(table.column(name)) for name in FLAG_COLUMNS}
+
+        ids = table.column("id")
+        titles = table.column("title")
+        neighborhoods = table.column("neighborhood")
+        self.positions: Dict[str, int] = {}
+        by_neighborhood: Dict[str, List[int]] = {}
+        postings: Dict[str, array] = {}
+        for row in range(self.size):
+            self.positions[ids[row]] = row
+            neighborhood = neighborhoods[row].lower()
+            by_neighborhood.setdefault(neighborhood, []).append(row)
+            for gram in _trigrams(titles[row].lower()) | _trigrams(neighborhood):
+                postings.setdefault(gram, array("I")).append(row)
+        self.neighborhoods: Dict[str, int] = {
+            name: bitmap.from_positions(rows, self.size) for name, rows in by_neighborhood.items()
+        }
+        self.trigrams = postings
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "RentalIndex":
+        return snapshot.derive("rental_index", lambda snap: cls(snap.table))
+
+    def flag(self, name: str, wanted: bool) -> int:
+        rows = self.flags[name]
+        return rows if wanted else self.all & ~rows
+
+    def neighborhood(self, name: str) -> int:
+        return self.neighborhoods.get(name.lower(), 0)
+
+    def text_candidates(self, needle: str) -> int:
+        """Return rows that may contain ``needle`` (already lower-cased)."""
+
+        grams = _trigrams(needle)
+        if not grams:
+            return self.all
+        postings = sorted((self.trigrams.get(gram, ()) for gram in grams), key=len)
+        rows = set(postings[0])
+        for other in postings[1:]:
+            if not rows:
+                break
+            rows.intersection_update(other)
+        return bitmap.from_positions(rows, self.size)
+
+    def text_matches(self, row: int, needle: str) -> bool:
+        title = self.table.column("title")[row]
+        return needle in title.lower() or needle in self.table.column("neighborhood")[row].lower()
+
+    def scan(self, rows: int, needle: Optional[str], start: int = 0) -> Iterator[int]:
+        """Yield matching row positions in catalogue order, starting at ``start``."""
+
+        for row in bitmap.iter_bits(rows, start):
+            if needle is None or self.text_matches(row, needle):
+                yield row
+
+    def scan_ordered(
+        self, rows: int, needle: Optional[str], ranked: Iterable[Tuple[float, int]]
+    ) -> Iterator[Tuple[float, int]]:
+        """Yield ``(key, row)`` pairs from ``ranked`` (e.g. nearest first) whose row is set in ``rows`` and matches."""
+
+        contains = bitmap.membership(rows)
+        for key, row in ranked:
+            if contains(row) and (needle is None or self.text_matches(row, needle)):
+                yield key, row
@@ -0,0 +1,201 @@
+"""Weekly opening schedules compiled from free-text strings into a minute-of-week index."""
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from app.services import bitmap
+from app.services.data_loader import DatasetSnapshot
+
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DEFAULT_TIMEZONE = "Europe/Rome"
+# IANA zone per supported city; the default (city-less) catalogue is Palermo's. Zone data ships
+# with the ``tzdata`` package, since slim container images have no system zoneinfo.
+CITY_TIMEZONES: Dict[str, str] = {
+    "Palermo": "Europe/Rome",
+    "Lisbon": "Europe/Lisbon",
+    "Bali": "Asia/Makassar",
+}
+
+_DAY_NAMES = (
+    ("mon", "monday"),
+    ("tue", "tues", "tuesday"),
+    ("wed", "wednesday"),
+    ("thu", "thur", "thurs", "thursday"),
+    ("fri", "friday"),
+    ("sat", "saturday"),
+    ("sun", "sunday"),
+)
+_DAYS = {name: day for day, names in enumerate(_DAY_NAMES) for name in names}
+_DAY_GROUPS = {"daily": range(7), "everyday": range(7), "weekdays": range(5), "weekends": range(5, 7)}
+_TIME_RANGE = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*[-–]\s*(\d{1,2})(?::(\d{2}))?")
+_DAY_RANGE = re.compile(r"([a-z]+)\s*[-–]\s*([a-z]+)")
+_WORD = re.compile(r"[a-z]+")
+_WHOLE_DAY = re.compile(r"\b24\s*(?:h|hrs?|hours)\b|\b24/7\b")
+# Anything time-like left once the recognised ranges are removed ("8am-6pm", "from 9").
+_UNREAD_TIME = re.compile(r"\d|\b(?:am|pm|noon|midnight)\b")
+_CLOSED = re.compile(r"\bclosed\b")
+
+Interval = Tuple[int, int]
+
+
+def _minutes(hours: str, minutes: Optional[str]) -> Optional[int]:
+    value = int(hours) * 60 + int(minutes or 0)
+    return value if 0 <= value <= MINUTES_PER_DAY else None
+
+
+def _days(text: str) -> List[int]:
+    days: List[int] = []
+    for start, end in _DAY_RANGE.findall(text):
+        if start in _DAYS and end in _DAYS:
+            first, last = _DAYS[start], _DAYS[end]
+            days.extend((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+    text = _DAY_RANGE.sub(" ", text)
+    for word in _WORD.findall(text.replace("every day", "everyday")):
+        if word in _DAYS:
+            days.append(_DAYS[word])
+        elif word in _DAY_GROUPS:
+            days.extend(_DAY_GROUPS[word])
+    return sorted(set(days))
+
+
+def parse_schedule(schedule: str) -> Optional[List[Interval]]:
+    """Compile a schedule such as ``"Mon-Sat 08:00-18:00; Sun 09:00-13:00"`` into weekly intervals.
+
+    Returns sorted, merged ``[start, end)`` minute-of-week intervals (Monday
+    00:00 is minute 0), or ``None`` when nothing can be recognised. Segments are
+    separated by ``;``. Hours without days apply to every day, days without
+    hours (``"Pickup Tue & Thu"``, ``"Wed 24h"``) cover the whole day, and
+    ranges ending before they start (``"18:00-02:00"``) run past midnight into
+    the next day. ``"closed"`` segments remove their days (``"Daily
+    10:00-22:00; closed Mon"``). A segment with times in any other format
+    (``"8am-6pm"``) makes the whole schedule unknown rather than guessed.
+    """
+
+    closed: Set[int] = set()
+    opening: List[Tuple[List[int], List[Tuple[str, ...]]]] = []
+    for segment in schedule.lower().split(";"):
+        whole_day = bool(_WHOLE_DAY.search(segment))
+        segment = _WHOLE_DAY.sub(" ", segment)
+        ranges = _TIME_RANGE.findall(segment)
+        rest = _TIME_RANGE.sub(" ", segment)
+        if _UNREAD_TIME.search(rest):
+            return None
+        days = _days(rest)
+        if _CLOSED.search(rest):
+            if not days or ranges or whole_day:
+                # Closures without days, or for part of a day, cannot be represented.
+                return None
+            closed.update(days)
+            continue
+        days = days or (list(range(7)) if ranges or whole_day else [])
+        if days:
+            opening.append((days, ranges))
+
+    intervals: List[Interval] = []
+    for days, ranges in opening:
+        spans: List[Interval] = []
+        for start_h, start_m, end_h, end_m in ranges:
+            start, end = _minutes(start_h, start_m), _minutes(end_h, end_m)
+            if start is None or end is None:
+                return None
+            spans.append((start, end if end > start else end + MINUTES_PER_DAY))
+        if not ranges:
+            spans.append((0, MINUTES_PER_DAY))
+        for day in days:
+            if day in closed:
+                continue
+            base = day * MINUTES_PER_DAY
+            for start, end in spans:
+                start, end = base + start, base + end
+                if end > MINUTES_PER_WEEK:
+                    # Sunday night ranges wrap around to Monday morning.
+                    intervals.append((0, end - MINUTES_PER_WEEK))
+                    end = MINUTES_PER_WEEK
+                intervals.append((start, end))
+    if not intervals:
+        return None
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def city_timezone(city: Optional[str]) -> ZoneInfo:
+    """Return the zone of ``city``; like datasets, unknown cities fall back to the default city's."""
+
+    return ZoneInfo(CITY_TIMEZONES.get(city or "", DEFAULT_TIMEZONE))
+
+
+def minute_of_week(moment: datetime, zone: ZoneInfo) -> int:
+    """Return the minute of the week of ``moment`` in ``zone``; naive datetimes are taken as local time there."""
+
+    local = moment.replace(tzinfo=zone) if moment.tzinfo is None else moment.astimezone(zone)
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ScheduleIndex:
+    """Rows open during each elementary slice of the week.
+
+    Every schedule boundary of every row is collected into one sorted array of
+    minute-of-week breakpoints; the slice between two breakpoints has a
+    precomputed row bitmap. "Who is open at minute ``m``" is therefore one
+    :func:`bisect.bisect_right` plus a bitmap, with no string parsing or
+    per-row work at request time. Rows whose schedule cannot be parsed are
+    in :attr:`unknown` and never reported as open or closed.
+    """
+
+    def __init__(self, schedules: Sequence[Optional[List[Interval]]]) -> None:
+        self.size = len(schedules)
+        self.unknown = bitmap.from_positions((row for row, spans in enumerate(schedules) if spans is None), self.size)
+        self.known = bitmap.full(self.size) & ~self.unknown
+        opens: Dict[int, int] = {}
+        closes: Dict[int, int] = {}
+        for row, spans in enumerate(schedules):
+            for start, end in spans or ():
+                opens[start] = opens.get(start, 0) | 1 << row
+                closes[end] = closes.get(end, 0) | 1 << row
+        self.breakpoints = array("I", [0])
+        self.open_rows: List[int] = [0]
+        current = 0
+        for minute in sorted(opens.keys() | closes.keys()):
+            if minute >= MINUTES_PER_WEEK:
+                break
+            current = (current & ~closes.get(minute, 0)) | opens.get(minute, 0)
+            if minute == self.breakpoints[-1]:
+                self.open_rows[-1] = current
+            else:
+                self.breakpoints.append(minute)
+                self.open_rows.append(current)
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "ScheduleIndex":
+        return snapshot.derive(
+            "schedule_index", lambda snap: cls([parse_schedule(record.schedule) for record in snap.records])
+        )
+
+    def slot(self, minute: int) -> int:
+        """Return the number of the elementary slice containing ``minute``; it changes only when openings do."""
+
+        return bisect_right(self.breakpoints, minute % MINUTES_PER_WEEK) - 1
+
+    def open_at(self, minute: int) -> int:
+        """Return the bitmap of rows open at minute-of-week ``minute``."""
+
+        return self.open_rows[self.slot(minute)]
+
+    def closed_at(self, minute: int) -> int:
+        return self.known & ~self.open_at(minute)
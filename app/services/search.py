@@ -0,0 +1,94 @@
+"""In-process BM25 full-text ranking over small curated corpora."""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+# Okapi BM25 parameters: term-frequency saturation and document-length normalisation.
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    """
+    a about an and any are as at be best by can do does for from get have how i in is it me my near
+    of on or the there this to what when where which who with you your
+    di e il la le per un una
+    """.split()
+)
+
+
+def normalize_query(text: str) -> str:
+    """Lower-case ``text``, turn punctuation into spaces and collapse whitespace.
+
+    Word tokens are unaffected, so :func:`tokenize` gives the same terms for
+    the raw and the normalised text.
+    """
+
+    return " ".join(_TOKEN.findall(text.lower()))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens of ``text`` without stopwords."""
+
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 term statistics.
+
+    Each term keeps parallel ``array`` postings of document ids and term
+    frequencies, and the length normalisation of every document is computed
+    up front, so scoring a query only touches the postings of its own terms.
+    """
+
+    def __init__(self, documents: Iterable[Sequence[str]]) -> None:
+        postings: Dict[str, Tuple[array, array]] = {}
+        lengths: List[int] = []
+        for doc_id, tokens in enumerate(documents):
+            lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                docs, freqs = postings.setdefault(token, (array("I"), array("I")))
+                docs.append(doc_id)
+                freqs.append(count)
+        self.size = len(lengths)
+        average = sum(lengths) / self.size if self.size else 0.0
+        self.norms = array("d", (K1 * (1 - B + B * length / average) if average else K1 for length in lengths))
+        self.postings = postings
+        self.idf = {
+            term: math.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, (docs, _) in postings.items()
+        }
+
+    def scores(self, terms: Iterable[str]) -> Dict[int, float]:
+        """Return the BM25 score of every document containing at least one of ``terms``."""
+
+        scores: Dict[int, float] = {}
+        norms = self.norms
+        for term in set(terms):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            idf = self.idf[term]
+            for doc_id, freq in zip(*posting):
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (K1 + 1) / (freq + norms[doc_id])
+        return scores
+
+    def search(self, query: str, limit: int) -> List[Tuple[float, int]]:
+        """Return up to ``limit`` ``(score, doc_id)`` pairs, best first."""
+
+        return top_k(self.scores(tokenize(query)), limit)
+
+
+def top_k(scores: Dict[int, float], limit: int) -> List[Tuple[float, int]]:
+    """Select the ``limit`` best ``(score, doc_id)`` pairs; ties go to the lower document id."""
+
+    best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [(score, doc_id) for doc_id, score in best]
@@ -0,0 +1,176 @@
+"""Per-zoom simplified, tile-clipped GeoJSON for safety zones.
+
+Zone rings are projected to Web Mercator and simplified with Douglas–Peucker
+once per zoom level and dataset version. Each ``z/x/y`` tile then clips the
+simplified rings to its (slightly buffered) bounds and rounds coordinates to
+the precision the zoom level can display, which keeps tiles small enough to
+be cached as encoded bytes.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.models.base import SafetyZone
+from app.services.data_loader import DatasetSnapshot
+from app.services.geo import mercator_lat, mercator_lng, mercator_x, mercator_y
+
+
+# Tile geometry follows the usual vector-tile conventions: 4096 units per tile,
+# a 3-unit simplification tolerance and a 64-unit buffer around each tile.
+TILE_EXTENT = 4096
+TOLERANCE_UNITS = 3
+BUFFER_UNITS = 64
+MAX_ZOOM = 22
+
+Point = Tuple[float, float]
+
+
+def _segment_distance_sq(point: Point, start: Point, end: Point) -> float:
+    x, y = point
+    x1, y1 = start
+    dx, dy = end[0] - x1, end[1] - y1
+    if dx or dy:
+        t = ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)
+        if t > 1:
+            x1, y1 = end
+        elif t > 0:
+            x1, y1 = x1 + dx * t, y1 + dy * t
+    return (x - x1) ** 2 + (y - y1) ** 2
+
+
+def simplify(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """Douglas–Peucker simplification of an open polyline, keeping both endpoints."""
+
+    if len(points) < 3:
+        return list(points)
+    keep = bytearray(len(points))
+    keep[0] = keep[-1] = 1
+    limit = tolerance * tolerance
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, index = 0.0, 0
+        for candidate in range(first + 1, last):
+            distance = _segment_distance_sq(points[candidate], points[first], points[last])
+            if distance > farthest:
+                farthest, index = distance, candidate
+        if farthest > limit:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _ring_area(ring: Sequence[Point]) -> float:
+    return abs(sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, [*ring[1:], ring[0]]))) / 2
+
+
+def simplify_ring(ring: Sequence[Point], tolerance: float) -> List[Point]:
+    """Simplify an (unclosed) ring; returns ``[]`` when it shrinks below the tolerance."""
+
+    if len(ring) < 3 or _ring_area(ring) < tolerance * tolerance:
+        return []
+    # Close the ring so the edge back to the first vertex is simplified too.
+    simplified = simplify([*ring, ring[0]], tolerance)[:-1]
+    if len(simplified) < 3:
+        # Thin rings can collapse to a line even though their area is visible; keep them as is.
+        return list(ring)
+    return simplified
+
+
+def clip_ring(ring: Sequence[Point], x0: float, y0: float, x1: float, y1: float) -> List[Point]:
+    """Sutherland–Hodgman clip of a ring to an axis-aligned rectangle."""
+
+    def clip(points: List[Point], axis: int, bound: float, keep_above: bool) -> List[Point]:
+        if not points:
+            return points
+        result: List[Point] = []
+        previous = points[-1]
+        for current in points:
+            current_in = current[axis] >= bound if keep_above else current[axis] <= bound
+            previous_in = previous[axis] >= bound if keep_above else previous[axis] <= bound
+            if current_in != previous_in:
+                t = (bound - previous[axis]) / (current[axis] - previous[axis])
+                crossing = (previous[0] + (current[0] - previous[0]) * t, previous[1] + (current[1] - previous[1]) * t)
+                result.append(crossing)
+            if current_in:
+                result.append(current)
+            previous = current
+        return result
+
+    points = list(ring)
+    points = clip(points, 0, x0, True)
+    points = clip(points, 0, x1, False)
+    points = clip(points, 1, y0, True)
+    points = clip(points, 1, y1, False)
+    return points if len(points) >= 3 else []
+
+
+class ZoneGeometry:
+    """Zone rings in Mercator coordinates, simplified for a single zoom level."""
+
+    def __init__(self, zones: Sequence[SafetyZone], zoom: int) -> None:
+        tolerance = TOLERANCE_UNITS / (TILE_EXTENT * 2**zoom)
+        self.zones = zones
+        self.rings: List[List[Point]] = []
+        self.bounds: List[Tuple[float, float, float, float]] = []
+        for zone in zones:
+            projected = [(mercator_x(point.lng), mercator_y(point.lat)) for point in zone.polygon]
+            if len(projected) > 1 and projected[0] == projected[-1]:
+                projected.pop()
+            ring = simplify_ring(projected, tolerance)
+            self.rings.append(ring)
+            if ring:
+                xs = [x for x, _ in ring]
+                ys = [y for _, y in ring]
+                self.bounds.append((min(xs), min(ys), max(xs), max(ys)))
+            else:
+                self.bounds.append((math.inf, math.inf, -math.inf, -math.inf))
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot, zoom: int) -> "ZoneGeometry":
+        return snapshot.derive(f"zone_geometry:{zoom}", lambda snap: cls(snap.records, zoom))
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Return the buffered Mercator bounds ``(x0, y0, x1, y1)`` of a tile."""
+
+    size = 1 / 2**z
+    buffer = size * BUFFER_UNITS / TILE_EXTENT
+    return x * size - buffer, y * size - buffer, (x + 1) * size + buffer, (y + 1) * size + buffer
+
+
+def _precision(z: int) -> int:
+    # Enough decimal places to resolve one tile unit in degrees.
+    step = 360 / (2**z * TILE_EXTENT)
+    return max(0, math.ceil(-math.log10(step)))
+
+
+def zone_tile(snapshot: DatasetSnapshot, z: int, x: int, y: int) -> Dict[str, Any]:
+    """Return the GeoJSON FeatureCollection for one ``z/x/y`` tile of the safety zones."""
+
+    geometry = ZoneGeometry.for_snapshot(snapshot, z)
+    x0, y0, x1, y1 = tile_bounds(z, x, y)
+    digits = _precision(z)
+    features: List[Dict[str, Any]] = []
+    for zone, ring, (bx0, by0, bx1, by1) in zip(geometry.zones, geometry.rings, geometry.bounds):
+        if bx1 < x0 or bx0 > x1 or by1 < y0 or by0 > y1:
+            continue
+        if x0 <= bx0 and bx1 <= x1 and y0 <= by0 and by1 <= y1:
+            clipped = ring
+        else:
+            clipped = clip_ring(ring, x0, y0, x1, y1)
+            if not clipped:
+                continue
+        coordinates = [[round(mercator_lng(px), digits), round(mercator_lat(py), digits)] for px, py in clipped]
+        coordinates.append(coordinates[0])
+        features.append(
+            {
+                "type": "Feature",
+                "id": zone.id,
+                "geometry": {"type": "Polygon", "coordinates": [coordinates]},
+                "properties": {"neighborhood": zone.neighborhood, "risk_level": zone.risk_level},
+            }
+        )
+    return {"type": "FeatureCollection", "features": features}
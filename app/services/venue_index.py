@@ -0,0 +1,95 @@
+"""Per-version tag and type bitmaps over the venues catalogue."""
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+from app.services import bitmap
+from app.services.columnar import ColumnarTable
+from app.services.data_loader import DatasetSnapshot
+
+
+# Canonical tag -> spellings found in the datasets; every spelling is indexed as the canonical tag.
+TAG_SYNONYMS: Dict[str, Sequence[str]] = {
+    "wifi": ("wifi", "wi-fi"),
+    "remote work friendly": ("remote work friendly", "remote-work-friendly", "remote-friendly"),
+    "vegetarian friendly": ("vegetarian friendly", "vegetarian-friendly", "vegetarian options"),
+    "family friendly": ("family friendly", "family-friendly"),
+}
+
+
+class InvalidTagQueryError(ValueError):
+    """Raised when a ``tags`` expression cannot be parsed."""
+
+
+def normalise_tag(tag: str) -> str:
+    return " ".join(tag.lower().replace("-", " ").split())
+
+
+_CANONICAL_TAGS = {
+    normalise_tag(spelling): canonical for canonical, spellings in TAG_SYNONYMS.items() for spelling in spellings
+}
+
+
+def canonical_tag(tag: str) -> str:
+    """Return the indexed form of ``tag``: normalised, with synonyms folded together."""
+
+    normalised = normalise_tag(tag)
+    return _CANONICAL_TAGS.get(normalised, normalised)
+
+
+class VenueTagIndex:
+    """Row bitmaps for every venue tag and type.
+
+    Tags are normalised and synonyms resolved once per dataset version, so a
+    request never looks at an individual venue's tag list: filters and
+    ``tags`` expressions become ``&``, ``|`` and ``~`` over whole-catalogue
+    bitmaps.
+    """
+
+    def __init__(self, table: ColumnarTable) -> None:
+        self.size = len(table)
+        self.all = bitmap.full(self.size)
+        tags = table.column("tags")
+        types = table.column("type")
+        by_tag: Dict[str, List[int]] = {}
+        by_type: Dict[str, List[int]] = {}
+        for row in range(self.size):
+            for tag in {canonical_tag(tag) for tag in tags[row]}:
+                by_tag.setdefault(tag, []).append(row)
+            by_type.setdefault(types[row].lower(), []).append(row)
+        self.tags: Dict[str, int] = {tag: bitmap.from_positions(rows, self.size) for tag, rows in by_tag.items()}
+        self.types: Dict[str, int] = {name: bitmap.from_positions(rows, self.size) for name, rows in by_type.items()}
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "VenueTagIndex":
+        return snapshot.derive("venue_tags", lambda snap: cls(snap.table))
+
+    def tag(self, name: str, wanted: bool = True) -> int:
+        rows = self.tags.get(canonical_tag(name), 0)
+        return rows if wanted else self.all & ~rows
+
+    def venue_type(self, name: str) -> int:
+        return self.types.get(name.lower(), 0)
+
+    def evaluate(self, expression: str) -> int:
+        """Return the rows matching a ``tags`` expression.
+
+        Comma-separated clauses must all hold; within a clause ``|`` separates
+        alternatives, and a leading ``!`` negates a tag. For example
+        ``wifi|remote-work-friendly,!late-night`` selects venues with Wi-Fi or
+        remote-work seating that are not late-night places. Unknown tags match
+        no venue.
+        """
+
+        rows = self.all
+        for clause in expression.split(","):
+            matched = 0
+            for literal in clause.split("|"):
+                literal = literal.strip()
+                wanted = not literal.startswith("!")
+                name = literal[1:] if not wanted else literal
+                if not normalise_tag(name):
+                    raise InvalidTagQueryError(f"Empty tag in tags expression {expression!r}")
+                matched |= self.tag(name, wanted)
+            rows &= matched
+        return rows
@@ -0,0 +1,189 @@
+"""Point-in-polygon lookups against the safety zones of one dataset version."""
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.models.base import SafetyZone
+from app.services.data_loader import DatasetSnapshot
+from app.services.geo import haversine_m
+
+
+RISK_LEVELS = ("low", "medium", "high")
+# Contribution of one metre inside a zone of each risk level to a route's 0-1 score.
+RISK_WEIGHTS = (0.25, 0.6, 1.0)
+# Grid cells of ~1.1 km; each cell lists the zones whose bounding box overlaps it.
+CELL_DEGREES = 0.01
+
+
+def _cell(value: float) -> int:
+    return math.floor(value / CELL_DEGREES)
+
+
+class ZoneIndex:
+    """Flat vertex arrays, bounding boxes and a coarse grid over safety zone polygons.
+
+    Each zone's ring is stored as parallel ``array('d')`` latitude/longitude
+    columns. A lookup fetches the zones registered in the point's grid cell,
+    discards those whose bounding box misses the point and ray-casts against
+    the rest, highest risk first, so overlapping zones resolve to the riskiest
+    one after a single containment hit.
+    """
+
+    def __init__(self, zones: Sequence[SafetyZone]) -> None:
+        self.zones = zones
+        self.ranks = [RISK_LEVELS.index(zone.risk_level) for zone in zones]
+        self.lats: List[array] = []
+        self.lngs: List[array] = []
+        self.bounds: List[Tuple[float, float, float, float]] = []
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for position, zone in enumerate(zones):
+            lats = array("d", (point.lat for point in zone.polygon))
+            lngs = array("d", (point.lng for point in zone.polygon))
+            self.lats.append(lats)
+            self.lngs.append(lngs)
+            if len(lats) < 3:
+                self.bounds.append((math.inf, math.inf, -math.inf, -math.inf))
+                continue
+            south, west, north, east = min(lats), min(lngs), max(lats), max(lngs)
+            self.bounds.append((south, west, north, east))
+            for lat_cell in range(_cell(south), _cell(north) + 1):
+                for lng_cell in range(_cell(west), _cell(east) + 1):
+                    cells.setdefault((lat_cell, lng_cell), []).append(position)
+        # Riskiest zones first so the first containing zone is the answer for overlaps.
+        self.cells = {
+            key: tuple(sorted(positions, key=lambda position: (-self.ranks[position], position)))
+            for key, positions in cells.items()
+        }
+
+    @classmethod
+    def for_snapshot(cls, snapshot: DatasetSnapshot) -> "ZoneIndex":
+        return snapshot.derive("zone_index", lambda snap: cls(snap.records))
+
+    def contains(self, position: int, lat: float, lng: float) -> bool:
+        """Even-odd ray casting of ``(lat, lng)`` against zone ``position``."""
+
+        south, west, north, east = self.bounds[position]
+        if not (south <= lat <= north and west <= lng <= east):
+            return False
+        lats, lngs = self.lats[position], self.lngs[position]
+        inside = False
+        previous = len(lats) - 1
+        for current in range(len(lats)):
+            lat_i, lat_j = lats[current], lats[previous]
+            if (lat_i > lat) != (lat_j > lat):
+                lng_i = lngs[current]
+                if lng < (lngs[previous] - lng_i) * (lat - lat_i) / (lat_j - lat_i) + lng_i:
+                    inside = not inside
+            previous = current
+        return inside
+
+    def locate(self, lat: float, lng: float) -> Optional[int]:
+        """Return the position of the riskiest zone containing the point, if any."""
+
+        for position in self.cells.get((_cell(lat), _cell(lng)), ()):
+            if self.contains(position, lat, lng):
+                return position
+        return None
+
+    def locate_many(self, points: Iterable[Tuple[float, float]]) -> List[Optional[int]]:
+        """Resolve a batch of points, reusing the candidate list of consecutive points in one cell."""
+
+        results: List[Optional[int]] = []
+        last_key: Optional[Tuple[int, int]] = None
+        candidates: Tuple[int, ...] = ()
+        contains = self.contains
+        for lat, lng in points:
+            key = (_cell(lat), _cell(lng))
+            if key != last_key:
+                candidates = self.cells.get(key, ())
+                last_key = key
+            found = None
+            for position in candidates:
+                if contains(position, lat, lng):
+                    found = position
+                    break
+            results.append(found)
+        return results
+
+    def _segment_candidates(self, lat1: float, lng1: float, lat2: float, lng2: float) -> List[int]:
+        south, west = min(lat1, lat2), min(lng1, lng2)
+        north, east = max(lat1, lat2), max(lng1, lng2)
+        lat_cells = range(_cell(south), _cell(north) + 1)
+        lng_cells = range(_cell(west), _cell(east) + 1)
+        found: Iterable[int]
+        if len(lat_cells) * len(lng_cells) > len(self.zones):
+            # Long segments: checking every bounding box is cheaper than walking the cells.
+            found = range(len(self.zones))
+        else:
+            found = dict.fromkeys(
+                position
+                for lat_cell in lat_cells
+                for lng_cell in lng_cells
+                for position in self.cells.get((lat_cell, lng_cell), ())
+            )
+        candidates = [
+            position
+            for position in found
+            if self.bounds[position][0] <= north
+            and self.bounds[position][2] >= south
+            and self.bounds[position][1] <= east
+            and self.bounds[position][3] >= west
+        ]
+        candidates.sort(key=lambda position: (-self.ranks[position], position))
+        return candidates
+
+    def _crossings(self, position: int, lat1: float, lng1: float, lat2: float, lng2: float) -> Iterable[float]:
+        """Yield the segment parameters ``t`` in (0, 1) where it crosses zone ``position``'s edges."""
+
+        lats, lngs = self.lats[position], self.lngs[position]
+        dlat, dlng = lat2 - lat1, lng2 - lng1
+        previous = len(lats) - 1
+        for current in range(len(lats)):
+            elat, elng = lats[previous] - lats[current], lngs[previous] - lngs[current]
+            denominator = dlng * elat - dlat * elng
+            if denominator:
+                olat, olng = lats[current] - lat1, lngs[current] - lng1
+                t = (olng * elat - olat * elng) / denominator
+                u = (olng * dlat - olat * dlng) / denominator
+                if 0 < t < 1 and 0 <= u <= 1:
+                    yield t
+            previous = current
+
+    def route_exposure(self, points: Sequence[Tuple[float, float]]) -> Tuple[float, Dict[int, float]]:
+        """Return a route's length in metres and the metres it spends in each zone.
+
+        Each segment is split where it crosses the edges of candidate zones; every
+        piece is attributed to the riskiest zone containing its midpoint, matching
+        :meth:`locate` for overlapping zones.
+        """
+
+        total = 0.0
+        exposure: Dict[int, float] = {}
+        for (lat1, lng1), (lat2, lng2) in zip(points, points[1:]):
+            length = haversine_m(lat1, lng1, lat2, lng2)
+            total += length
+            candidates = self._segment_candidates(lat1, lng1, lat2, lng2)
+            if not candidates or not length:
+                continue
+            cuts = {0.0, 1.0}
+            for position in candidates:
+                cuts.update(self._crossings(position, lat1, lng1, lat2, lng2))
+            ordered = sorted(cuts)
+            for start, end in zip(ordered, ordered[1:]):
+                middle = (start + end) / 2
+                lat, lng = lat1 + (lat2 - lat1) * middle, lng1 + (lng2 - lng1) * middle
+                for position in candidates:
+                    if self.contains(position, lat, lng):
+                        exposure[position] = exposure.get(position, 0.0) + length * (end - start)
+                        break
+        return total, exposure
+
+    def route_score(self, total: float, exposure: Dict[int, float]) -> float:
+        """Distance-weighted risk in [0, 1]: 0 outside all zones, 1 entirely within high-risk zones."""
+
+        if not total:
+            return 0.0
+        weighted = sum(RISK_WEIGHTS[self.ranks[position]] * metres for position, metres in exposure.items())
+        return min(1.0, weighted / total)
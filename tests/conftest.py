@@ -5,7 +5,9 @@ from __future__ import annotations
 import inspect
 import sys
 from pathlib import Path
-from typing import ForwardRef
+from typing import ForwardRef, Iterator
+
+import pytest
 
 
 # Ensure the project root is on ``sys.path`` so ``import app`` works even when
@@ -52,3 +54,14 @@ def _ensure_forward_ref_compatibility() -> None:
 
 _ensure_forward_ref_compatibility()
 
+
+@pytest.fixture
+def data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """Serve datasets from an empty temporary directory, with no snapshots carried in or out."""
+
+    from app.services import data_loader
+
+    monkeypatch.setattr(data_loader, "DATA_DIR", tmp_path)
+    data_loader.clear_snapshots()
+    yield tmp_path
+    data_loader.clear_snapshots()
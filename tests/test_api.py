@@ -89,3 +89,12 @@ def test_relocation_pack_fields() -> None:
     packs = response.json()
     assert packs
     assert "visa_tips" in packs[0]
+
+
+def test_concierge_cache_stats() -> None:
+    client.get("/api/concierge/ask", params={"query": "wifi cafe"})
+    client.get("/api/concierge/ask", params={"query": "WiFi cafe!"})
+    response = client.get("/api/concierge/cache")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["hits"] >= 1 and 0 < body["hit_rate"] <= 1
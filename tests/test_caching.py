@@ -0,0 +1,144 @@
+"""Tests for conditional GETs and response caching on dataset routes."""
+from __future__ import annotations
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.caching import ResponseCache, accepts_gzip, etag_matches, response_cache, settings
+from app.main import app
+from app.services.data_loader import get_snapshot, load_records
+
+
+client = TestClient(app)
+PLAIN = {"Accept-Encoding": "identity"}
+
+
+def test_dataset_routes_return_etag_and_cache_control() -> None:
+    response = client.get("/api/safety/zones")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "public, max-age=600"
+
+
+def test_matching_if_none_match_returns_304() -> None:
+    first = client.get("/api/housing/rentals", params={"furnished": True})
+    etag = first.headers["etag"]
+
+    cached = client.get("/api/housing/rentals", params={"furnished": True}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    stale = client.get("/api/housing/rentals", params={"furnished": True}, headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_etag_depends_on_normalised_params() -> None:
+    base = client.get("/api/housing/rentals?furnished=true&page=1").headers["etag"]
+    reordered = client.get("/api/housing/rentals?page=1&furnished=true&q=").headers["etag"]
+    filtered = client.get("/api/housing/rentals?furnished=false&page=1").headers["etag"]
+    assert base == reordered
+    assert base != filtered
+    assert client.get("/api/housing/rentals?furnished=true&page=1&utm_source=x").headers["etag"] == base
+
+
+def test_undeclared_params_do_not_fill_the_byte_cache() -> None:
+    response_cache.clear()
+    bodies = {client.get("/api/utilities/cities", params={"x": index}).content for index in range(5)}
+    assert len(bodies) == 1
+    assert response_cache.stats()["entries"] == 1
+
+
+def test_etag_matching_rules() -> None:
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches(None, '"b"')
+    assert not etag_matches('"a"', '"b"')
+
+
+def test_low_cardinality_routes_serve_cached_bytes() -> None:
+    response_cache.clear()
+    first = client.get("/api/transport/options", headers=PLAIN)
+    second = client.get("/api/transport/options", headers=PLAIN)
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert first.headers["etag"] == second.headers["etag"]
+    assert [option["id"] for option in first.json()] == [option.id for option in load_records("transport")]
+
+    stats = client.get("/api/utilities/cache").json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["entries"] == 1
+
+
+def test_geojson_is_cached_per_params() -> None:
+    response_cache.clear()
+    client.get("/api/safety/zones.geojson", headers=PLAIN)
+    client.get("/api/safety/zones.geojson", params={"city": "Palermo"}, headers=PLAIN)
+    client.get("/api/safety/zones.geojson", headers=PLAIN)
+    assert response_cache.stats()["entries"] == 2
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_response_cache_evicts_least_recently_used() -> None:
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 10
+
+
+def test_gzip_variant_is_compressed_once_and_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "gzip_min_size", 100)
+    response_cache.clear()
+    plain = client.get("/api/safety/zones.geojson", headers=PLAIN)
+    compressed = client.get("/api/safety/zones.geojson", headers={"Accept-Encoding": "gzip"})
+    again = client.get("/api/safety/zones.geojson", headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.content == plain.content
+    assert compressed.headers["etag"] != plain.headers["etag"]
+    assert again.headers["etag"] == compressed.headers["etag"]
+
+    key = ("/api/safety/zones.geojson", (), (get_snapshot("safety").version,), "gzip")
+    stored = response_cache.get(key)
+    assert stored is not None and gzip.decompress(stored) == plain.content
+
+    not_modified = client.get(
+        "/api/safety/zones.geojson",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+
+
+def test_small_bodies_are_not_compressed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "gzip_min_size", 10_000)
+    response = client.get("/api/utilities/cities", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+    response_cache.clear()
+    for _ in range(3):
+        client.get("/api/utilities/cities", headers={"Accept-Encoding": "gzip"})
+    stats = response_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_accept_encoding_negotiation() -> None:
+    assert accepts_gzip("gzip")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip(None)
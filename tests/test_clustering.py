@@ -0,0 +1,77 @@
+"""Tests for zoom-level marker clustering."""
+from __future__ import annotations
+
+import random
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.clustering import MAX_ZOOM, ClusterIndex
+from app.services.data_loader import load_records
+
+
+client = TestClient(app)
+
+
+def _index(size: int = 2000) -> ClusterIndex:
+    rng = random.Random(7)
+    lats = [38.05 + rng.random() * 0.15 for _ in range(size)]
+    lngs = [13.25 + rng.random() * 0.2 for _ in range(size)]
+    return ClusterIndex(lats, lngs)
+
+
+def test_every_zoom_level_accounts_for_all_points() -> None:
+    index = _index()
+    previous = None
+    for zoom in range(MAX_ZOOM + 2):
+        hits = index.query(zoom)
+        assert sum(hit.count for hit in hits) == index.size
+        if previous is not None:
+            assert len(hits) >= previous
+        previous = len(hits)
+    assert all(hit.count == 1 and hit.row is not None for hit in index.query(MAX_ZOOM + 1))
+    assert len(index.query(0)) == 1
+
+
+def test_cluster_expands_at_its_expansion_zoom() -> None:
+    index = _index()
+    cluster = max(index.query(10), key=lambda hit: hit.count)
+    assert cluster.cluster_id is not None and cluster.expansion_zoom is not None
+    assert cluster.expansion_zoom > 10
+    # At the expansion zoom the cluster is gone and its members appear as smaller markers.
+    deeper = index.query(cluster.expansion_zoom)
+    assert cluster.cluster_id not in {hit.cluster_id for hit in deeper}
+
+
+def test_viewport_query_matches_filtered_full_query() -> None:
+    index = _index()
+    bbox = (13.30, 38.08, 13.36, 38.12)
+    for zoom in (8, 12, 15, 17):
+        inside = {
+            (hit.row, hit.cluster_id)
+            for hit in index.query(zoom)
+            if bbox[0] <= hit.lng <= bbox[2] and bbox[1] <= hit.lat <= bbox[3]
+        }
+        assert {(hit.row, hit.cluster_id) for hit in index.query(zoom, bbox)} == inside
+
+
+def test_cluster_endpoints() -> None:
+    rentals = client.get("/api/housing/clusters", params={"zoom": 20}).json()
+    assert sorted(marker["id"] for marker in rentals) == sorted(rental.id for rental in load_records("rentals"))
+
+    zones = client.get("/api/safety/clusters", params={"zoom": 0}).json()
+    assert len(zones) == 1
+    assert zones[0]["count"] == len(load_records("safety"))
+    assert zones[0]["risk"] == "high"
+    assert zones[0]["expansion_zoom"] > 0
+
+    schools = client.get("/api/schools/clusters", params={"zoom": 14, "bbox": "0,0,1,1"})
+    assert schools.status_code == 200 and schools.json() == []
+    assert client.get("/api/schools/clusters", params={"zoom": 14, "bbox": "1,2"}).status_code == 400
+
+
+def test_map_markers_are_backed_by_datasets() -> None:
+    markers = client.get("/api/safety").json()
+    assert [marker["risk"] for marker in markers] == [zone.risk_level for zone in load_records("safety")]
+    assert len(client.get("/api/housing").json()) == len(load_records("rentals"))
+    assert len(client.get("/api/schools").json()) == len(load_records("schools"))
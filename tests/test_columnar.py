@@ -0,0 +1,86 @@
+"""Tests for the compiled columnar dataset format."""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.models.base import GeoPoint, RentalListing, Venue
+from app.services import data_loader
+from app.services.columnar import ColumnarFormatError, ColumnarTable, compile_records
+from app.services.data_loader import compile_columnar_datasets, get_snapshot, load_records
+
+
+SOURCE_DIR = Path(data_loader.DATA_DIR)
+
+
+@pytest.fixture
+def data_dir(data_dir: Path) -> Path:
+    for name in ("cities", "rentals", "venues"):
+        shutil.copy(SOURCE_DIR / f"{name}.json", data_dir / f"{name}.json")
+    return data_dir
+
+
+class _Place(BaseModel):
+    id: str
+    rating: Optional[float] = None
+    aliases: Optional[List[str]] = None
+    location: Optional[GeoPoint] = None
+
+
+def test_round_trip_preserves_records() -> None:
+    rentals = [RentalListing.parse_obj(item) for item in json.loads((SOURCE_DIR / "rentals.json").read_text())]
+    table = ColumnarTable(compile_records(rentals, RentalListing, {"version": "abc"}))
+
+    assert len(table) == len(rentals)
+    assert table.meta == {"version": "abc"}
+    assert list(table.column("price_eur")) == [rental.price_eur for rental in rentals]
+    assert [RentalListing.parse_obj(table.row(i)) for i in range(len(table))] == rentals
+
+
+def test_nullable_and_nested_columns() -> None:
+    places = [
+        _Place(id="a", rating=4.5, aliases=["x", "y"], location=GeoPoint(lat=1.0, lng=2.0)),
+        _Place(id="b"),
+    ]
+    table = ColumnarTable(compile_records(places, _Place))
+
+    assert table.column_names == ["id", "rating", "aliases", "location", "location.lat", "location.lng"]
+    assert table.value("rating", 1) is None
+    assert table.column("aliases")[0] == ["x", "y"]
+    assert [_Place.parse_obj(table.row(i)) for i in range(len(table))] == places
+
+
+def test_rejects_foreign_files() -> None:
+    with pytest.raises(ColumnarFormatError):
+        ColumnarTable(b"not a columnar file at all")
+
+
+def test_snapshot_serves_compiled_table(data_dir: Path) -> None:
+    json_version = get_snapshot("venues").version
+    data_loader.clear_snapshots()
+
+    compiled = compile_columnar_datasets(data_dir)
+    assert sorted(path.name for path in compiled) == ["rentals.lcol", "venues.lcol"]
+
+    snapshot = get_snapshot("venues")
+    assert snapshot.path.suffix == ".lcol"
+    assert snapshot.version == json_version
+    assert list(load_records("venues")) == [Venue.parse_obj(item) for item in json.loads((data_dir / "venues.json").read_text())]
+
+
+def test_stale_compiled_table_falls_back_to_json(data_dir: Path) -> None:
+    compile_columnar_datasets(data_dir)
+    rentals = json.loads((data_dir / "rentals.json").read_text())
+    rentals[0]["price_eur"] = 1
+    (data_dir / "rentals.json").write_text(json.dumps(rentals))
+    os.utime(data_dir / "rentals.json", ns=(1, 1))
+
+    snapshot = get_snapshot("rentals")
+    assert snapshot.path.suffix == ".json"
+    assert snapshot.records[0].price_eur == 1
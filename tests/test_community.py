@@ -0,0 +1,83 @@
+"""Tests for the community profile index, filters and match ranking."""
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.profile_index import MATCH_WEIGHTS
+
+
+client = TestClient(app)
+INTERESTS = ("Remote Work", "cafes", "schools", "Outdoors", "foodies", "culture", "photography", "sailing")
+LANGUAGES = ("English", "Italian", "Spanish", "German", "Japanese")
+NATIONALITIES = ("USA", "Italy", "Argentina", "Germany", "Japan")
+
+
+@pytest.fixture
+def profiles(data_dir: Path) -> List[Dict[str, object]]:
+    rng = random.Random(9)
+    members = [
+        {
+            "id": f"user-{index:03d}",
+            "name": f"Member {index}",
+            "nationality": rng.choice(NATIONALITIES),
+            "interests": rng.sample(INTERESTS, rng.randint(0, 4)),
+            "has_kids": rng.random() < 0.4,
+            "languages": rng.sample(LANGUAGES, rng.randint(1, 3)),
+            "verified": True,
+        }
+        for index in range(200)
+    ]
+    (data_dir / "profiles.json").write_text(json.dumps(members), encoding="utf-8")
+    return members
+
+
+def _features(member: Dict[str, object]) -> Set[Tuple[str, str]]:
+    features = {("interest", str(value).lower()) for value in member["interests"]}  # type: ignore[union-attr]
+    features |= {("language", str(value).lower()) for value in member["languages"]}  # type: ignore[union-attr]
+    return features | {("nationality", str(member["nationality"]).lower()), ("has_kids", str(member["has_kids"]))}
+
+
+def test_filters_match_a_full_scan(profiles: List[Dict[str, object]]) -> None:
+    response = client.get("/api/community/profiles", params={"interest": "remote work", "has_kids": False})
+    assert response.status_code == 200
+    expected = [
+        member["id"]
+        for member in profiles
+        if "Remote Work" in member["interests"] and not member["has_kids"]  # type: ignore[operator]
+    ]
+    assert [profile["id"] for profile in response.json()] == expected
+    assert client.get("/api/community/profiles", params={"interest": "knitting"}).json() == []
+
+
+def test_matches_rank_by_weighted_overlap(profiles: List[Dict[str, object]]) -> None:
+    for member in profiles[::17]:
+        mine = _features(member)
+        scored = [
+            (sum(MATCH_WEIGHTS[kind] for kind, _ in mine & _features(other)), -index)
+            for index, other in enumerate(profiles)
+            if other is not member
+        ]
+        expected = [(score, f"user-{-negated:03d}") for score, negated in sorted(scored, reverse=True) if score][:8]
+        response = client.get("/api/community/profiles/matches", params={"user_id": member["id"], "limit": 8})
+        assert response.status_code == 200
+        assert [(match["score"], match["profile"]["id"]) for match in response.json()] == expected
+
+
+def test_match_explains_shared_features(profiles: List[Dict[str, object]]) -> None:
+    best = client.get("/api/community/profiles/matches", params={"user_id": "user-000", "limit": 1}).json()[0]
+    other = next(member for member in profiles if member["id"] == best["profile"]["id"])
+    shared = _features(profiles[0]) & _features(other)
+    assert set(best["shared_interests"]) == {value for kind, value in shared if kind == "interest"}
+    assert set(best["shared_languages"]) == {value for kind, value in shared if kind == "language"}
+
+
+def test_unknown_member_is_not_found(profiles: List[Dict[str, object]]) -> None:
+    response = client.get("/api/community/profiles/matches", params={"user_id": "user-999"})
+    assert response.status_code == 404
@@ -0,0 +1,303 @@
+"""Tests for the concierge matching, ranking and answer pipeline."""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import textwrap
+import threading
+import time
+from typing import List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.caching import TTLCache
+from app.main import app
+from app.services import concierge, concierge_pool
+from app.services.data_loader import load_records
+from app.services.search import BM25Index, normalize_query, tokenize, top_k
+from app.services.text_match import AhoCorasick
+
+
+client = TestClient(app)
+
+
+def _linear_scan(query: str) -> Tuple[List[str], List[str]]:
+    """The original per-query scan, kept as the reference for the phrase triggers."""
+
+    query_lower = query.lower()
+    responses: List[str] = []
+    sources: List[str] = []
+    for zone in load_records("safety"):
+        if zone.neighborhood.lower() in query_lower or zone.risk_level in query_lower:
+            responses.append(
+                f"{zone.neighborhood}: Risk {zone.risk_level} — {zone.description} (Trend: {zone.trend})."
+            )
+            sources.append(f"safety:{zone.id}")
+    for school in load_records("schools"):
+        if school.name.lower() in query_lower or any(lang.lower() in query_lower for lang in school.language):
+            responses.append(
+                f"{school.name} ({school.curriculum}, rating {school.rating}/5). {school.application_tips}"
+            )
+            sources.append(f"schools:{school.id}")
+    for venue in load_records("venues"):
+        tags = {tag.lower().replace("-", " ") for tag in venue.tags}
+        if venue.name.lower() in query_lower or any(tag in query_lower for tag in tags):
+            responses.append(f"{venue.name} — {venue.description} (Tags: {', '.join(venue.tags)}).")
+            sources.append(f"venues:{venue.id}")
+    for transport in load_records("transport"):
+        if transport.mode.lower() in query_lower or transport.provider.lower() in query_lower:
+            responses.append(
+                f"{transport.provider} {transport.mode} — {transport.description} (Safety: {transport.safety_notes})."
+            )
+            sources.append(f"transport:{transport.id}")
+    city = load_records("relocation")[0]
+    if any(keyword in query_lower for keyword in ["visa", "health", "emergency", "sim", "internet"]):
+        summary = " ".join(
+            [
+                f"Visa tip: {city.visa_tips}",
+                f"Connectivity: {city.connectivity}",
+                f"Healthcare: {city.healthcare}",
+                f"Emergency contacts: {', '.join(city.emergency_contacts)}",
+            ]
+        )
+        responses.append(textwrap.shorten(summary, width=280, placeholder="…"))
+        sources.append(f"relocation:{city.city}")
+    return responses, sorted(set(sources))
+
+
+def _vocabulary() -> List[str]:
+    words = ["below", "wifi cafe", "SIM card", "is it safe", "montessori", "Train", "a", "family friendly"]
+    words += [zone.neighborhood for zone in load_records("safety")]
+    words += [school.name for school in load_records("schools")] + [venue.name for venue in load_records("venues")]
+    words += [tag for venue in load_records("venues") for tag in venue.tags]
+    words += [option.provider for option in load_records("transport")]
+    return words
+
+
+def test_aho_corasick_matches_substring_semantics() -> None:
+    patterns = ["he", "she", "his", "hers", "", "s"]
+    automaton = AhoCorasick(patterns)
+    for text in ["ushers", "", "xyz", "hishe", "shehers"]:
+        assert {automaton.patterns[index] for index in automaton.search(text)} == {
+            pattern for pattern in patterns if pattern in text
+        }
+
+
+def test_phrase_triggers_match_linear_scan() -> None:
+    index = concierge._get_index()
+    rng = random.Random(3)
+    vocabulary = _vocabulary()
+    queries = [" ".join(rng.sample(vocabulary, rng.randint(1, 4))) for _ in range(200)] + vocabulary
+    for query in queries:
+        normalized = normalize_query(query)
+        matched = index.phrase_matches(normalized)
+        sources = sorted({index.documents[doc_id].source for doc_id in matched})
+        assert sources == _linear_scan(normalized)[1]
+
+
+def test_bm25_prefers_rare_terms_and_shorter_documents() -> None:
+    index = BM25Index(
+        [
+            tokenize("quiet beach with a bakery"),
+            tokenize("beach beach market"),
+            tokenize("market by the harbour with fish stalls and a long list of other words"),
+            tokenize("harbour"),
+        ]
+    )
+    assert [doc for _, doc in index.search("bakery", 5)] == [0]
+    assert [doc for _, doc in index.search("harbour", 5)] == [3, 2]
+    assert [doc for _, doc in index.search("beach", 1)] == [1]
+    assert index.search("the with a", 5) == []
+
+
+def test_top_k_matches_full_sort() -> None:
+    rng = random.Random(5)
+    scores = {doc: float(rng.randint(0, 20)) for doc in range(500)}
+    expected = sorted(((score, doc) for doc, score in scores.items()), key=lambda item: (-item[0], item[1]))
+    for limit in (1, 7, 500, 600):
+        assert top_k(scores, limit) == expected[:limit]
+
+
+def test_answers_are_ranked_and_limited() -> None:
+    sections, scores = concierge._rank_sections("Is Kalsa safe at night?", "en", limit=3)
+    responses = [text for text, _ in sections]
+    assert 1 <= len(responses) <= 3 and len(scores) == len(responses)
+    assert scores == sorted(scores, reverse=True)
+    assert responses[0].startswith("Kalsa")
+    sources = concierge.answer_query("Is Kalsa safe at night?", limit=3).sources
+    assert sources == sorted({source for _, source in sections})
+
+    single = concierge.answer_query("Is Kalsa safe at night?", limit=1)
+    assert single.answer == responses[0]
+
+
+def test_confidence_follows_scores() -> None:
+    assert concierge._calculate_confidence([]) == 0.2
+    weak, strong = concierge._calculate_confidence([0.5]), concierge._calculate_confidence([12.0])
+    assert 0.35 < weak < strong <= 0.95
+
+    fallback = concierge.answer_query("Informazioni generali", "it")
+    assert fallback.sources == ["guide:general"] and fallback.confidence == 0.2
+
+
+def test_index_is_reused_until_datasets_change() -> None:
+    first = concierge._get_index()
+    assert concierge._get_index() is first
+
+
+def test_answers_are_cached_by_normalised_query() -> None:
+    concierge.answer_cache.clear()
+    first = concierge.answer_query("Is Kalsa safe at night?")
+    second = concierge.answer_query("  is KALSA safe, at night ")
+    assert second.query == "  is KALSA safe, at night "
+    assert (second.answer, second.sources, second.confidence) == (first.answer, first.sources, first.confidence)
+    concierge.answer_query("Is Kalsa safe at night?", "it")
+    concierge.answer_query("Is Kalsa safe at night?", limit=1)
+    stats = concierge.answer_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 3)
+
+
+def test_ttl_cache_expires_and_evicts() -> None:
+    now = [0.0]
+    cache: TTLCache[int] = TTLCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    assert cache.get_or_compute("a", lambda: 1) == 1
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    now[0] = 10.0
+    assert cache.get_or_compute("a", lambda: 3) == 3
+    cache.get_or_compute("b", lambda: 4)
+    cache.get_or_compute("c", lambda: 5)
+    assert cache.get_or_compute("a", lambda: 6) == 6
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["evictions"]) == (1, 5, 1, 2)
+
+
+def test_ttl_cache_coalesces_concurrent_misses() -> None:
+    cache: TTLCache[int] = TTLCache(max_entries=8, ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def compute() -> int:
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    results: List[int] = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("q", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [42] * 8 and len(calls) == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_does_not_store_failures() -> None:
+    cache: TTLCache[int] = TTLCache(max_entries=8, ttl=60)
+
+    def fail() -> int:
+        raise RuntimeError("boom")
+
+    try:
+        cache.get_or_compute("q", fail)
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("q", lambda: 7) == 7
+
+
+def _batch(count: int) -> List[dict]:
+    queries = ["Is Kalsa safe at night?", "wifi cafe", "SIM card", "Informazioni generali", "montessori"]
+    return [{"query": queries[i % len(queries)], "lang": "it" if i % 3 == 0 else "en"} for i in range(count)]
+
+
+def test_batch_answers_in_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(concierge_pool.settings, "concierge_pool_workers", 0)
+    items = _batch(12)
+    response = client.post("/api/concierge/ask/batch", json={"items": items})
+    assert response.status_code == 200
+    answers = response.json()
+    assert [answer["query"] for answer in answers] == [item["query"] for item in items]
+    assert answers[0] == concierge.answer_query(items[0]["query"], items[0]["lang"]).dict()
+
+
+def test_batch_is_sharded_across_processes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(concierge_pool.settings, "concierge_pool_workers", 2)
+    monkeypatch.setattr(concierge_pool, "MIN_SHARD_SIZE", 4)
+    items = _batch(20)
+    try:
+        response = client.post("/api/concierge/ask/batch", json={"items": items})
+    finally:
+        concierge_pool.shutdown_pool()
+    assert response.status_code == 200
+    expected = [concierge.answer_query(item["query"], item["lang"]).dict() for item in items]
+    assert response.json() == expected
+
+
+def test_batch_never_builds_the_index_on_the_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(concierge_pool.settings, "concierge_pool_workers", 0)
+    monkeypatch.setattr(concierge, "_concierge_index", None)
+    concierge.answer_cache.clear()
+    build = concierge._ConciergeIndex.__init__
+    on_loop: List[bool] = []
+
+    def tracking_init(self: concierge._ConciergeIndex, versions: Tuple[str, ...]) -> None:
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        build(self, versions)
+
+    monkeypatch.setattr(concierge._ConciergeIndex, "__init__", tracking_init)
+    response = client.post("/api/concierge/ask/batch", json={"items": _batch(3)})
+    assert response.status_code == 200
+    assert on_loop == [False]
+
+
+def test_batch_size_is_limited(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(concierge_pool.settings, "concierge_batch_max_items", 3)
+    response = client.post("/api/concierge/ask/batch", json={"items": _batch(4)})
+    assert response.status_code == 413
+    assert client.post("/api/concierge/ask/batch", json={"items": []}).status_code == 422
+
+
+def _sse_events(body: str) -> List[dict]:
+    return [json.loads(frame[len("data: ") :]) for frame in body.split("\n\n") if frame]
+
+
+def test_stream_ends_with_the_full_answer() -> None:
+    for params in (
+        {"query": "Is Kalsa safe at night?"},
+        {"query": "Kalsa sicura?", "lang": "it", "limit": 2},
+        {"query": "Safety in Politeama", "lang": "de"},
+        {"query": "Informazioni generali", "lang": "it"},
+    ):
+        response = client.get("/api/concierge/ask.sse", params=params)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        *events, final = _sse_events(response.text)
+        assert final.pop("type") == "answer"
+        assert final == client.get("/api/concierge/ask", params=params).json()
+        sections = [event for event in events if event["type"] == "section"]
+        assert [event["index"] for event in sections] == list(range(len(sections)))
+        assert sorted({event["source"] for event in sections}) == final["sources"]
+        notes = [event["text"] for event in events if event["type"] == "note"]
+        assert "\n".join(notes + [event["text"] for event in sections]) == final["answer"]
+
+
+def test_stream_serves_cached_answers_without_ranking(monkeypatch: pytest.MonkeyPatch) -> None:
+    concierge.answer_cache.clear()
+    params = {"query": "Is Kalsa safe at night?", "lang": "it"}
+    expected = _sse_events(client.get("/api/concierge/ask.sse", params=params).text)
+
+    def fail(*args: object) -> None:
+        raise AssertionError("a cached answer was ranked again")
+
+    monkeypatch.setattr(concierge, "_iter_sections", fail)
+    assert _sse_events(client.get("/api/concierge/ask.sse", params=params).text) == expected
+    assert client.get("/api/concierge/ask", params=params).json()["answer"] == expected[-1]["answer"]
+    stats = concierge.answer_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
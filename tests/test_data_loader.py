@@ -0,0 +1,127 @@
+"""Tests for the validated dataset snapshot layer."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.base import Event
+from app.services import data_loader
+from app.services.data_loader import DatasetValidationError, get_snapshot, load_records, refresh_snapshots
+from app.services.dataset_watcher import start_dataset_watcher, stop_dataset_watcher
+
+
+def _write(path: Path, payload: object) -> None:
+    # Bump mtime explicitly so coarse filesystem timestamps still register a change.
+    previous = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    mtime = max(previous + 1_000_000, path.stat().st_mtime_ns)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_records_are_validated_once_and_shared() -> None:
+    first = load_records("events")
+    second = load_records("events")
+    assert first is second
+    assert isinstance(first, tuple)
+    assert all(isinstance(event, Event) for event in first)
+    assert isinstance(first[0].start_time, datetime)
+
+
+def test_shared_records_are_read_only() -> None:
+    rental = load_records("rentals")[0]
+    with pytest.raises(TypeError):
+        rental.price_eur = 1
+    with pytest.raises(TypeError):
+        rental.coordinates.lat = 0.0
+    assert load_records("rentals")[0].price_eur == rental.price_eur
+
+
+def test_snapshot_version_tracks_content(data_dir: Path) -> None:
+    _write(data_dir / "cities.json", ["Palermo"])
+    version = get_snapshot("cities").version
+    assert load_records("cities") == ("Palermo",)
+
+    _write(data_dir / "cities.json", ["Palermo", "Lisbon"])
+    data_loader.clear_snapshots()
+    assert get_snapshot("cities").version != version
+
+
+def test_derived_structures_are_built_once(data_dir: Path) -> None:
+    _write(data_dir / "cities.json", ["Palermo", "Lisbon"])
+    calls = []
+
+    def build(snapshot: data_loader.DatasetSnapshot) -> frozenset:
+        calls.append(snapshot.version)
+        return frozenset(snapshot.records)
+
+    snapshot = get_snapshot("cities")
+    assert snapshot.derive("names", build) == {"Palermo", "Lisbon"}
+    assert snapshot.derive("names", build) == {"Palermo", "Lisbon"}
+    assert len(calls) == 1
+
+
+def test_invalid_records_raise_validation_error(data_dir: Path) -> None:
+    _write(data_dir / "alerts.json", [{"id": "alert-1", "category": "safety"}])
+    with pytest.raises(DatasetValidationError) as excinfo:
+        load_records("alerts")
+    assert excinfo.value.dataset == "alerts"
+
+
+def test_refresh_swaps_changed_datasets_and_keeps_old_snapshot(data_dir: Path) -> None:
+    _write(data_dir / "cities.json", ["Palermo"])
+    before = get_snapshot("cities")
+    in_flight = load_records("cities")
+
+    assert refresh_snapshots() == []
+    _write(data_dir / "cities.json", ["Palermo", "Lisbon"])
+    assert refresh_snapshots() == [before]
+
+    after = get_snapshot("cities")
+    assert after.version != before.version
+    assert after.records == ("Palermo", "Lisbon")
+    assert in_flight == ("Palermo",)
+
+
+def test_refresh_keeps_previous_version_when_file_is_invalid(data_dir: Path) -> None:
+    _write(data_dir / "cities.json", ["Palermo"])
+    before = get_snapshot("cities")
+    (data_dir / "cities.json").write_text("[not json", encoding="utf-8")
+    os.utime(data_dir / "cities.json", ns=(before.signature[0] + 1_000_000,) * 2)
+
+    assert refresh_snapshots() == []
+    assert get_snapshot("cities") is before
+
+
+def test_watcher_reloads_in_background(data_dir: Path) -> None:
+    _write(data_dir / "cities.json", ["Palermo"])
+    get_snapshot("cities")
+
+    async def scenario() -> tuple:
+        task = start_dataset_watcher(0.01)
+        _write(data_dir / "cities.json", ["Palermo", "Bali"])
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if len(load_records("cities")) == 2:
+                break
+        await stop_dataset_watcher(task)
+        return load_records("cities")
+
+    assert asyncio.run(scenario()) == ("Palermo", "Bali")
+
+
+def test_dataset_versions_endpoint() -> None:
+    client = TestClient(app)
+    client.get("/api/utilities/cities")
+    response = client.get("/api/utilities/datasets")
+    assert response.status_code == 200
+    loaded = {entry["dataset"]: entry for entry in response.json()}
+    assert loaded["cities"]["version"] == get_snapshot("cities").version
+    assert loaded["cities"]["records"] == len(load_records("cities"))
@@ -0,0 +1,61 @@
+"""Tests for hashed embeddings, the vector index and semantic concierge modes."""
+from __future__ import annotations
+
+import math
+import random
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import concierge
+from app.services.embeddings import DIMENSIONS, VectorIndex, embed
+from app.services.search import tokenize
+
+
+client = TestClient(app)
+
+
+def test_embeddings_are_unit_length_and_stable() -> None:
+    vector = embed(tokenize("Quiet coworking cafe with strong Wi-Fi"))
+    assert math.isclose(math.sqrt(sum(value * value for value in vector.values())), 1.0, rel_tol=1e-9)
+    assert all(0 <= dimension < DIMENSIONS for dimension in vector)
+    assert embed(tokenize("quiet coworking cafe with strong wi fi")) == vector
+    assert embed([]) == {}
+
+
+def test_vector_index_matches_dense_cosine() -> None:
+    rng = random.Random(4)
+    words = ["cafe", "wifi", "school", "beach", "market", "night", "family", "museum", "coworking", "garden"]
+    vectors = [embed(rng.sample(words, 4)) for _ in range(50)]
+    index = VectorIndex(vectors)
+    query = embed(["coworking", "cafe"])
+    expected = {
+        doc_id: sum(value * vector.get(dimension, 0.0) for dimension, value in query.items())
+        for doc_id, vector in enumerate(vectors)
+    }
+    similarities = index.similarities(query, minimum=-1.0)
+    assert similarities.keys() == expected.keys()
+    assert all(math.isclose(similarities[doc], expected[doc], abs_tol=1e-5) for doc in expected)
+    assert [doc for _, doc in index.search(query, 3)] == sorted(expected, key=lambda doc: (-expected[doc], doc))[:3]
+
+
+def test_semantic_mode_finds_paraphrases() -> None:
+    for mode in ("semantic", "hybrid"):
+        answer = concierge.answer_query("where can I work on my laptop", mode=mode)
+        assert set(answer.sources) == {"venues:venue-001", "venues:venue-004"}
+    assert concierge.answer_query("zebra xylophone", mode="semantic").sources == ["guide:general"]
+
+
+def test_mode_is_selectable_per_request() -> None:
+    params = {"query": "coworking space", "mode": "semantic"}
+    response = client.get("/api/concierge/ask", params=params)
+    assert response.status_code == 200
+    assert response.json()["sources"] == ["venues:venue-004"]
+    assert client.get("/api/concierge/ask", params={"query": "wifi", "mode": "vector"}).status_code == 422
+
+    batch = client.post(
+        "/api/concierge/ask/batch",
+        json={"items": [{"query": "coworking space", "mode": "hybrid"}, {"query": "coworking space"}]},
+    )
+    assert batch.status_code == 200
+    assert [answer["sources"] for answer in batch.json()] == [["venues:venue-004"]] * 2
@@ -0,0 +1,186 @@
+"""Tests for the events timeline index and the windowed, paginated events route."""
+from __future__ import annotations
+
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import data_loader
+from app.services.event_index import Timeline
+from app.services.exports import _ics_line, _ics_text
+
+
+client = TestClient(app)
+CATEGORIES = ("festival", "concert", "exhibition", "theatre")
+
+
+@pytest.fixture
+def events(data_dir: Path) -> List[Dict[str, object]]:
+    rng = random.Random(5)
+    base = datetime(2024, 6, 1)
+    calendar = []
+    for index in range(300):
+        start = base + timedelta(minutes=30 * rng.randint(0, 60 * 48))
+        calendar.append(
+            {
+                "id": f"event-{index:03d}",
+                "name": f"Event {index}",
+                "category": rng.choice(CATEGORIES),
+                "venue": "Teatro Massimo",
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=rng.choice((1, 3, 30, 200)))).isoformat(),
+                "summary": "Test event.",
+                "ticket_url": None,
+            }
+        )
+    (data_dir / "events.json").write_text(json.dumps(calendar), encoding="utf-8")
+    (data_dir / "cities.json").write_text(json.dumps(["Palermo", "Lisbon"]), encoding="utf-8")
+    return calendar
+
+
+def _expected(
+    calendar: List[Dict[str, object]], start: Optional[str], end: Optional[str], category: Optional[str] = None
+) -> List[str]:
+    selected = [
+        event
+        for event in calendar
+        if (start is None or str(event["end_time"]) > start)
+        and (end is None or str(event["start_time"]) < end)
+        and (category is None or event["category"] == category)
+    ]
+    return [str(event["id"]) for event in sorted(selected, key=lambda event: (event["start_time"], event["id"]))]
+
+
+def _walk(params: Dict[str, object]) -> List[str]:
+    ids: List[str] = []
+    params = {**params, "page_size": 37}
+    while True:
+        response = client.get("/api/culture/events", params=params)
+        assert response.status_code == 200
+        ids.extend(event["id"] for event in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+        params["cursor"] = cursor
+
+
+def test_timeline_matches_linear_scan() -> None:
+    rng = random.Random(3)
+    starts = [rng.randint(0, 1000) for _ in range(200)]
+    ends = [start + rng.choice((1, 5, 50, 400)) for start in starts]
+    timeline = Timeline(range(200), starts, ends, [f"{row:03d}" for row in range(200)])
+    for _ in range(100):
+        low = rng.randint(-50, 1100)
+        high = low + rng.randint(0, 200)
+        after = rng.randint(0, 40)
+        expected = [
+            position
+            for position in range(after, 200)
+            if timeline.starts[position] < high and timeline.ends[position] > low
+        ]
+        assert list(timeline.overlapping(low, high, after)) == expected
+    assert list(timeline.overlapping()) == list(range(200))
+
+
+def test_windows_return_overlapping_events(events: List[Dict[str, object]]) -> None:
+    weekend = {"from": "2024-06-15T00:00:00", "to": "2024-06-17T00:00:00"}
+    assert _walk(weekend) == _expected(events, weekend["from"], weekend["to"])
+    assert _walk({**weekend, "category": "Concert"}) == _expected(events, weekend["from"], weekend["to"], "concert")
+    assert _walk({"from": "2024-06-30T12:00:00"}) == _expected(events, "2024-06-30T12:00:00", None)
+    assert _walk({}) == _expected(events, None, None)
+    assert _walk({"category": "opera"}) == []
+
+
+def test_plain_dates_mean_local_midnight(events: List[Dict[str, object]]) -> None:
+    midnight = _walk({"from": "2024-06-15T00:00:00", "to": "2024-06-17T00:00:00"})
+    assert _walk({"from": "2024-06-15", "to": "2024-06-17"}) == midnight
+    assert client.get("/api/culture/events", params={"from": "2024-06-31"}).status_code == 422
+
+
+def test_unfiltered_listing_returns_the_whole_calendar(events: List[Dict[str, object]]) -> None:
+    response = client.get("/api/culture/events")
+    assert [event["id"] for event in response.json()] == _expected(events, None, None)
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/culture/events", params={"category": "concert"})
+    assert [event["id"] for event in response.json()] == _expected(events, None, None, "concert")[:50]
+    assert "X-Next-Cursor" in response.headers
+
+
+def test_offset_windows_use_city_time(events: List[Dict[str, object]]) -> None:
+    # Palermo is UTC+2 in June.
+    local = _walk({"from": "2024-06-10T10:00:00", "to": "2024-06-10T20:00:00"})
+    assert _walk({"from": "2024-06-10T08:00:00Z", "to": "2024-06-10T18:00:00Z"}) == local
+
+
+def test_first_page_and_bad_cursor(events: List[Dict[str, object]]) -> None:
+    response = client.get("/api/culture/events", params={"page_size": 10})
+    assert [event["id"] for event in response.json()] == _expected(events, None, None)[:10]
+    assert "X-Next-Cursor" in response.headers
+
+    response = client.get("/api/culture/events", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_ndjson_export_resumes_after_an_id(events: List[Dict[str, object]]) -> None:
+    response = client.get("/api/culture/events/export.ndjson", params={"category": "festival"})
+    assert response.status_code == 200
+    ids = [json.loads(line)["id"] for line in response.text.splitlines()]
+    assert ids == _expected(events, None, None, "festival")
+
+    resumed = client.get("/api/culture/events/export.ndjson", params={"category": "festival", "after": ids[9]})
+    assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == ids[10:]
+    assert client.get("/api/culture/events/export.ndjson", params={"after": "event-999"}).status_code == 400
+
+
+def test_ics_feed(events: List[Dict[str, object]]) -> None:
+    window = {"from": "2024-06-15T00:00:00", "to": "2024-06-17T00:00:00"}
+    response = client.get("/api/culture/events.ics", params=window)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    body = response.text
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    uids = [line[4:].split("@")[0] for line in body.split("\r\n") if line.startswith("UID:")]
+    assert uids == _expected(events, window["from"], window["to"])
+    assert all(len(line.encode("utf-8")) <= 75 for line in body.split("\r\n"))
+    first = next(event for event in events if event["id"] == uids[0])
+    # Palermo is UTC+2 in June; feeds carry UTC times.
+    start = datetime.fromisoformat(str(first["start_time"])) - timedelta(hours=2)
+    assert f"DTSTART:{start:%Y%m%dT%H%M%S}Z" in body
+
+
+def test_ics_feed_is_stable_under_one_etag(events: List[Dict[str, object]]) -> None:
+    first = client.get("/api/culture/events.ics", params={"category": "theatre"})
+    data_loader.clear_snapshots()
+    second = client.get("/api/culture/events.ics", params={"category": "theatre"})
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.content == second.content
+
+
+def _first_start(city: Optional[str]) -> str:
+    params = {"category": "concert", **({"city": city} if city else {})}
+    body = client.get("/api/culture/events.ics", params=params).text
+    return next(line for line in body.split("\r\n") if line.startswith("DTSTART:"))
+
+
+def test_cities_sharing_a_file_keep_their_own_zone(events: List[Dict[str, object]]) -> None:
+    first = next(event for event in _expected(events, None, None, "concert"))
+    start = datetime.fromisoformat(str(next(e for e in events if e["id"] == first)["start_time"]))
+    # Palermo is UTC+2 and Lisbon UTC+1 in June; both read the top-level events.json.
+    palermo, lisbon = (f"DTSTART:{start - timedelta(hours=hours):%Y%m%dT%H%M%S}Z" for hours in (2, 1))
+    assert (_first_start("Lisbon"), _first_start(None)) == (lisbon, palermo)
+    data_loader.clear_snapshots()
+    assert (_first_start(None), _first_start("Lisbon")) == (palermo, lisbon)
+
+
+def test_ics_escapes_and_folds_text() -> None:
+    assert _ics_text("Jazz, wine; more\\") == "Jazz\\, wine\\; more\\\\"
+    folded = _ics_line("DESCRIPTION", "è" * 100)
+    assert all(len(line.encode("utf-8")) <= 75 for line in folded.rstrip("\r\n").split("\r\n"))
+    assert folded.replace("\r\n ", "").rstrip("\r\n") == "DESCRIPTION:" + "è" * 100
@@ -0,0 +1,71 @@
+"""Tests for trigram-backed typo-tolerant term lookup."""
+from __future__ import annotations
+
+import random
+from typing import List
+
+from app.services import concierge
+from app.services.fuzzy import TrigramIndex, levenshtein_within, max_edits
+
+
+def _levenshtein(left: str, right: str) -> int:
+    previous = list(range(len(right) + 1))
+    for row, char in enumerate(left, 1):
+        current = [row]
+        for column, other in enumerate(right, 1):
+            current.append(min(previous[column - 1] + (char != other), previous[column] + 1, current[column - 1] + 1))
+        previous = current
+    return previous[-1]
+
+
+def _mutate(rng: random.Random, word: str, edits: int) -> str:
+    chars: List[str] = list(word)
+    for _ in range(edits):
+        position = rng.randrange(len(chars) + 1)
+        operation = rng.randrange(3)
+        if operation == 0:
+            chars.insert(position, rng.choice("abcdefgh"))
+        elif position < len(chars):
+            if operation == 1:
+                chars[position] = rng.choice("abcdefgh")
+            else:
+                del chars[position]
+    return "".join(chars)
+
+
+def test_bounded_levenshtein_matches_full_distance() -> None:
+    rng = random.Random(1)
+    for _ in range(3000):
+        left = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+        right = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+        limit = rng.randint(0, 3)
+        distance = _levenshtein(left, right)
+        assert levenshtein_within(left, right, limit) == (distance if distance <= limit else None)
+
+
+def test_correct_finds_the_closest_term_within_bound() -> None:
+    rng = random.Random(2)
+    words = sorted({"".join(rng.choice("abcdefgh") for _ in range(rng.randint(3, 11))) for _ in range(300)})
+    index = TrigramIndex(words)
+    for _ in range(300):
+        query = _mutate(rng, rng.choice(words), rng.randint(0, 2))
+        distance, closest = min((_levenshtein(query, word), word) for word in words)
+        expected = closest if distance == 0 or distance <= max_edits(query) else None
+        corrected = index.correct(query)
+        assert (corrected is None) == (expected is None)
+        if corrected is not None:
+            assert _levenshtein(query, corrected) == distance
+
+
+def test_ties_prefer_heavier_terms() -> None:
+    index = TrigramIndex(["palermo", "palerme"], weights=[1, 5])
+    assert index.correct("palermx") == "palerme"
+    assert index.correct("pal") is None
+
+
+def test_concierge_tolerates_typos() -> None:
+    for typo, exact in (("Is Kalza safe?", "Is Kalsa safe?"), ("montesori", "montessori")):
+        answer = concierge.answer_query(typo)
+        assert answer.sources == concierge.answer_query(exact).sources
+        assert answer.sources != ["guide:general"]
+    assert concierge.answer_query("Informazioni generali", "it").sources == ["guide:general"]
@@ -0,0 +1,89 @@
+"""Tests for the spatial index and the bbox/near filters on list endpoints."""
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.data_loader import get_snapshot, load_records
+from app.services.geo import GeoFilter, GeoIndex, InvalidGeoQueryError, haversine_m
+
+
+client = TestClient(app)
+QUATTRO_CANTI = "38.1157,13.3615"
+
+
+def test_haversine_matches_known_distance() -> None:
+    # Palermo to Catania is roughly 166 km as the crow flies.
+    assert haversine_m(38.1157, 13.3615, 37.5079, 15.0830) == pytest.approx(166_000, rel=0.02)
+    assert haversine_m(38.1, 13.3, 38.1, 13.3) == 0
+
+
+def test_grid_search_matches_brute_force() -> None:
+    points = [(row, 38.0 + (row % 17) * 0.007, 13.2 + (row // 17) * 0.009) for row in range(300)]
+    index = GeoIndex(points)
+    geo = GeoFilter(bbox=(13.25, 38.03, 13.31, 38.09))
+    expected = [row for row, lat, lng in points if 38.03 <= lat <= 38.09 and 13.25 <= lng <= 13.31]
+    assert index.search(geo) == expected
+
+    near = GeoFilter(near=(38.05, 13.3), radius=2_000)
+    ranked = index.search(near)
+    distances = [haversine_m(38.05, 13.3, points[row][1], points[row][2]) for row in ranked]
+    assert distances == sorted(distances)
+    assert sorted(ranked) == [row for row, lat, lng in points if haversine_m(38.05, 13.3, lat, lng) <= 2_000]
+
+
+def test_bbox_across_the_antimeridian() -> None:
+    index = GeoIndex([(0, 0.0, 179.5), (1, 0.0, -179.5), (2, 0.0, 0.0)])
+    assert index.search(GeoFilter(bbox=(179.0, -1.0, -179.0, 1.0))) == [0, 1]
+
+
+def test_rentals_near_are_sorted_by_distance() -> None:
+    response = client.get("/api/housing/rentals", params={"near": QUATTRO_CANTI})
+    assert response.status_code == 200
+    origin = (38.1157, 13.3615)
+    distances = [haversine_m(*origin, r["coordinates"]["lat"], r["coordinates"]["lng"]) for r in response.json()]
+    assert distances == sorted(distances)
+    assert len(distances) == len(load_records("rentals"))
+
+
+def test_viewport_filters_venues_markets_and_schools() -> None:
+    bbox = "13.35,38.11,13.365,38.125"
+    venues = client.get("/api/lifestyle/venues", params={"bbox": bbox}).json()
+    assert venues and all(13.35 <= v["coordinates"]["lng"] <= 13.365 for v in venues)
+    assert len(venues) < len(load_records("venues"))
+
+    markets = client.get("/api/shopping/markets", params={"near": QUATTRO_CANTI, "radius": 5_000}).json()
+    assert {market["id"] for market in markets} == {
+        market.id
+        for market in load_records("markets")
+        if haversine_m(38.1157, 13.3615, market.coordinates.lat, market.coordinates.lng) <= 5_000
+    }
+
+    schools = client.get("/api/schools/directory", params={"bbox": "13.34,38.12,13.36,38.125"}).json()
+    assert [school["id"] for school in schools] == ["school-001", "school-002"]
+
+
+def test_cached_routes_bypass_byte_cache_for_viewports() -> None:
+    everything = client.get("/api/culture/venues", headers={"Accept-Encoding": "identity"}).json()
+    nearby = client.get("/api/culture/venues", params={"near": QUATTRO_CANTI, "radius": 1_000}).json()
+    assert len(nearby) < len(everything)
+    assert client.get("/api/shopping/essentials", params={"bbox": "0,0,1,1"}).json() == []
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"bbox": "1,2,3"}, {"bbox": "0,10,1,5"}, {"near": "95,0"}, {"near": "a,b"}, {"radius": 100}],
+)
+def test_invalid_geo_parameters_are_rejected(params: dict) -> None:
+    response = client.get("/api/lifestyle/venues", params=params)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "invalid_geo_query"
+    with pytest.raises(InvalidGeoQueryError):
+        GeoFilter.parse(params.get("bbox"), params.get("near"), params.get("radius"))
+
+
+def test_geo_index_is_derived_once_per_snapshot() -> None:
+    snapshot = get_snapshot("venues")
+    assert GeoIndex.for_snapshot(snapshot) is GeoIndex.for_snapshot(snapshot)
+    assert len(GeoIndex.for_snapshot(snapshot)) == len(snapshot.records)
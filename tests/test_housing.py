@@ -0,0 +1,153 @@
+"""Tests for indexed rental filtering and cursor pagination."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import bitmap, data_loader
+from app.services.data_loader import get_snapshot
+from app.services.geo import GeoFilter, GeoIndex
+from app.services.rental_index import RentalIndex
+
+
+client = TestClient(app)
+NEIGHBORHOODS = ("Kalsa", "Politeama", "Mondello", "Ballarò")
+
+
+@pytest.fixture
+def rentals(data_dir: Path) -> List[Dict[str, object]]:
+    catalogue = [
+        {
+            "id": f"rent-{index:03d}",
+            "title": f"{index % 4 + 1}BR flat {'with sea view' if index % 7 == 0 else 'near the market'}",
+            "price_eur": 500 + index,
+            "bedrooms": index % 4 + 1,
+            "furnished": index % 2 == 0,
+            "kid_friendly": index % 3 == 0,
+            "pet_friendly": index % 5 == 0,
+            "neighborhood": NEIGHBORHOODS[index % 4],
+            "verified": True,
+            "coordinates": {"lat": 38.1 + (index % 10) * 0.002, "lng": 13.3 + (index // 10) * 0.002},
+            "contact": f"agent{index}@example.com",
+        }
+        for index in range(60)
+    ]
+    (data_dir / "rentals.json").write_text(json.dumps(catalogue), encoding="utf-8")
+    (data_dir / "cities.json").write_text(json.dumps(["Palermo"]), encoding="utf-8")
+    return catalogue
+
+
+def _ids(response) -> List[str]:
+    assert response.status_code == 200
+    return [rental["id"] for rental in response.json()]
+
+
+def test_bitmap_helpers() -> None:
+    rows = bitmap.from_positions([0, 9, 64, 65], 70)
+    assert list(bitmap.iter_bits(rows)) == [0, 9, 64, 65]
+    assert list(bitmap.iter_bits(rows, start=10)) == [64, 65]
+    assert bitmap.count(rows) == 4
+    assert bitmap.from_flags([1, 0, 1]) == 0b101
+    assert bitmap.full(3) == 0b111
+    assert list(bitmap.select(rows, [65, 3, 9, 200, 0])) == [65, 9, 0]
+
+
+def test_filters_match_a_full_scan(rentals: List[Dict[str, object]]) -> None:
+    params = {"furnished": False, "pet_friendly": True, "q": "SEA", "page_size": 100}
+    expected = [
+        rental["id"]
+        for rental in rentals
+        if not rental["furnished"] and rental["pet_friendly"] and "sea" in str(rental["title"]).lower()
+    ]
+    assert expected
+    assert _ids(client.get("/api/housing/rentals", params=params)) == expected
+
+    kalsa = _ids(client.get("/api/housing/rentals", params={"neighborhood": "kalsa", "page_size": 100}))
+    assert kalsa == [rental["id"] for rental in rentals if rental["neighborhood"] == "Kalsa"]
+
+    # Queries shorter than a trigram still use plain substring matching.
+    short = _ids(client.get("/api/housing/rentals", params={"q": "ò", "page_size": 100}))
+    assert short == [rental["id"] for rental in rentals if rental["neighborhood"] == "Ballarò"]
+
+
+def test_cursor_pages_cover_every_match_once(rentals: List[Dict[str, object]]) -> None:
+    seen: List[str] = []
+    cursor = None
+    while True:
+        params = {"kid_friendly": True, "page_size": 7, "include_total": True}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/housing/rentals", params=params)
+        seen.extend(_ids(response))
+        assert response.headers["x-total-count"] == "20"
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert seen == [rental["id"] for rental in rentals if rental["kid_friendly"]]
+
+    by_page = _ids(client.get("/api/housing/rentals", params={"kid_friendly": True, "page": 2, "page_size": 7}))
+    assert by_page == seen[7:14]
+
+
+def test_cursor_pages_follow_distance_order(rentals: List[Dict[str, object]]) -> None:
+    params = {"near": "38.1,13.306", "radius": 1_000, "furnished": True, "page_size": 4}
+    first = client.get("/api/housing/rentals", params=params)
+    second = client.get("/api/housing/rentals", params={**params, "cursor": first.headers["x-next-cursor"]})
+    everything = _ids(client.get("/api/housing/rentals", params={**params, "page_size": 100}))
+    assert _ids(first) + _ids(second) == everything[:8]
+    assert everything[0] == "rent-030"
+
+    # Without a radius the whole catalogue is ranked; pages still cover it exactly once, nearest first.
+    walk = {"near": "38.11,13.31", "page_size": 7}
+    seen: List[str] = []
+    while True:
+        response = client.get("/api/housing/rentals", params=walk)
+        seen.extend(_ids(response))
+        if "x-next-cursor" not in response.headers:
+            break
+        walk["cursor"] = response.headers["x-next-cursor"]
+    assert seen == _ids(client.get("/api/housing/rentals", params={"near": "38.11,13.31", "page_size": 100}))
+    assert len(seen) == len(rentals)
+
+
+def test_nearest_resumes_after_a_keyset(rentals: List[Dict[str, object]]) -> None:
+    index = GeoIndex.for_snapshot(get_snapshot("rentals"))
+    geo = GeoFilter(near=(38.11, 13.31))
+    pairs = list(index.nearest(geo))
+    assert [row for _, row in pairs] == index.search(geo)
+    assert list(index.nearest(geo, after=pairs[9])) == pairs[10:]
+
+
+def test_invalid_cursor_is_rejected(rentals: List[Dict[str, object]]) -> None:
+    for cursor in ("not-a-cursor", "WyJyZW50LTk5OSJd"):  # garbage, then ["rent-999"]
+        response = client.get("/api/housing/rentals", params={"cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "invalid_cursor"
+
+
+def test_index_is_built_once_per_version(rentals: List[Dict[str, object]]) -> None:
+    snapshot = get_snapshot("rentals")
+    index = RentalIndex.for_snapshot(snapshot)
+    assert RentalIndex.for_snapshot(snapshot) is index
+    assert bitmap.count(index.flag("furnished", True)) == 30
+    assert index.neighborhood("Atlantis") == 0
+
+
+def test_export_streams_ndjson_and_resumes(rentals: List[Dict[str, object]]) -> None:
+    response = client.get("/api/housing/rentals/export.ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [rental["id"] for rental in rentals]
+    assert lines[3]["contact"] == "agent3@example.com"
+
+    resumed = client.get("/api/housing/rentals/export.ndjson", params={"after": "rent-041"})
+    assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == [r["id"] for r in rentals[42:]]
+    assert client.get("/api/housing/rentals/export.ndjson", params={"after": "rent-999"}).status_code == 400
+    cached = client.get("/api/housing/rentals/export.ndjson", headers={"If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
@@ -0,0 +1,83 @@
+"""Tests for venue tag bitmaps and tag expressions."""
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Set
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+client = TestClient(app)
+TAGS = ("wifi", "Wi-Fi", "remote-friendly", "late-night", "vegetarian options", "family-friendly", "dessert", "Local")
+
+
+@pytest.fixture
+def venues(data_dir: Path) -> List[Dict[str, object]]:
+    rng = random.Random(11)
+    catalogue = [
+        {
+            "id": f"venue-{index:03d}",
+            "name": f"Venue {index}",
+            "type": ("cafe", "bar", "restaurant")[index % 3],
+            "tags": rng.sample(TAGS, rng.randint(0, 4)),
+            "description": "Test venue.",
+            "neighborhood": "Kalsa",
+            "coordinates": {"lat": 38.11 + index * 0.0005, "lng": 13.36},
+        }
+        for index in range(80)
+    ]
+    (data_dir / "venues.json").write_text(json.dumps(catalogue), encoding="utf-8")
+    (data_dir / "cities.json").write_text(json.dumps(["Palermo"]), encoding="utf-8")
+    return catalogue
+
+
+def _tags(venue: Dict[str, object]) -> Set[str]:
+    synonyms = {"wi fi": "wifi", "remote friendly": "remote work friendly", "vegetarian options": "vegetarian friendly"}
+    normalised = {str(tag).lower().replace("-", " ") for tag in venue["tags"]}  # type: ignore[union-attr]
+    return {synonyms.get(tag, tag) for tag in normalised}
+
+
+def _ids(response) -> List[str]:
+    assert response.status_code == 200
+    return [venue["id"] for venue in response.json()]
+
+
+def test_flags_resolve_synonyms(venues: List[Dict[str, object]]) -> None:
+    response = client.get("/api/lifestyle/venues", params={"has_wifi": True, "remote_work_friendly": False})
+    expected = [v["id"] for v in venues if "wifi" in _tags(v) and "remote work friendly" not in _tags(v)]
+    assert _ids(response) == expected
+
+
+def test_tag_expressions(venues: List[Dict[str, object]]) -> None:
+    cases = {
+        "wi-fi": lambda tags: "wifi" in tags,
+        "late-night,!dessert": lambda tags: "late night" in tags and "dessert" not in tags,
+        "dessert|LOCAL,remote-friendly|!wifi": lambda tags: ("dessert" in tags or "local" in tags)
+        and ("remote work friendly" in tags or "wifi" not in tags),
+        "vegetarian friendly, family friendly": lambda tags: {"vegetarian friendly", "family friendly"} <= tags,
+        "no-such-tag": lambda tags: False,
+        "!no-such-tag": lambda tags: True,
+    }
+    for expression, predicate in cases.items():
+        response = client.get("/api/lifestyle/venues", params={"tags": expression, "venue_type": "Cafe"})
+        expected = [v["id"] for v in venues if v["type"] == "cafe" and predicate(_tags(v))]
+        assert _ids(response) == expected, expression
+
+
+def test_tag_expression_keeps_distance_order(venues: List[Dict[str, object]]) -> None:
+    response = client.get("/api/lifestyle/venues", params={"tags": "dessert", "near": "38.16,13.36", "radius": 10000})
+    ids = _ids(response)
+    expected = [v["id"] for v in venues if "dessert" in _tags(v)]
+    assert sorted(ids) == expected and ids == sorted(ids, reverse=True)
+
+
+def test_malformed_tag_expression(venues: List[Dict[str, object]]) -> None:
+    for expression in ("wifi,,dessert", "wifi|!", " | "):
+        response = client.get("/api/lifestyle/venues", params={"tags": expression})
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "invalid_tag_query"
@@ -0,0 +1,108 @@
+"""Tests for compiled opening schedules and the markets open_at/open_now filters."""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import shopping
+from app.main import app
+from app.services import bitmap
+from app.services.schedules import (
+    DEFAULT_TIMEZONE,
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    ScheduleIndex,
+    city_timezone,
+    parse_schedule,
+)
+
+
+client = TestClient(app)
+MON, TUE, SAT, SUN = (day * MINUTES_PER_DAY for day in (0, 1, 5, 6))
+
+
+def test_parse_schedule_formats() -> None:
+    assert parse_schedule("Mon-Sat 08:00-18:00") == [(day + 480, day + 1080) for day in range(0, SUN, MINUTES_PER_DAY)]
+    thursday = 3 * MINUTES_PER_DAY
+    assert parse_schedule("Pickup Tue & Thu") == [(TUE, TUE + MINUTES_PER_DAY), (thursday, thursday + MINUTES_PER_DAY)]
+    assert parse_schedule("Sun 18:00-02:00") == [(0, 120), (SUN + 1080, MINUTES_PER_WEEK)]
+    assert parse_schedule("Sat - Mon 10-12; Wed 24h")[0] == (MON + 600, MON + 720)
+    assert len(parse_schedule("Weekdays 08:00-13:00, 16:00-19:30") or []) == 10
+    assert parse_schedule("Daily 09:00-20:00") == parse_schedule("09:00-20:00")
+    assert parse_schedule("By appointment") is None
+    assert parse_schedule("Mon 25:00-26:00") is None
+
+
+def test_closures_and_unreadable_times_are_never_open() -> None:
+    assert parse_schedule("Closed Sunday") is None
+    assert parse_schedule("Daily 10:00-22:00; closed Mon") == [
+        (day + 600, day + 1320) for day in range(TUE, MINUTES_PER_WEEK, MINUTES_PER_DAY)
+    ]
+    assert parse_schedule("Mon-Sat 8am-6pm") is None
+    assert parse_schedule("Mon-Fri 09:00-17:00; Sat from 9") is None
+    assert parse_schedule("24/7") == [(0, MINUTES_PER_WEEK)]
+
+
+def test_index_matches_interval_scan() -> None:
+    rng = random.Random(8)
+    days = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+    schedules = []
+    for _ in range(60):
+        first, last = rng.sample(days, 2)
+        start, end = rng.randrange(24), rng.randrange(24)
+        schedules.append(parse_schedule(f"{first}-{last} {start:02d}:30-{end:02d}:00"))
+    schedules.append(None)
+    index = ScheduleIndex(schedules)
+    for minute in [rng.randrange(MINUTES_PER_WEEK) for _ in range(500)] + [0, MINUTES_PER_WEEK - 1]:
+        expected = {
+            row for row, spans in enumerate(schedules) if spans and any(start <= minute < end for start, end in spans)
+        }
+        assert set(bitmap.iter_bits(index.open_at(minute))) == expected
+        assert set(bitmap.iter_bits(index.closed_at(minute))) == set(range(60)) - expected
+
+
+def _ids(response) -> list:
+    assert response.status_code == 200
+    return [market["id"] for market in response.json()]
+
+
+def test_markets_open_at() -> None:
+    assert _ids(client.get("/api/shopping/markets", params={"open_at": "2024-06-03T10:00"})) == [
+        "market-001",
+        "market-002",
+    ]
+    # 17:30 UTC is 19:30 in Palermo (CEST).
+    assert _ids(client.get("/api/shopping/markets", params={"open_at": "2024-06-04T17:30:00Z"})) == [
+        "market-002",
+        "market-003",
+    ]
+    assert _ids(client.get("/api/shopping/markets", params={"open_at": "2024-06-09T21:00"})) == []
+    response = client.get("/api/shopping/markets", params={"open_at": "2024-06-03T10:00", "open_now": True})
+    assert response.status_code == 400
+
+
+def test_markets_open_now_revalidates_per_slot(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(shopping, "now_utc", lambda: datetime(2024, 6, 3, 8, 0, tzinfo=timezone.utc))
+    first = client.get("/api/shopping/markets", params={"open_now": True})
+    assert _ids(first) == ["market-001", "market-002"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    closed = client.get("/api/shopping/markets", params={"open_now": False})
+    assert _ids(closed) == ["market-003"]
+
+    revalidate = {"If-None-Match": first.headers["ETag"]}
+    monkeypatch.setattr(shopping, "now_utc", lambda: datetime(2024, 6, 3, 9, 0, tzinfo=timezone.utc))
+    same_slot = client.get("/api/shopping/markets", params={"open_now": True}, headers=revalidate)
+    assert same_slot.status_code == 304
+
+    monkeypatch.setattr(shopping, "now_utc", lambda: datetime(2024, 6, 3, 19, 0, tzinfo=timezone.utc))
+    later = client.get("/api/shopping/markets", params={"open_now": True}, headers=revalidate)
+    assert _ids(later) == []
+
+
+def test_unknown_cities_use_the_default_zone() -> None:
+    assert city_timezone("Lisbon").key == "Europe/Lisbon"
+    assert city_timezone("Atlantis") == city_timezone(None) == ZoneInfo(DEFAULT_TIMEZONE)
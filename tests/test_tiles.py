@@ -0,0 +1,65 @@
+"""Tests for simplified, clipped safety zone tiles."""
+from __future__ import annotations
+
+import math
+
+from fastapi.testclient import TestClient
+
+from app.core.caching import response_cache
+from app.main import app
+from app.services.data_loader import load_records
+from app.services.geo import mercator_x, mercator_y
+from app.services.tiles import clip_ring, simplify, simplify_ring
+
+
+client = TestClient(app)
+PLAIN = {"Accept-Encoding": "identity"}
+
+
+def _tile_of(lat: float, lng: float, z: int) -> tuple:
+    return z, math.floor(mercator_x(lng) * 2**z), math.floor(mercator_y(lat) * 2**z)
+
+
+def test_douglas_peucker_drops_points_within_tolerance() -> None:
+    line = [(0.0, 0.0), (1.0, 0.01), (2.0, -0.01), (3.0, 5.0), (4.0, 6.0)]
+    assert simplify(line, 0.1) == [(0.0, 0.0), (2.0, -0.01), (3.0, 5.0), (4.0, 6.0)]
+    assert simplify(line, 10) == [(0.0, 0.0), (4.0, 6.0)]
+    assert simplify_ring([(0.0, 0.0), (0.0, 1e-6), (1e-6, 0.0)], 0.01) == []
+
+
+def test_clip_ring_to_rectangle() -> None:
+    square = [(0.0, 0.0), (2.0, 0.0), (2.0, 2.0), (0.0, 2.0)]
+    clipped = clip_ring(square, 1.0, 1.0, 3.0, 3.0)
+    assert sorted(clipped) == [(1.0, 1.0), (1.0, 2.0), (2.0, 1.0), (2.0, 2.0)]
+    assert clip_ring(square, 5.0, 5.0, 6.0, 6.0) == []
+
+
+def test_tile_contains_zones_it_covers() -> None:
+    zone = load_records("safety")[0]
+    z, x, y = _tile_of(zone.polygon[0].lat, zone.polygon[0].lng, 14)
+    response = client.get(f"/api/safety/tiles/{z}/{x}/{y}")
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    features = response.json()["features"]
+    assert zone.id in {feature["id"] for feature in features}
+    for feature in features:
+        ring = feature["geometry"]["coordinates"][0]
+        assert ring[0] == ring[-1]
+
+    world = client.get("/api/safety/tiles/0/0/0").json()["features"]
+    assert len(world) <= len(load_records("safety"))
+    assert client.get("/api/safety/tiles/14/0/0").json()["features"] == []
+
+
+def test_tiles_are_served_from_the_byte_cache() -> None:
+    response_cache.clear()
+    z, x, y = _tile_of(38.118, 13.37, 13)
+    first = client.get(f"/api/safety/tiles/{z}/{x}/{y}", headers=PLAIN)
+    second = client.get(f"/api/safety/tiles/{z}/{x}/{y}", headers=PLAIN)
+    assert first.content == second.content
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_out_of_range_tiles_are_rejected() -> None:
+    assert client.get("/api/safety/tiles/2/4/0").status_code == 404
+    assert client.get("/api/safety/tiles/23/0/0").status_code == 422
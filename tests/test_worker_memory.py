@@ -0,0 +1,99 @@
+"""Per-worker memory when datasets are preloaded before forking."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from app.services import data_loader
+from app.services.data_loader import get_snapshot, preload_snapshots
+
+
+SMAPS_ROLLUP = Path("/proc/self/smaps_rollup")
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork") or not SMAPS_ROLLUP.exists(),
+    reason="requires fork() and /proc/self/smaps_rollup",
+)
+
+
+@pytest.fixture
+def large_catalogue(data_dir: Path) -> Path:
+    rentals = [
+        {
+            "id": f"rent-{index:05d}",
+            "title": f"{index % 4 + 1}BR flat number {index} near the old town",
+            "price_eur": 500 + index % 900,
+            "bedrooms": index % 4 + 1,
+            "furnished": index % 2 == 0,
+            "kid_friendly": index % 3 == 0,
+            "pet_friendly": index % 5 == 0,
+            "neighborhood": ("Kalsa", "Politeama", "Mondello", "Ballarò")[index % 4],
+            "verified": True,
+            "coordinates": {"lat": 38.1 + index * 1e-6, "lng": 13.3 + index * 1e-6},
+            "contact": f"agent{index}@example.com",
+        }
+        for index in range(8000)
+    ]
+    (data_dir / "rentals.json").write_text(json.dumps(rentals), encoding="utf-8")
+    (data_dir / "cities.json").write_text(json.dumps(["Palermo"]), encoding="utf-8")
+    return data_dir
+
+
+def _unique_kib() -> int:
+    """Return this process's anonymous memory not shared with any other process."""
+
+    for line in SMAPS_ROLLUP.read_text().splitlines():
+        if line.startswith("Private_Dirty:"):
+            return int(line.split()[1])
+    raise AssertionError("Private_Dirty missing from smaps_rollup")
+
+
+def _serve_rentals() -> None:
+    snapshot = get_snapshot("rentals")
+    table = snapshot.table
+    furnished = table.column("furnished")
+    titles = table.column("title")
+    matches = [index for index in range(len(table)) if furnished[index] and "old town" in titles[index]]
+    assert matches
+
+
+def _worker_growth(work: Callable[[], None]) -> int:
+    """Fork a worker, run ``work`` in it and return its unique memory growth in KiB."""
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child process
+        status = 0
+        try:
+            os.close(read_end)
+            before = _unique_kib()
+            work()
+            os.write(write_end, str(_unique_kib() - before).encode())
+        except BaseException:
+            status = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(status)
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        payload = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    assert status == 0 and payload
+    return int(payload)
+
+
+def test_preloaded_workers_do_not_copy_datasets(large_catalogue: Path) -> None:
+    cold = [_worker_growth(_serve_rentals) for _ in range(2)]
+
+    preload_snapshots()
+    warm = [_worker_growth(_serve_rentals) for _ in range(2)]
+
+    # Each cold worker builds its own copy of the catalogue; preloaded workers only
+    # allocate what the request itself needs.
+    assert min(cold) > 1024
+    assert max(warm) * 4 < min(cold)
@@ -0,0 +1,112 @@
+"""Tests for safety zone point-in-polygon lookups."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import safety
+from app.main import app
+from app.models.base import GeoPoint, SafetyZone
+from app.services.data_loader import load_records
+from app.services.geo import haversine_m, polygon_centroid
+from app.services.zones import ZoneIndex
+
+
+client = TestClient(app)
+
+
+def _zone(zone_id: str, risk: str, ring: list) -> SafetyZone:
+    return SafetyZone(
+        id=zone_id,
+        neighborhood=zone_id.title(),
+        risk_level=risk,
+        description="",
+        trend="",
+        updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        polygon=[GeoPoint(lat=lat, lng=lng) for lat, lng in ring],
+    )
+
+
+def test_ray_casting_and_overlap_prefers_highest_risk() -> None:
+    square = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)]
+    # A concave "C" shape: the notch between its arms is outside.
+    notched = [
+        (0.0, 0.0), (0.0, 0.03), (0.01, 0.03), (0.01, 0.01), (0.02, 0.01), (0.02, 0.03), (0.03, 0.03), (0.03, 0.0)
+    ]
+    index = ZoneIndex(
+        [
+            _zone("calm", "low", square),
+            _zone("busy", "high", [(0.4, 0.4), (0.4, 0.6), (0.6, 0.6), (0.6, 0.4)]),
+            _zone("notched", "medium", [(lat + 2, lng + 2) for lat, lng in notched]),
+        ]
+    )
+    assert index.locate(0.2, 0.2) == 0
+    assert index.locate(0.5, 0.5) == 1
+    assert index.locate(1.5, 1.5) is None
+    assert index.locate(2.015, 2.005) == 2
+    assert index.locate(2.015, 2.02) is None
+    assert index.locate_many([(0.2, 0.2), (0.5, 0.5), (0.5, 0.51), (5.0, 5.0)]) == [0, 1, 1, None]
+
+
+def test_lookup_single_point() -> None:
+    zone = load_records("safety")[0]
+    lat, lng = polygon_centroid([(point.lat, point.lng) for point in zone.polygon])
+    response = client.get("/api/safety/lookup", params={"lat": lat, "lng": lng})
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    assert response.json()["zone_id"] == zone.id
+    assert response.json()["risk_level"] == zone.risk_level
+
+    outside = client.get("/api/safety/lookup", params={"lat": 0, "lng": 0}).json()
+    assert outside["zone_id"] is None and outside["risk_level"] is None
+
+
+def test_lookup_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    zones = load_records("safety")
+    centroids = [polygon_centroid([(point.lat, point.lng) for point in zone.polygon]) for zone in zones]
+    points = [{"lat": lat, "lng": lng} for lat, lng in centroids] + [{"lat": 0, "lng": 0}]
+    response = client.post("/api/safety/lookup", json={"points": points})
+    assert response.status_code == 200
+    assert [match["zone_id"] for match in response.json()] == [zone.id for zone in zones] + [None]
+
+    monkeypatch.setattr(safety.settings, "safety_lookup_max_points", 2)
+    assert client.post("/api/safety/lookup", json={"points": points}).status_code == 413
+    assert client.post("/api/safety/lookup", json={"points": []}).status_code == 422
+
+
+def test_route_exposure_splits_segments_at_zone_edges() -> None:
+    index = ZoneIndex(
+        [
+            _zone("calm", "low", [(38.0, 13.0), (38.0, 13.02), (38.02, 13.02), (38.02, 13.0)]),
+            _zone("busy", "high", [(38.0, 13.01), (38.0, 13.03), (38.02, 13.03), (38.02, 13.01)]),
+        ]
+    )
+    # Five equal stretches west to east: outside, low only, overlap (high wins), high only, outside.
+    route = [(38.01, 12.99), (38.01, 13.04)]
+    total, exposure = index.route_exposure(route)
+    assert total == pytest.approx(haversine_m(38.01, 12.99, 38.01, 13.04))
+    assert exposure[0] == pytest.approx(total / 5, rel=1e-6)
+    assert exposure[1] == pytest.approx(total * 2 / 5, rel=1e-6)
+    assert index.route_score(total, exposure) == pytest.approx((0.25 + 2 * 1.0) / 5, rel=1e-6)
+
+
+def test_route_risk_endpoint_accepts_points_and_polylines(monkeypatch: pytest.MonkeyPatch) -> None:
+    zone = load_records("safety")[0]
+    lat, lng = polygon_centroid([(point.lat, point.lng) for point in zone.polygon])
+    through = {"id": "through", "points": [{"lat": lat, "lng": lng - 0.01}, {"lat": lat, "lng": lng + 0.01}]}
+    elsewhere = {"id": "elsewhere", "polyline": "_p~iF~ps|U_ulLnnqC"}
+    response = client.post("/api/safety/route-risk", json={"routes": [through, elsewhere]})
+    assert response.status_code == 200
+    scored, quiet = response.json()
+    assert scored["id"] == "through"
+    assert zone.id in {exposure["zone_id"] for exposure in scored["zones"]}
+    assert 0 < scored["score"] <= 1
+    assert quiet["zones"] == [] and quiet["score"] == 0 and quiet["distance_m"] > 200_000
+
+    both = {"points": through["points"], "polyline": "_p~iF~ps|U_ulLnnqC"}
+    assert client.post("/api/safety/route-risk", json={"routes": [both]}).status_code == 422
+    assert client.post("/api/safety/route-risk", json={"routes": [{"polyline": "_p~iF~"}]}).status_code == 400
+    monkeypatch.setattr(safety.settings, "route_risk_max_routes", 1)
+    assert client.post("/api/safety/route-risk", json={"routes": [through, elsewhere]}).status_code == 413